@@ -1,517 +1,663 @@
-from flask import Flask, jsonify, send_from_directory, request, Response
-from flask_cors import CORS
-import os
-import json
-import glob
-import cv2
-import time
-from datetime import datetime
-
-app = Flask(__name__)
-CORS(app)
-
-# =========================
-# BASE DIR - FIX PATH
-# =========================
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-
-# Các thư mục evidence - SỬA ĐƯỜNG DẪN CHO ĐÚNG
-EVIDENCE_IMAGE_DIR = os.path.join(BASE_DIR, "evidence", "images")
-EVIDENCE_VIDEO_DIR = os.path.join(BASE_DIR, "evidence", "videos")  # ĐÂY RỒI!
-EVIDENCE_LOG_DIR = os.path.join(BASE_DIR, "evidence", "logs", "log1")
-
-# Nếu không tìm thấy, thử các đường dẫn khác
-if not os.path.exists(EVIDENCE_VIDEO_DIR):
-    # Thử tìm trong các vị trí khác có thể
-    possible_video_dirs = [
-        os.path.join(BASE_DIR, "evidence", "videos"),
-        os.path.join(BASE_DIR, "evidence", "video"),
-        os.path.join(BASE_DIR, "videos"),
-        os.path.join(BASE_DIR, "video"),
-        os.path.join(BASE_DIR, "docs", "evidence", "videos"),
-        os.path.join(BASE_DIR, "docs", "evidence", "video"),
-    ]
-    
-    for video_dir in possible_video_dirs:
-        if os.path.exists(video_dir):
-            EVIDENCE_VIDEO_DIR = video_dir
-            print(f"Found videos in: {EVIDENCE_VIDEO_DIR}")
-            break
-
-# Tạo thư mục nếu chưa tồn tại
-os.makedirs(EVIDENCE_IMAGE_DIR, exist_ok=True)
-os.makedirs(EVIDENCE_VIDEO_DIR, exist_ok=True)
-os.makedirs(EVIDENCE_LOG_DIR, exist_ok=True)
-
-print("=" * 60)
-print("SYSTEM PATHS CONFIGURED:")
-print(f"📁 BASE_DIR: {BASE_DIR}")
-print(f"🖼️  IMAGE_DIR: {EVIDENCE_IMAGE_DIR}")
-print(f"🎥 VIDEO_DIR: {EVIDENCE_VIDEO_DIR}")
-print(f"📝 LOG_DIR: {EVIDENCE_LOG_DIR}")
-print("=" * 60)
-
-# =========================
-# ROUTES FOR DASHBOARD
-# =========================
-@app.route("/")
-def dashboard_home():
-    return send_from_directory("../dashboard", 'index.html')
-
-@app.route("/video")
-def video_monitoring():
-    return send_from_directory("../dashboard", 'video.html')
-
-@app.route("/test")
-def test_page():
-    return send_from_directory("../dashboard", 'test.html')
-
-@app.route("/<path:filename>")
-def dashboard_files(filename):
-    return send_from_directory("../dashboard", filename)
-
-# =========================
-# API: SCAN AND GET ALL VIDEOS
-# =========================
-@app.route("/api/videos", methods=["GET"])
-def get_videos():
-    """Lấy danh sách tất cả video trong thư mục videos"""
-    print(f"🔍 Scanning video directory: {EVIDENCE_VIDEO_DIR}")
-    
-    if not os.path.exists(EVIDENCE_VIDEO_DIR):
-        print(f"❌ Video directory does not exist: {EVIDENCE_VIDEO_DIR}")
-        # Tạo thư mục nếu không tồn tại
-        os.makedirs(EVIDENCE_VIDEO_DIR, exist_ok=True)
-        print(f"✅ Created video directory: {EVIDENCE_VIDEO_DIR}")
-        return jsonify([])
-    
-    videos = []
-    video_extensions = ('.mp4', '.avi', '.mov', '.mkv', '.webm', '.flv', '.wmv', '.m4v')
-    
-    try:
-        files = os.listdir(EVIDENCE_VIDEO_DIR)
-        print(f"📂 Found {len(files)} files in video directory")
-        
-        for file in sorted(files):
-            file_lower = file.lower()
-            if file_lower.endswith(video_extensions):
-                file_path = os.path.join(EVIDENCE_VIDEO_DIR, file)
-                
-                try:
-                    stat = os.stat(file_path)
-                    
-                    # Lấy thông tin cơ bản
-                    video_info = {
-                        "name": file,
-                        "size": stat.st_size,
-                        "size_formatted": format_size(stat.st_size),
-                        "created": stat.st_ctime,
-                        "created_formatted": datetime.fromtimestamp(stat.st_ctime).strftime('%Y-%m-%d %H:%M:%S'),
-                        "modified": stat.st_mtime,
-                        "path": f"/evidence/videos/{file}",
-                        "url": f"http://localhost:5000/evidence/videos/{file}",
-                        "type": "video"
-                    }
-                    
-                    # Thử lấy duration từ video
-                    try:
-                        cap = cv2.VideoCapture(file_path)
-                        if cap.isOpened():
-                            fps = cap.get(cv2.CAP_PROP_FPS)
-                            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                            
-                            if fps > 0:
-                                duration = frame_count / fps
-                                video_info["duration"] = duration
-                                video_info["duration_formatted"] = format_duration(duration)
-                                video_info["fps"] = fps
-                                video_info["frames"] = frame_count
-                            
-                            # Lấy thumbnail (frame đầu tiên)
-                            ret, frame = cap.read()
-                            if ret:
-                                # Lưu thumbnail
-                                thumb_dir = os.path.join(EVIDENCE_IMAGE_DIR, "thumbnails")
-                                os.makedirs(thumb_dir, exist_ok=True)
-                                thumb_path = os.path.join(thumb_dir, f"{os.path.splitext(file)[0]}.jpg")
-                                
-                                if not os.path.exists(thumb_path):
-                                    cv2.imwrite(thumb_path, frame)
-                                    print(f"✅ Created thumbnail: {thumb_path}")
-                                
-                                video_info["thumbnail"] = f"/evidence/images/thumbnails/{os.path.splitext(file)[0]}.jpg"
-                            
-                            cap.release()
-                    except Exception as e:
-                        print(f"⚠️  Could not extract video info for {file}: {e}")
-                        video_info["duration"] = 0
-                        video_info["duration_formatted"] = "00:00"
-                    
-                    # Đếm số vi phạm trong video này
-                    video_base = os.path.splitext(file)[0]
-                    violation_count = count_violations_for_video(video_base)
-                    video_info["violation_count"] = violation_count
-                    
-                    videos.append(video_info)
-                    print(f"✅ Added video: {file} ({format_size(stat.st_size)}) - {violation_count} violations")
-                    
-                except Exception as e:
-                    print(f"❌ Error processing video {file}: {e}")
-    
-    except Exception as e:
-        print(f"❌ Error listing video directory: {e}")
-    
-    print(f"🎬 Total videos found: {len(videos)}")
-    return jsonify(videos)
-
-# =========================
-# API: GET ALL VIOLATIONS
-# =========================
-@app.route("/api/violations", methods=["GET"])
-def get_violations():
-    """Lấy tất cả vi phạm từ log files"""
-    results = []
-    
-    if not os.path.exists(EVIDENCE_LOG_DIR):
-        print(f"📝 Log directory not found: {EVIDENCE_LOG_DIR}")
-        # Thử tìm trong các vị trí khác
-        possible_log_dirs = [
-            os.path.join(BASE_DIR, "evidence", "logs", "log1"),
-            os.path.join(BASE_DIR, "evidence", "logs"),
-            os.path.join(BASE_DIR, "logs"),
-            os.path.join(BASE_DIR, "docs", "evidence", "logs", "log1"),
-        ]
-        
-        for log_dir in possible_log_dirs:
-            if os.path.exists(log_dir):
-                EVIDENCE_LOG_DIR = log_dir
-                print(f"📝 Found logs in: {EVIDENCE_LOG_DIR}")
-                break
-        else:
-            return jsonify([])
-    
-    print(f"🔍 Scanning log directory: {EVIDENCE_LOG_DIR}")
-    
-    try:
-        log_files = os.listdir(EVIDENCE_LOG_DIR)
-        print(f"📄 Found {len(log_files)} log files")
-        
-        for file in sorted(log_files):
-            if file.endswith(".json"):
-                file_path = os.path.join(EVIDENCE_LOG_DIR, file)
-                print(f"📖 Processing log file: {file}")
-                
-                try:
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                        
-                        if isinstance(data, list):
-                            for i, violation in enumerate(data):
-                                # Đảm bảo có các trường bắt buộc
-                                violation_id = f"{file}_{i}_{int(time.time())}"
-                                violation["id"] = violation_id
-                                violation["log_file"] = file
-                                
-                                # Thêm URL cho ảnh
-                                if "image" in violation and violation["image"]:
-                                    violation["image_url"] = f"/evidence/images/{violation['image']}"
-                                
-                                # Thêm URL cho video
-                                video_name = file.replace('.json', '.mp4')
-                                violation["video"] = video_name
-                                violation["video_url"] = f"/evidence/videos/{video_name}"
-                                
-                                # Format thời gian
-                                if "time" in violation:
-                                    try:
-                                        # Cố gắng parse thời gian
-                                        if isinstance(violation["time"], (int, float)):
-                                            violation["time_formatted"] = datetime.fromtimestamp(violation["time"]).strftime('%Y-%m-%d %H:%M:%S')
-                                        else:
-                                            violation["time_formatted"] = violation["time"]
-                                    except:
-                                        violation["time_formatted"] = violation.get("time", "N/A")
-                                
-                                # Thêm timestamp nếu chưa có
-                                if "timestamp" not in violation:
-                                    violation["timestamp"] = time.time()
-                            
-                            results.extend(data)
-                            print(f"✅ Added {len(data)} violations from {file}")
-                        
-                except Exception as e:
-                    print(f"❌ Error reading {file}: {e}")
-                    import traceback
-                    traceback.print_exc()
-    
-    except Exception as e:
-        print(f"❌ Error accessing log directory: {e}")
-    
-    print(f"🚨 Total violations found: {len(results)}")
-    return jsonify(results)
-
-# =========================
-# API: GET VIOLATIONS BY VIDEO
-# =========================
-@app.route("/api/video/<video_name>/violations", methods=["GET"])
-def get_video_violations(video_name):
-    """Lấy vi phạm theo video"""
-    video_base = os.path.splitext(video_name)[0]
-    violations = []
-    
-    if not os.path.exists(EVIDENCE_LOG_DIR):
-        return jsonify([])
-    
-    print(f"🔍 Looking for violations in video: {video_name}")
-    
-    try:
-        for file in os.listdir(EVIDENCE_LOG_DIR):
-            if file.endswith(".json"):
-                # Kiểm tra xem log file có match với video không
-                log_base = os.path.splitext(file)[0]
-                
-                # So sánh tên file (có thể có prefix/suffix khác)
-                if video_base in log_base or log_base in video_base or file.replace('.json', '') == video_base:
-                    file_path = os.path.join(EVIDENCE_LOG_DIR, file)
-                    
-                    try:
-                        with open(file_path, "r", encoding="utf-8") as f:
-                            data = json.load(f)
-                            if isinstance(data, list):
-                                for violation in data:
-                                    violation['log_file'] = file
-                                    violation['video'] = video_name
-                                    violations.append(violation)
-                        
-                        print(f"✅ Found {len(data)} violations in log: {file}")
-                        
-                    except Exception as e:
-                        print(f"❌ Error reading log {file}: {e}")
-    
-    except Exception as e:
-        print(f"❌ Error scanning logs: {e}")
-    
-    print(f"🎯 Found {len(violations)} violations for video {video_name}")
-    return jsonify(violations)
-
-# =========================
-# SERVE MEDIA FILES
-# =========================
-@app.route("/evidence/images/<path:filename>")
-def serve_evidence_image(filename):
-    """Phục vụ file ảnh"""
-    return send_from_directory(EVIDENCE_IMAGE_DIR, filename)
-
-@app.route("/evidence/videos/<path:filename>")
-def serve_evidence_video(filename):
-    """Phục vụ file video"""
-    print(f"🎬 Serving video: {filename}")
-    
-    # Kiểm tra nhiều vị trí có thể
-    possible_paths = [
-        os.path.join(EVIDENCE_VIDEO_DIR, filename),
-        os.path.join(BASE_DIR, "evidence", "videos", filename),
-        os.path.join(BASE_DIR, "videos", filename),
-    ]
-    
-    for video_path in possible_paths:
-        if os.path.exists(video_path):
-            print(f"✅ Video found at: {video_path}")
-            return send_from_directory(os.path.dirname(video_path), os.path.basename(video_path))
-    
-    print(f"❌ Video not found: {filename}")
-    return jsonify({"error": "Video file not found", "filename": filename}), 404
-
-# =========================
-# API: GET SYSTEM INFO
-# =========================
-@app.route("/api/system/info", methods=["GET"])
-def get_system_info():
-    """Thông tin hệ thống"""
-    return jsonify({
-        "base_dir": BASE_DIR,
-        "image_dir": EVIDENCE_IMAGE_DIR,
-        "video_dir": EVIDENCE_VIDEO_DIR,
-        "log_dir": EVIDENCE_LOG_DIR,
-        "image_count": count_files(EVIDENCE_IMAGE_DIR, ('.jpg', '.jpeg', '.png', '.bmp')),
-        "video_count": count_files(EVIDENCE_VIDEO_DIR, ('.mp4', '.avi', '.mov', '.mkv')),
-        "log_count": count_files(EVIDENCE_LOG_DIR, ('.json',)),
-        "timestamp": datetime.now().isoformat(),
-        "api_endpoints": {
-            "videos": "http://localhost:5000/api/videos",
-            "violations": "http://localhost:5000/api/violations",
-            "health": "http://localhost:5000/api/health",
-            "system_info": "http://localhost:5000/api/system/info"
-        }
-    })
-
-# =========================
-# HEALTH CHECK
-# =========================
-@app.route("/api/health", methods=["GET"])
-def health():
-    """Kiểm tra trạng thái hệ thống"""
-    return jsonify({
-        "status": "running",
-        "timestamp": datetime.now().isoformat(),
-        "service": "Traffic Violation API",
-        "version": "1.0.0",
-        "directories": {
-            "images": {
-                "path": EVIDENCE_IMAGE_DIR,
-                "exists": os.path.exists(EVIDENCE_IMAGE_DIR),
-                "count": count_files(EVIDENCE_IMAGE_DIR, ('.jpg', '.jpeg', '.png', '.bmp'))
-            },
-            "videos": {
-                "path": EVIDENCE_VIDEO_DIR,
-                "exists": os.path.exists(EVIDENCE_VIDEO_DIR),
-                "count": count_files(EVIDENCE_VIDEO_DIR, ('.mp4', '.avi', '.mov', '.mkv'))
-            },
-            "logs": {
-                "path": EVIDENCE_LOG_DIR,
-                "exists": os.path.exists(EVIDENCE_LOG_DIR),
-                "count": count_files(EVIDENCE_LOG_DIR, ('.json',))
-            }
-        }
-    })
-
-# =========================
-# API: GET DIRECTORY LISTING
-# =========================
-@app.route("/api/directory/<path:subpath>", methods=["GET"])
-def list_directory(subpath=""):
-    """Liệt kê thư mục (debug)"""
-    target_dir = os.path.join(BASE_DIR, subpath)
-    
-    if not os.path.exists(target_dir):
-        return jsonify({"error": "Directory not found", "path": target_dir}), 404
-    
-    items = []
-    for item in os.listdir(target_dir):
-        item_path = os.path.join(target_dir, item)
-        items.append({
-            "name": item,
-            "type": "directory" if os.path.isdir(item_path) else "file",
-            "size": os.path.getsize(item_path) if os.path.isfile(item_path) else 0,
-            "path": item_path
-        })
-    
-    return jsonify({
-        "path": target_dir,
-        "items": items,
-        "count": len(items)
-    })
-
-# =========================
-# UTILITY FUNCTIONS
-# =========================
-def count_violations_for_video(video_base):
-    """Đếm số vi phạm cho video cụ thể"""
-    count = 0
-    if not os.path.exists(EVIDENCE_LOG_DIR):
-        return 0
-    
-    for file in os.listdir(EVIDENCE_LOG_DIR):
-        if file.endswith(".json"):
-            log_base = os.path.splitext(file)[0]
-            # Kiểm tra tương quan giữa video và log
-            if video_base in log_base or log_base in video_base or file.replace('.json', '') == video_base:
-                file_path = os.path.join(EVIDENCE_LOG_DIR, file)
-                try:
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                        if isinstance(data, list):
-                            count += len(data)
-                except:
-                    pass
-    return count
-
-def count_files(directory, extensions):
-    """Đếm file với extension cụ thể"""
-    if not os.path.exists(directory):
-        return 0
-    
-    count = 0
-    for file in os.listdir(directory):
-        if file.lower().endswith(extensions):
-            count += 1
-    return count
-
-def format_size(size_in_bytes):
-    """Định dạng kích thước file"""
-    if size_in_bytes == 0:
-        return "0 Bytes"
-    
-    units = ['Bytes', 'KB', 'MB', 'GB', 'TB']
-    i = 0
-    while size_in_bytes >= 1024 and i < len(units) - 1:
-        size_in_bytes /= 1024
-        i += 1
-    
-    return f"{size_in_bytes:.2f} {units[i]}"
-
-def format_duration(seconds):
-    """Định dạng thời lượng video"""
-    if seconds == 0:
-        return "00:00"
-    
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    
-    if hours > 0:
-        return f"{hours:02d}:{minutes:02d}:{secs:02d}"
-    else:
-        return f"{minutes:02d}:{secs:02d}"
-
-# =========================
-# DEBUG ENDPOINT
-# =========================
-@app.route("/api/debug/paths", methods=["GET"])
-def debug_paths():
-    """Debug endpoint - hiển thị tất cả đường dẫn"""
-    return jsonify({
-        "base_dir": BASE_DIR,
-        "evidence_video_dir": EVIDENCE_VIDEO_DIR,
-        "evidence_image_dir": EVIDENCE_IMAGE_DIR,
-        "evidence_log_dir": EVIDENCE_LOG_DIR,
-        "video_dir_exists": os.path.exists(EVIDENCE_VIDEO_DIR),
-        "video_dir_contents": os.listdir(EVIDENCE_VIDEO_DIR) if os.path.exists(EVIDENCE_VIDEO_DIR) else [],
-        "image_dir_exists": os.path.exists(EVIDENCE_IMAGE_DIR),
-        "log_dir_exists": os.path.exists(EVIDENCE_LOG_DIR),
-        "current_working_dir": os.getcwd(),
-        "script_dir": os.path.dirname(os.path.abspath(__file__))
-    })
-
-# =========================
-# MAIN
-# =========================
-if __name__ == "__main__":
-    print("=" * 70)
-    print("🚦 TRAFFIC VIOLATION MONITORING SYSTEM - API SERVER")
-    print("=" * 70)
-    print(f"📁 Base Directory: {BASE_DIR}")
-    print(f"🖼️  Images Directory: {EVIDENCE_IMAGE_DIR}")
-    print(f"🎥 Videos Directory: {EVIDENCE_VIDEO_DIR}")
-    print(f"📝 Logs Directory: {EVIDENCE_LOG_DIR}")
-    print("-" * 70)
-    print(f"🌐 Dashboard URL: http://localhost:5000")
-    print(f"🎬 Video Monitoring: http://localhost:5000/video")
-    print(f"🔧 API Base: http://localhost:5000/api")
-    print(f"🐞 Debug Paths: http://localhost:5000/api/debug/paths")
-    print("=" * 70)
-    
-    # Kiểm tra thư mục video
-    if os.path.exists(EVIDENCE_VIDEO_DIR):
-        videos = [f for f in os.listdir(EVIDENCE_VIDEO_DIR) if f.lower().endswith(('.mp4', '.avi', '.mov', '.mkv'))]
-        print(f"\n🎥 Found {len(videos)} videos in {EVIDENCE_VIDEO_DIR}:")
-        for video in videos[:10]:  # Hiển thị 10 video đầu tiên
-            print(f"  • {video}")
-        if len(videos) > 10:
-            print(f"  ... and {len(videos) - 10} more")
-    else:
-        print(f"\n❌ Video directory not found: {EVIDENCE_VIDEO_DIR}")
-        print("💡 Please create the directory and add video files")
-    
-    print("\n🚀 Starting server...")
+from flask import Flask, jsonify, send_from_directory, send_file, request, Response, stream_with_context
+from werkzeug.security import safe_join
+from flask_cors import CORS
+import os
+import json
+import glob
+import cv2
+import sys
+import time
+import threading
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.store import ViolationStore, parse_time
+
+try:
+    from .video_index import VideoIndex
+    from .live_feed import LiveFeed
+    from .http_cache import ResponseCache, compress_response, conditional_json, versioned_json
+    from .live_frames import LiveFrames
+except ImportError:
+    from video_index import VideoIndex
+    from live_feed import LiveFeed
+    from http_cache import ResponseCache, compress_response, conditional_json, versioned_json
+    from live_frames import LiveFrames
+
+app = Flask(__name__)
+CORS(app)
+
+# =========================
+# BASE DIR - FIX PATH
+# =========================
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Các thư mục evidence - SỬA ĐƯỜNG DẪN CHO ĐÚNG
+EVIDENCE_IMAGE_DIR = os.path.join(BASE_DIR, "evidence", "images")
+EVIDENCE_VIDEO_DIR = os.path.join(BASE_DIR, "evidence", "videos")  # ĐÂY RỒI!
+EVIDENCE_LOG_DIR = os.path.join(BASE_DIR, "evidence", "logs", "log1")
+# Trạng thái warm-up model do pipeline ghi ra (src/warmup.py)
+READINESS_FILE = os.path.join(BASE_DIR, "evidence", "readiness.json")
+# Metrics mỗi process pipeline ghi 1 file .prom (src/metrics.py)
+METRICS_DIR = os.path.join(BASE_DIR, "evidence", "metrics")
+METRICS_STALE_SECONDS = 30
+
+# Nếu không tìm thấy, thử các đường dẫn khác
+if not os.path.exists(EVIDENCE_VIDEO_DIR):
+    # Thử tìm trong các vị trí khác có thể
+    possible_video_dirs = [
+        os.path.join(BASE_DIR, "evidence", "videos"),
+        os.path.join(BASE_DIR, "evidence", "video"),
+        os.path.join(BASE_DIR, "videos"),
+        os.path.join(BASE_DIR, "video"),
+        os.path.join(BASE_DIR, "docs", "evidence", "videos"),
+        os.path.join(BASE_DIR, "docs", "evidence", "video"),
+    ]
+    
+    for video_dir in possible_video_dirs:
+        if os.path.exists(video_dir):
+            EVIDENCE_VIDEO_DIR = video_dir
+            print(f"Found videos in: {EVIDENCE_VIDEO_DIR}")
+            break
+
+# Tạo thư mục nếu chưa tồn tại
+os.makedirs(EVIDENCE_IMAGE_DIR, exist_ok=True)
+os.makedirs(EVIDENCE_VIDEO_DIR, exist_ok=True)
+os.makedirs(EVIDENCE_LOG_DIR, exist_ok=True)
+
+# Index vi phạm (SQLite WAL) do pipeline ghi; log JSON cũ được nạp nền lúc khởi động
+VIOLATION_DB = os.path.join(BASE_DIR, "evidence", "violations.db")
+VIOLATION_PAGE_SIZE = 100
+VIOLATION_MAX_PAGE_SIZE = 1000
+violation_store = ViolationStore(VIOLATION_DB)
+
+# Index metadata video (SQLite), quét nền mỗi VIDEO_INDEX_INTERVAL giây
+VIDEO_INDEX_DB = os.path.join(BASE_DIR, "evidence", "index", "videos.db")
+VIDEO_INDEX_INTERVAL = 10
+# Video mới được chuyển sang MP4 faststart (seek ngay); HLS cần ffmpeg
+VIDEO_FASTSTART = True
+VIDEO_HLS_ENABLED = False
+VIDEO_HLS_SEGMENT_SECONDS = 4
+EVIDENCE_HLS_DIR = os.path.join(BASE_DIR, "evidence", "hls")
+video_index = VideoIndex(
+    VIDEO_INDEX_DB,
+    EVIDENCE_VIDEO_DIR,
+    os.path.join(EVIDENCE_IMAGE_DIR, "thumbnails"),
+    violation_store,
+    interval=VIDEO_INDEX_INTERVAL,
+    faststart=VIDEO_FASTSTART,
+    hls_dir=EVIDENCE_HLS_DIR if VIDEO_HLS_ENABLED else None,
+    hls_segment=VIDEO_HLS_SEGMENT_SECONDS
+)
+
+legacy_imported = threading.Event()
+
+def import_legacy_logs():
+    try:
+        added = violation_store.import_logs(os.path.join(BASE_DIR, "evidence", "logs"))
+        if added:
+            print(f"📥 Imported {added} violations from JSON logs")
+    except Exception as e:
+        print(f"❌ Error importing logs: {e}")
+    finally:
+        legacy_imported.set()
+
+threading.Thread(target=import_legacy_logs, name="import-logs", daemon=True).start()
+
+# Live feed (SSE): 1 thread hỏi store mỗi LIVE_FEED_INTERVAL giây, đẩy cho mọi client.
+# Chỉ bắt đầu sau khi nạp xong log cũ: log cũ không bị đẩy như vi phạm mới
+LIVE_FEED_INTERVAL = 1.0
+LIVE_FEED_HEARTBEAT = 15
+live_feed = LiveFeed(violation_store, video_index, interval=LIVE_FEED_INTERVAL, after=legacy_imported)
+
+# Xem trực tiếp: pipeline ghi frame annotate vào evidence/live/<camera>.jpg
+LIVE_DIR = os.path.join(BASE_DIR, "evidence", "live")
+LIVE_KEEPALIVE_SECONDS = 5
+live_frames = LiveFrames(LIVE_DIR)
+
+# HTTP cache: ETag từ bộ đếm thay đổi trong RAM (id vi phạm mới nhất của live
+# feed + VideoIndex.version), body JSON / bản nén cache theo ETag
+response_cache = ResponseCache()
+file_counts = {}
+
+def evidence_version():
+    live_feed.start()
+    video_index.start()
+    # Đang nạp log cũ: live feed chưa có mốc, hỏi thẳng store
+    last_id = live_feed.last_id if live_feed.ready.is_set() else violation_store.last_id()
+    return last_id, video_index.version
+
+@app.after_request
+def compress(response):
+    """Nén gzip / brotli cho JSON / text lớn"""
+    return compress_response(response, response_cache)
+
+print("=" * 60)
+print("SYSTEM PATHS CONFIGURED:")
+print(f"📁 BASE_DIR: {BASE_DIR}")
+print(f"🖼️  IMAGE_DIR: {EVIDENCE_IMAGE_DIR}")
+print(f"🎥 VIDEO_DIR: {EVIDENCE_VIDEO_DIR}")
+print(f"📝 LOG_DIR: {EVIDENCE_LOG_DIR}")
+print("=" * 60)
+
+# =========================
+# ROUTES FOR DASHBOARD
+# =========================
+@app.route("/")
+def dashboard_home():
+    return send_from_directory("../dashboard", 'index.html')
+
+@app.route("/video")
+def video_monitoring():
+    return send_from_directory("../dashboard", 'video.html')
+
+@app.route("/test")
+def test_page():
+    return send_from_directory("../dashboard", 'test.html')
+
+@app.route("/<path:filename>")
+def dashboard_files(filename):
+    return send_from_directory("../dashboard", filename)
+
+# =========================
+# API: SCAN AND GET ALL VIDEOS
+# =========================
+@app.route("/api/videos", methods=["GET"])
+def get_videos():
+    """Lấy danh sách video từ index (worker nền probe file mới / thay đổi)"""
+    video_index.start()
+    # Lần gọi đầu tiên: chờ ngắn cho lượt quét đầu
+    video_index.wait_ready(timeout=5)
+    if request.args.get("refresh"):
+        video_index.refresh()
+
+    # ETag theo VideoIndex.version: không đổi → 304, không đọc SQLite
+    return versioned_json(response_cache, evidence_version(), list_videos)
+
+def list_videos():
+    videos = []
+    for row in video_index.list():
+        name = row["name"]
+        video_info = {
+            "name": name,
+            "size": row["size"],
+            "size_formatted": format_size(row["size"]),
+            "created": row["ctime"],
+            "created_formatted": datetime.fromtimestamp(row["ctime"]).strftime('%Y-%m-%d %H:%M:%S'),
+            "modified": row["mtime"],
+            "path": f"/evidence/videos/{name}",
+            "url": f"http://localhost:5000/evidence/videos/{name}",
+            "type": "video",
+            "duration": row["duration"] or 0,
+            "duration_formatted": format_duration(row["duration"] or 0),
+            "violation_count": row["violation_count"]
+        }
+        if row["fps"]:
+            video_info["fps"] = row["fps"]
+            video_info["frames"] = row["frames"]
+        if row["thumbnail"]:
+            video_info["thumbnail"] = f"/evidence/images/thumbnails/{row['thumbnail']}"
+        if row["hls"]:
+            video_info["hls_url"] = f"/evidence/hls/{row['hls']}"
+        videos.append(video_info)
+    return videos
+
+# =========================
+# API: GET VIOLATIONS (PHÂN TRANG)
+# =========================
+@app.route("/api/violations", methods=["GET"])
+def get_violations():
+    """
+    Vi phạm mới nhất trước, phân trang theo cursor.
+    Query: limit, cursor (next_cursor của trang trước), start / end (epoch
+    hoặc ISO), plate (prefix biển số), video, camera.
+    """
+    try:
+        limit = min(max(int(request.args.get("limit", VIOLATION_PAGE_SIZE)), 1), VIOLATION_MAX_PAGE_SIZE)
+        start = parse_time(request.args.get("start"))
+        end = parse_time(request.args.get("end"))
+
+        def build():
+            items, next_cursor = violation_store.query(
+                start=start,
+                end=end,
+                plate=request.args.get("plate"),
+                video=request.args.get("video"),
+                camera=request.args.get("camera"),
+                cursor=request.args.get("cursor"),
+                limit=limit
+            )
+            return {
+                "items": [format_violation(v) for v in items],
+                "next_cursor": next_cursor,
+                "limit": limit
+            }
+
+        return versioned_json(response_cache, evidence_version(), build)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query: {e}"}), 400
+
+@app.route("/api/violations/summary", methods=["GET"])
+def get_violations_summary():
+    """Tổng số vi phạm, hôm nay, số biển số khác nhau (dùng cho thẻ thống kê)"""
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def build():
+        summary = violation_store.summary(since=today.timestamp())
+        return {
+            "total": summary["total"],
+            "today": summary["since"],
+            "unique_plates": summary["unique_plates"]
+        }
+
+    return versioned_json(response_cache, (evidence_version(), today.date()), build)
+
+# =========================
+# API: LIVE FEED (SERVER-SENT EVENTS)
+# =========================
+@app.route("/api/stream", methods=["GET"])
+def stream_events():
+    """
+    Đẩy vi phạm mới (event: violation, id = id vi phạm) và thay đổi danh sách
+    video (event: videos). Resume: header Last-Event-ID (EventSource tự gửi khi
+    kết nối lại) hoặc ?last_event_id= cho lần kết nối đầu.
+    """
+    live_feed.start()
+    video_index.start()
+
+    cursor = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        last_id = int(cursor) if cursor else None
+    except ValueError:
+        return jsonify({"error": f"Invalid Last-Event-ID: {cursor}"}), 400
+
+    def generate(last_id):
+        videos_version = live_feed.videos_version
+        yield "retry: 3000\n\n"
+        # Không có cursor: chỉ nhận vi phạm sau mốc của live feed (chờ nạp log cũ xong)
+        while last_id is None and not live_feed.stop_event.is_set():
+            if live_feed.ready.wait(LIVE_FEED_HEARTBEAT):
+                last_id = live_feed.last_id
+            else:
+                yield ": ping\n\n"
+        while not live_feed.stop_event.is_set():
+            items, version = live_feed.wait(last_id, videos_version, LIVE_FEED_HEARTBEAT)
+            for v in items:
+                last_id = v["id"]
+                data = json.dumps(format_violation(dict(v)), ensure_ascii=False)  # buffer dùng chung
+                yield f"id: {last_id}\nevent: violation\ndata: {data}\n\n"
+            if version != videos_version:
+                videos_version = version
+                yield f"event: videos\ndata: {json.dumps({'version': version})}\n\n"
+            elif not items:
+                yield ": ping\n\n"   # giữ kết nối qua proxy, phát hiện client đã đóng
+
+    return Response(
+        stream_with_context(generate(last_id)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# =========================
+# API: LIVE VIEW (MJPEG)
+# =========================
+@app.route("/api/live", methods=["GET"])
+def list_live_cameras():
+    """Camera đang phát (pipeline vừa ghi frame)"""
+    return jsonify({
+        "cameras": [
+            dict(c, stream=f"/api/live/{c['camera']}", snapshot=f"/api/live/{c['camera']}/snapshot")
+            for c in live_frames.cameras()
+        ],
+        "viewers": live_frames.stats()["viewers"]
+    })
+
+@app.route("/api/live/<camera>", methods=["GET"])
+def stream_live(camera):
+    """
+    MJPEG (multipart/x-mixed-replace) dùng được trực tiếp trong <img>.
+    JPEG encode 1 lần ở pipeline, mọi client nhận cùng bytes; client chậm
+    bỏ qua frame trung gian và luôn nhận frame mới nhất.
+    """
+    def generate():
+        live_frames.subscribe(camera)
+        try:
+            seq, jpeg = 0, None
+            while True:
+                new_seq, frame = live_frames.wait(camera, seq, LIVE_KEEPALIVE_SECONDS)
+                if frame is not None:
+                    seq, jpeg = new_seq, frame
+                elif jpeg is None or not live_frames.is_live(camera):
+                    # Camera chưa phát / đã dừng (file bị xoá hoặc quá cũ):
+                    # đóng stream, dashboard tự kiểm tra lại danh sách camera
+                    return
+                # Hết timeout: gửi lại frame cuối để giữ kết nối / phát hiện client đã đóng
+                yield (
+                    b"--frame\r\nContent-Type: image/jpeg\r\n"
+                    + f"Content-Length: {len(jpeg)}\r\n\r\n".encode()
+                    + jpeg + b"\r\n"
+                )
+        finally:
+            live_frames.unsubscribe(camera)
+
+    return Response(
+        generate(),
+        mimetype="multipart/x-mixed-replace; boundary=frame",
+        headers={"Cache-Control": "no-cache, no-store", "X-Accel-Buffering": "no"}
+    )
+
+@app.route("/api/live/<camera>/snapshot", methods=["GET"])
+def live_snapshot(camera):
+    """Frame mới nhất (JPEG)"""
+    path = safe_join(LIVE_DIR, f"{camera}.jpg")
+    if path is None or not live_frames.is_live(camera):
+        return jsonify({"error": "Camera is not live", "camera": camera}), 404
+    response = send_file(path, mimetype="image/jpeg", max_age=0)
+    response.headers["Cache-Control"] = "no-cache, no-store"
+    return response
+
+# =========================
+# API: GET VIOLATIONS BY VIDEO
+# =========================
+@app.route("/api/video/<video_name>/violations", methods=["GET"])
+def get_video_violations(video_name):
+    """Lấy vi phạm theo video"""
+    def build():
+        items, _ = violation_store.query(video=video_name, limit=VIOLATION_MAX_PAGE_SIZE)
+        return [format_violation(v) for v in items]
+
+    return versioned_json(response_cache, evidence_version(), build)
+
+def format_violation(violation):
+    """Thêm URL ảnh / video và thời gian dạng đọc được cho 1 bản ghi từ store"""
+    if violation.get("image"):
+        violation["image_url"] = f"/evidence/images/{violation['image']}"
+    if violation.get("video"):
+        violation["video_url"] = f"/evidence/videos/{violation['video']}"
+    violation["time_formatted"] = datetime.fromtimestamp(violation["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+    return violation
+
+# =========================
+# SERVE MEDIA FILES
+# =========================
+@app.route("/evidence/images/<path:filename>")
+def serve_evidence_image(filename):
+    """Phục vụ file ảnh"""
+    return send_from_directory(EVIDENCE_IMAGE_DIR, filename)
+
+@app.route("/evidence/videos/<path:filename>")
+def serve_evidence_video(filename):
+    """
+    Phục vụ file video. Werkzeug trả 206 cho header Range (trình duyệt seek
+    bằng byte range) và 304 theo ETag / Last-Modified.
+    """
+    video_path = resolve_video(filename)
+    if video_path is None:
+        print(f"❌ Video not found: {filename}")
+        return jsonify({"error": "Video file not found", "filename": filename}), 404
+
+    return send_file(video_path, conditional=True, max_age=VIDEO_CACHE_SECONDS)
+
+@app.route("/evidence/hls/<path:filename>")
+def serve_evidence_hls(filename):
+    """Playlist + segment HLS (xem VIDEO_HLS_ENABLED)"""
+    return send_from_directory(EVIDENCE_HLS_DIR, filename, max_age=VIDEO_CACHE_SECONDS)
+
+# Đường dẫn video đã tìm thấy: tránh dò nhiều thư mục mỗi request
+# (mỗi lần seek trình duyệt gửi 1 request Range mới)
+VIDEO_CACHE_SECONDS = 60
+video_paths = {}
+
+def resolve_video(filename):
+    path = video_paths.get(filename)
+    if path is not None and os.path.isfile(path):
+        return path
+
+    video_paths.pop(filename, None)
+    for directory in (
+        EVIDENCE_VIDEO_DIR,
+        os.path.join(BASE_DIR, "evidence", "videos"),
+        os.path.join(BASE_DIR, "videos"),
+    ):
+        path = safe_join(directory, filename)
+        if path is not None and os.path.isfile(path):
+            print(f"✅ Video found at: {path}")
+            video_paths[filename] = path
+            return path
+    return None
+
+# =========================
+# API: GET SYSTEM INFO
+# =========================
+@app.route("/api/system/info", methods=["GET"])
+def get_system_info():
+    """Thông tin hệ thống"""
+    return conditional_json({
+        "base_dir": BASE_DIR,
+        "image_dir": EVIDENCE_IMAGE_DIR,
+        "video_dir": EVIDENCE_VIDEO_DIR,
+        "log_dir": EVIDENCE_LOG_DIR,
+        "image_count": count_files(EVIDENCE_IMAGE_DIR, ('.jpg', '.jpeg', '.png', '.bmp')),
+        "video_count": count_files(EVIDENCE_VIDEO_DIR, ('.mp4', '.avi', '.mov', '.mkv')),
+        "log_count": count_files(EVIDENCE_LOG_DIR, ('.json',)),
+        "timestamp": datetime.now().isoformat(),
+        "api_endpoints": {
+            "videos": "http://localhost:5000/api/videos",
+            "violations": "http://localhost:5000/api/violations",
+            "health": "http://localhost:5000/api/health",
+            "metrics": "http://localhost:5000/api/metrics",
+            "system_info": "http://localhost:5000/api/system/info"
+        }
+    }, ignore=("timestamp",))
+
+# =========================
+# HEALTH CHECK
+# =========================
+@app.route("/api/health", methods=["GET"])
+def health():
+    """Kiểm tra trạng thái hệ thống"""
+    models = read_readiness()
+    return conditional_json({
+        "status": "running",
+        "ready": models["ready"],
+        "models": models,
+        "timestamp": datetime.now().isoformat(),
+        "service": "Traffic Violation API",
+        "version": "1.0.0",
+        "directories": {
+            "images": {
+                "path": EVIDENCE_IMAGE_DIR,
+                "exists": os.path.exists(EVIDENCE_IMAGE_DIR),
+                "count": count_files(EVIDENCE_IMAGE_DIR, ('.jpg', '.jpeg', '.png', '.bmp'))
+            },
+            "videos": {
+                "path": EVIDENCE_VIDEO_DIR,
+                "exists": os.path.exists(EVIDENCE_VIDEO_DIR),
+                "count": count_files(EVIDENCE_VIDEO_DIR, ('.mp4', '.avi', '.mov', '.mkv'))
+            },
+            "logs": {
+                "path": EVIDENCE_LOG_DIR,
+                "exists": os.path.exists(EVIDENCE_LOG_DIR),
+                "count": count_files(EVIDENCE_LOG_DIR, ('.json',))
+            }
+        }
+    }, ignore=("timestamp",))
+
+# =========================
+# METRICS (Prometheus text format)
+# =========================
+@app.route("/api/metrics", methods=["GET"])
+def get_metrics():
+    """Gộp metrics của các process pipeline đang chạy"""
+    texts = []
+    now = time.time()
+    for path in glob.glob(os.path.join(METRICS_DIR, "*.prom")):
+        try:
+            # Bỏ file của process đã dừng lâu
+            if now - os.path.getmtime(path) > METRICS_STALE_SECONDS:
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                texts.append(f.read())
+        except OSError:
+            continue
+
+    body = merge_metrics(texts)
+    body += "# TYPE haiyen_metrics_instances gauge\n"
+    body += f"haiyen_metrics_instances {len(texts)}\n"
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
+# =========================
+# API: GET DIRECTORY LISTING
+# =========================
+@app.route("/api/directory/<path:subpath>", methods=["GET"])
+def list_directory(subpath=""):
+    """Liệt kê thư mục (debug)"""
+    target_dir = os.path.join(BASE_DIR, subpath)
+    
+    if not os.path.exists(target_dir):
+        return jsonify({"error": "Directory not found", "path": target_dir}), 404
+    
+    items = []
+    for item in os.listdir(target_dir):
+        item_path = os.path.join(target_dir, item)
+        items.append({
+            "name": item,
+            "type": "directory" if os.path.isdir(item_path) else "file",
+            "size": os.path.getsize(item_path) if os.path.isfile(item_path) else 0,
+            "path": item_path
+        })
+    
+    return jsonify({
+        "path": target_dir,
+        "items": items,
+        "count": len(items)
+    })
+
+# =========================
+# UTILITY FUNCTIONS
+# =========================
+def read_readiness():
+    """Đọc trạng thái load model của pipeline, "unknown" nếu pipeline chưa chạy"""
+    try:
+        with open(READINESS_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"state": "unknown", "ready": False}
+
+def merge_metrics(texts):
+    """Gộp nhiều file .prom: mỗi metric chỉ giữ 1 dòng HELP / TYPE"""
+    families = {}
+    for text in texts:
+        current = None
+        for line in text.splitlines():
+            if line.startswith("# HELP ") or line.startswith("# TYPE "):
+                current = line.split()[2]
+                header, samples = families.setdefault(current, ([], []))
+                if line not in header:
+                    header.append(line)
+            elif line and current is not None:
+                families[current][1].append(line)
+
+    out = []
+    for header, samples in families.values():
+        out.extend(header)
+        out.extend(samples)
+    return "\n".join(out) + "\n" if out else ""
+
+def count_files(directory, extensions):
+    """Đếm file với extension cụ thể (cache theo mtime thư mục: 1 stat thay vì listdir)"""
+    try:
+        mtime = os.stat(directory).st_mtime_ns
+    except OSError:
+        return 0
+
+    key = (directory, extensions)
+    cached = file_counts.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    count = 0
+    for file in os.listdir(directory):
+        if file.lower().endswith(extensions):
+            count += 1
+    file_counts[key] = (mtime, count)
+    return count
+
+def format_size(size_in_bytes):
+    """Định dạng kích thước file"""
+    if size_in_bytes == 0:
+        return "0 Bytes"
+    
+    units = ['Bytes', 'KB', 'MB', 'GB', 'TB']
+    i = 0
+    while size_in_bytes >= 1024 and i < len(units) - 1:
+        size_in_bytes /= 1024
+        i += 1
+    
+    return f"{size_in_bytes:.2f} {units[i]}"
+
+def format_duration(seconds):
+    """Định dạng thời lượng video"""
+    if seconds == 0:
+        return "00:00"
+    
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    secs = int(seconds % 60)
+    
+    if hours > 0:
+        return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+    else:
+        return f"{minutes:02d}:{secs:02d}"
+
+# =========================
+# DEBUG ENDPOINT
+# =========================
+@app.route("/api/debug/paths", methods=["GET"])
+def debug_paths():
+    """Debug endpoint - hiển thị tất cả đường dẫn"""
+    return jsonify({
+        "base_dir": BASE_DIR,
+        "evidence_video_dir": EVIDENCE_VIDEO_DIR,
+        "evidence_image_dir": EVIDENCE_IMAGE_DIR,
+        "evidence_log_dir": EVIDENCE_LOG_DIR,
+        "video_dir_exists": os.path.exists(EVIDENCE_VIDEO_DIR),
+        "video_dir_contents": os.listdir(EVIDENCE_VIDEO_DIR) if os.path.exists(EVIDENCE_VIDEO_DIR) else [],
+        "image_dir_exists": os.path.exists(EVIDENCE_IMAGE_DIR),
+        "log_dir_exists": os.path.exists(EVIDENCE_LOG_DIR),
+        "current_working_dir": os.getcwd(),
+        "script_dir": os.path.dirname(os.path.abspath(__file__))
+    })
+
+# =========================
+# MAIN
+# =========================
+if __name__ == "__main__":
+    print("=" * 70)
+    print("🚦 TRAFFIC VIOLATION MONITORING SYSTEM - API SERVER")
+    print("=" * 70)
+    print(f"📁 Base Directory: {BASE_DIR}")
+    print(f"🖼️  Images Directory: {EVIDENCE_IMAGE_DIR}")
+    print(f"🎥 Videos Directory: {EVIDENCE_VIDEO_DIR}")
+    print(f"📝 Logs Directory: {EVIDENCE_LOG_DIR}")
+    print("-" * 70)
+    print(f"🌐 Dashboard URL: http://localhost:5000")
+    print(f"🎬 Video Monitoring: http://localhost:5000/video")
+    print(f"🔧 API Base: http://localhost:5000/api")
+    print(f"🐞 Debug Paths: http://localhost:5000/api/debug/paths")
+    print("=" * 70)
+    
+    # Kiểm tra thư mục video
+    if os.path.exists(EVIDENCE_VIDEO_DIR):
+        videos = [f for f in os.listdir(EVIDENCE_VIDEO_DIR) if f.lower().endswith(('.mp4', '.avi', '.mov', '.mkv'))]
+        print(f"\n🎥 Found {len(videos)} videos in {EVIDENCE_VIDEO_DIR}:")
+        for video in videos[:10]:  # Hiển thị 10 video đầu tiên
+            print(f"  • {video}")
+        if len(videos) > 10:
+            print(f"  ... and {len(videos) - 10} more")
+    else:
+        print(f"\n❌ Video directory not found: {EVIDENCE_VIDEO_DIR}")
+        print("💡 Please create the directory and add video files")
+    
+    print("\n🚀 Starting server...")
     app.run(host="0.0.0.0", port=5000, debug=True, threaded=True)
\ No newline at end of file
@@ -0,0 +1,130 @@
+import gzip
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:     # tuỳ chọn: pip install brotli
+    brotli = None
+
+ENCODING_SUFFIX = {"br": "-br", "gzip": "-gzip"}
+
+
+def make_etag(*parts):
+    return hashlib.sha1(json.dumps(parts, default=str).encode("utf-8")).hexdigest()[:20]
+
+
+def not_modified(etag):
+    """If-None-Match khớp (kể cả bản nén: etag-gzip / etag-br)."""
+    match = request.if_none_match
+    return any(match.contains(etag + suffix) for suffix in ("", *ENCODING_SUFFIX.values()))
+
+
+def not_modified_response(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+class ResponseCache:
+    """
+    Body JSON (và bản nén) theo ETag: nhiều tab cùng poll 1 phiên bản dữ liệu
+    chỉ serialize + nén 1 lần. LRU giới hạn số mục.
+    """
+
+    def __init__(self, max_items=64):
+        self.max_items = max_items
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        with self.lock:
+            if key in self.items:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return self.items[key]
+            self.misses += 1
+
+        value = build()
+        with self.lock:
+            self.items[key] = value
+            while len(self.items) > self.max_items:
+                self.items.popitem(last=False)
+        return value
+
+
+def versioned_json(cache, version, build):
+    """
+    Trả JSON có ETag từ version (bộ đếm thay đổi trong RAM) + URL.
+    Khớp If-None-Match → 304 không chạy build(); cùng version → body từ cache.
+    """
+    etag = make_etag(request.full_path, version)
+    if not_modified(etag):
+        return not_modified_response(etag)
+
+    body = cache.get(("json", etag), lambda: json.dumps(build(), ensure_ascii=False).encode("utf-8"))
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def conditional_json(payload, ignore=()):
+    """ETag từ nội dung (bỏ các khoá luôn đổi như timestamp) cho payload nhỏ."""
+    etag = make_etag(request.path, {k: v for k, v in payload.items() if k not in ignore})
+    if not_modified(etag):
+        return not_modified_response(etag)
+
+    response = Response(json.dumps(payload, ensure_ascii=False), mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def choose_encoding(accept_encoding):
+    accepted = {part.split(";")[0].strip() for part in accept_encoding.split(",")}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress_response(response, cache, min_size=1024):
+    """
+    Nén br / gzip body JSON / text lớn (after_request). Bỏ qua stream (SSE,
+    video), response đã nén và 304. ETag thêm hậu tố theo encoding.
+    """
+    if (response.direct_passthrough or response.is_streamed or response.status_code != 200
+            or "Content-Encoding" in response.headers):
+        return response
+    mimetype = response.mimetype or ""
+    if not (mimetype == "application/json" or mimetype.startswith("text/")):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+    if encoding is None or response.content_length is None or response.content_length < min_size:
+        return response
+
+    etag, _ = response.get_etag()
+
+    def build():
+        data = response.get_data()
+        if encoding == "br":
+            return brotli.compress(data, quality=5)
+        return gzip.compress(data, compresslevel=6)
+
+    body = cache.get((encoding, etag), build) if etag else build()
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    if etag:
+        response.set_etag(etag + ENCODING_SUFFIX[encoding])
+    return response
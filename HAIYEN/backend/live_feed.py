@@ -0,0 +1,95 @@
+import threading
+from collections import deque
+
+
+class LiveFeed:
+    """
+    Nguồn sự kiện cho /api/stream (Server-Sent Events).
+    1 thread nền hỏi store các vi phạm mới (id > last_id, truy vấn theo khoá
+    chính) mỗi interval giây và theo dõi VideoIndex.version; mọi client chờ
+    trên cùng 1 Condition và chỉ nhận phần mới. Tải server tăng theo số
+    sự kiện, không theo số client × lịch sử.
+
+    after: threading.Event, feed chỉ ghi mốc last_id sau khi event được set
+    (vd. nạp log JSON cũ xong) để vi phạm cũ không bị đẩy như vi phạm mới.
+    """
+
+    def __init__(self, store, video_index=None, interval=1.0, buffer_size=1000, batch_size=500,
+                 after=None):
+        self.store = store
+        self.video_index = video_index
+        self.interval = interval
+        self.batch_size = batch_size
+        self.after = after
+
+        self.buffer = deque(maxlen=buffer_size)     # vi phạm gần nhất (id tăng dần)
+        self.last_id = None     # None tới khi ready
+        self.videos_version = 0
+        self.ready = threading.Event()
+
+        self.changed = threading.Condition()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        with self.changed:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._loop, name="live-feed", daemon=True)
+                self.thread.start()
+        return self
+
+    def _loop(self):
+        if self.after is not None:
+            self.after.wait()
+        with self.changed:
+            # Client mới chỉ nhận vi phạm ghi sau thời điểm này
+            self.last_id = self.store.last_id()
+            self.ready.set()
+            self.changed.notify_all()
+
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"❌ Live feed poll failed: {e}")
+
+    def poll(self):
+        items = self.store.since(self.last_id, self.batch_size)
+        version = self.video_index.version if self.video_index is not None else 0
+
+        if not items and version == self.videos_version:
+            return
+        with self.changed:
+            self.buffer.extend(items)
+            if items:
+                self.last_id = items[-1]["id"]
+            self.videos_version = version
+            self.changed.notify_all()
+
+    def wait(self, after_id, videos_version, timeout):
+        """
+        Chờ tới khi có vi phạm id > after_id hoặc danh sách video đổi.
+        Trả về (items, videos_version); items rỗng nếu hết timeout.
+        """
+        with self.changed:
+            self.changed.wait_for(
+                lambda: self.ready.is_set() and (
+                    self.last_id > after_id or self.videos_version != videos_version
+                ),
+                timeout
+            )
+            version = self.videos_version
+            if not self.ready.is_set():
+                return [], version
+            if self.buffer and self.buffer[0]["id"] <= after_id + 1:
+                return [v for v in self.buffer if v["id"] > after_id], version
+            if self.last_id <= after_id:
+                return [], version
+
+        # Client resume từ cursor cũ hơn buffer: đọc phần thiếu từ store
+        return self.store.since(after_id, self.batch_size), version
+
+    def close(self):
+        self.stop_event.set()
+        with self.changed:
+            self.changed.notify_all()
@@ -0,0 +1,105 @@
+import os
+import time
+import threading
+
+
+class LiveFrames:
+    """
+    Đọc frame JPEG pipeline ghi ra <directory>/<camera>.jpg (src/live.py) và
+    phát cho mọi người xem: 1 thread nền stat file của các camera đang có
+    người xem, file đổi thì đọc 1 lần, mọi client dùng chung bytes đó.
+    Client chậm chỉ nhận frame mới nhất khi gửi xong frame trước, không xếp hàng.
+    """
+
+    def __init__(self, directory, interval=0.04, stale_seconds=5.0):
+        self.directory = directory
+        self.interval = interval
+        self.stale_seconds = stale_seconds
+
+        self.frames = {}        # camera -> (seq, mtime_ns, jpeg bytes)
+        self.viewers = {}       # camera -> số client đang xem
+        self.changed = threading.Condition()
+        self.thread = None
+
+    def start(self):
+        with self.changed:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._loop, name="live-frames", daemon=True)
+                self.thread.start()
+        return self
+
+    def path(self, camera):
+        return os.path.join(self.directory, f"{camera}.jpg")
+
+    def is_live(self, camera):
+        """File frame còn và được ghi trong stale_seconds giây gần nhất."""
+        try:
+            return time.time() - os.path.getmtime(self.path(camera)) <= self.stale_seconds
+        except OSError:
+            return False
+
+    def cameras(self):
+        """Camera có frame mới trong stale_seconds giây gần nhất."""
+        if not os.path.isdir(self.directory):
+            return []
+
+        now = time.time()
+        out = []
+        for file in sorted(os.listdir(self.directory)):
+            if not file.endswith(".jpg"):
+                continue
+            try:
+                age = now - os.path.getmtime(os.path.join(self.directory, file))
+            except OSError:
+                continue
+            if age <= self.stale_seconds:
+                out.append({"camera": os.path.splitext(file)[0], "age": round(age, 2)})
+        return out
+
+    def _loop(self):
+        while True:
+            with self.changed:
+                cameras = [c for c, n in self.viewers.items() if n > 0]
+            for camera in cameras:
+                self._refresh(camera)
+            time.sleep(self.interval)
+
+    def _refresh(self, camera):
+        try:
+            mtime = os.stat(self.path(camera)).st_mtime_ns
+            seq, last_mtime, _ = self.frames.get(camera, (0, None, None))
+            if mtime == last_mtime:
+                return
+            with open(self.path(camera), "rb") as f:
+                jpeg = f.read()
+        except OSError:
+            return      # pipeline chưa chạy / đang thay file
+
+        with self.changed:
+            self.frames[camera] = (seq + 1, mtime, jpeg)
+            self.changed.notify_all()
+
+    def subscribe(self, camera):
+        self.start()
+        with self.changed:
+            self.viewers[camera] = self.viewers.get(camera, 0) + 1
+
+    def unsubscribe(self, camera):
+        with self.changed:
+            self.viewers[camera] = max(self.viewers.get(camera, 1) - 1, 0)
+
+    def wait(self, camera, last_seq, timeout):
+        """Frame mới nhất có seq > last_seq: (seq, jpeg), hoặc (last_seq, None) nếu hết timeout."""
+        with self.changed:
+            self.changed.wait_for(lambda: self.frames.get(camera, (0,))[0] > last_seq, timeout)
+            seq, _, jpeg = self.frames.get(camera, (0, None, None))
+            if seq > last_seq:
+                return seq, jpeg
+            return last_seq, None
+
+    def stats(self):
+        with self.changed:
+            return {
+                "viewers": {c: n for c, n in self.viewers.items() if n > 0},
+                "frames": {c: seq for c, (seq, _, _) in self.frames.items()}
+            }
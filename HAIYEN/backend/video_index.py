@@ -0,0 +1,275 @@
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import cv2
+
+from src.mp4 import faststart, is_faststart, make_hls
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm', '.flv', '.wmv', '.m4v')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    name            TEXT PRIMARY KEY,
+    size            INTEGER NOT NULL,
+    mtime           REAL NOT NULL,
+    ctime           REAL NOT NULL,
+    fps             REAL,
+    frames          INTEGER,
+    duration        REAL,
+    width           INTEGER,
+    height          INTEGER,
+    thumbnail       TEXT,
+    violation_count INTEGER NOT NULL DEFAULT 0,
+    probed_at       REAL,
+    error           TEXT,
+    hls             TEXT
+)
+"""
+
+# Cột thêm sau này: DB cũ được ALTER khi mở
+MIGRATIONS = {"hls": "ALTER TABLE videos ADD COLUMN hls TEXT"}
+
+
+class VideoIndex:
+    """
+    Index metadata video lưu trong SQLite (khoá: tên file, size, mtime).
+    Worker nền quét thư mục định kỳ, chỉ mở bằng cv2 các file mới / thay đổi
+    (fps, số frame, thumbnail) và đếm lại vi phạm (GROUP BY video trên
+    ViolationStore) khi store có vi phạm mới.
+    /api/videos chỉ đọc index, không chạm tới file video.
+
+    MP4 ghi bằng cv2 (moov ở cuối file) được chuyển sang faststart trước khi
+    probe để trình duyệt seek được ngay; hls_dir (cần ffmpeg) → cắt thêm
+    segment HLS + playlist cho từng video.
+    """
+
+    def __init__(self, db_path, video_dir, thumb_dir, store, interval=10.0, thumb_width=320,
+                 faststart=True, hls_dir=None, hls_segment=4, settle_seconds=5.0):
+        self.db_path = db_path
+        self.video_dir = video_dir
+        self.thumb_dir = thumb_dir
+        self.store = store
+        self.interval = interval
+        self.thumb_width = thumb_width
+        self.faststart = faststart
+        self.hls_dir = hls_dir
+        self.hls_segment = hls_segment
+        self.settle_seconds = settle_seconds
+
+        self.counted_id = None  # store.last_id() lúc đếm vi phạm gần nhất
+        self.version = 0        # tăng mỗi khi danh sách / metadata thay đổi (live feed)
+        self.scans = 0
+        self.probed = 0
+
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.scanned = threading.Event()
+        self.thread = None
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(videos)")}
+            for column, sql in MIGRATIONS.items():
+                if column not in columns:
+                    conn.execute(sql)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # ===============================
+    # WORKER
+    # ===============================
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._loop, name="video-index", daemon=True)
+                self.thread.start()
+        return self
+
+    def refresh(self):
+        """Quét lại ngay (không chờ hết interval)."""
+        self.wake.set()
+
+    def wait_ready(self, timeout=None):
+        return self.scanned.wait(timeout)
+
+    def _loop(self):
+        while True:
+            try:
+                self.scan()
+            except Exception as e:
+                print(f"[ERROR] Video index scan failed: {e}")
+            self.scanned.set()
+            self.wake.wait(self.interval)
+            self.wake.clear()
+
+    def scan(self):
+        if not os.path.isdir(self.video_dir):
+            return
+
+        files = {}
+        for name in os.listdir(self.video_dir):
+            if name.lower().endswith(VIDEO_EXTENSIONS):
+                try:
+                    files[name] = os.stat(os.path.join(self.video_dir, name))
+                except OSError:
+                    continue
+
+        with self._connect() as conn:
+            known = {
+                row["name"]: (row["size"], row["mtime"])
+                for row in conn.execute("SELECT name, size, mtime FROM videos")
+            }
+
+        removed = [name for name in known if name not in files]
+        changed = sorted(
+            name for name, st in files.items()
+            if known.get(name) != (st.st_size, st.st_mtime)
+        )
+
+        if removed:
+            with self._connect() as conn:
+                conn.executemany("DELETE FROM videos WHERE name = ?", [(n,) for n in removed])
+            self.version += 1
+
+        # Đếm vi phạm chỉ khi store có dòng mới hoặc có video mới
+        counts = {}
+        last_id = self.store.last_id()
+        recount = last_id != self.counted_id
+        if changed or recount:
+            counts = self.store.video_counts()
+
+        # Faststart / HLS + probe ngoài transaction (có thể mất vài giây mỗi file),
+        # ghi từng file ngay sau khi probe: lần quét đầu /api/videos đầy dần
+        # thay vì trống tới khi quét xong cả thư mục
+        for name in changed:
+            st = self.postprocess(name, files[name])
+            if st is None:
+                continue    # đang ghi dở, quét lại lượt sau
+            files[name] = st
+            row = self.probe(name, st)
+            row["violation_count"] = counts.get(name, 0)
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO videos "
+                    "(name, size, mtime, ctime, fps, frames, duration, width, height, thumbnail, "
+                    "violation_count, probed_at, error, hls) "
+                    "VALUES (:name, :size, :mtime, :ctime, :fps, :frames, :duration, :width, "
+                    ":height, :thumbnail, :violation_count, :probed_at, :error, :hls)",
+                    row
+                )
+            self.version += 1
+            self.probed += 1
+
+        if recount:
+            with self._connect() as conn:
+                conn.executemany(
+                    "UPDATE videos SET violation_count = ? WHERE name = ?",
+                    [(counts.get(name, 0), name) for name in files]
+                )
+            self.version += 1
+        self.counted_id = last_id
+
+        self.scans += 1
+        if changed or removed:
+            print(f"[INFO] Video index: {len(changed)} probed, {len(removed)} removed, {len(files)} total")
+
+    def probe(self, name, st):
+        path = os.path.join(self.video_dir, name)
+        row = {
+            "name": name, "size": st.st_size, "mtime": st.st_mtime, "ctime": st.st_ctime,
+            "fps": None, "frames": None, "duration": None, "width": None, "height": None,
+            "thumbnail": None, "probed_at": time.time(), "error": None,
+            "hls": self._hls_playlist(name)
+        }
+
+        cap = cv2.VideoCapture(path)
+        try:
+            if not cap.isOpened():
+                row["error"] = "Cannot open video"
+                return row
+
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            row["width"] = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            row["height"] = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            if fps > 0:
+                row.update(fps=fps, frames=frames, duration=frames / fps)
+
+            ret, frame = cap.read()
+            if ret:
+                row["thumbnail"] = self._thumbnail(name, frame)
+        except Exception as e:
+            row["error"] = str(e)
+        finally:
+            cap.release()
+        return row
+
+    def postprocess(self, name, st):
+        """
+        MP4 moov ở cuối → ghi lại dạng faststart, tạo HLS nếu bật.
+        Trả về stat mới, None nếu file còn đang được pipeline ghi.
+        """
+        path = os.path.join(self.video_dir, name)
+        if not name.lower().endswith(".mp4"):
+            return st
+
+        layout = is_faststart(path)
+        if layout is None and time.time() - st.st_mtime < self.settle_seconds:
+            return None     # chưa có moov: VideoWriter chưa release
+
+        try:
+            if self.faststart and layout is False:
+                started = time.time()
+                faststart(path)
+                print(f"[INFO] Faststart {name} ({time.time() - started:.1f}s)")
+            st = os.stat(path)
+            if self.hls_dir and not self._hls_fresh(name, st):
+                make_hls(path, os.path.join(self.hls_dir, os.path.splitext(name)[0]), self.hls_segment)
+            return st
+        except Exception as e:
+            print(f"[WARN] Cannot post-process {name}: {e}")
+            return st
+
+    def _hls_fresh(self, name, st):
+        playlist = self._hls_playlist(name)
+        return playlist is not None and os.path.getmtime(os.path.join(self.hls_dir, playlist)) >= st.st_mtime
+
+    def _hls_playlist(self, name):
+        if not self.hls_dir:
+            return None
+        playlist = f"{os.path.splitext(name)[0]}/index.m3u8"
+        return playlist if os.path.exists(os.path.join(self.hls_dir, playlist)) else None
+
+    def _thumbnail(self, name, frame):
+        os.makedirs(self.thumb_dir, exist_ok=True)
+        thumb_name = f"{os.path.splitext(name)[0]}.jpg"
+
+        h, w = frame.shape[:2]
+        if w > self.thumb_width:
+            frame = cv2.resize(frame, (self.thumb_width, int(h * self.thumb_width / w)),
+                               interpolation=cv2.INTER_AREA)
+        cv2.imwrite(os.path.join(self.thumb_dir, thumb_name), frame)
+        return thumb_name
+
+    # ===============================
+    # QUERY
+    # ===============================
+    def list(self):
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute("SELECT * FROM videos ORDER BY name")]
+
+    def stats(self):
+        return {"scans": self.scans, "probed": self.probed, "ready": self.scanned.is_set()}
@@ -0,0 +1,193 @@
+"""
+Chạy ViolationSystem headless cho nhiều video bằng process pool.
+
+    python batch.py assets/video --workers 4
+    python batch.py "footage/2025_12_*/*.mp4" --threads 2 --evidence evidence/batch
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import multiprocessing as mp
+from multiprocessing.util import Finalize
+from datetime import datetime
+
+from src.config import Config
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+
+_system = None
+
+
+def collect_videos(source):
+    if os.path.isdir(source):
+        files = [
+            os.path.join(source, f) for f in os.listdir(source)
+            if f.lower().endswith(VIDEO_EXTENSIONS)
+        ]
+    else:
+        files = glob.glob(source, recursive=True)
+    return sorted(f for f in files if os.path.isfile(f))
+
+
+def make_run_names(videos):
+    """
+    Tên run theo đường dẫn tương đối so với thư mục chung của các video
+    (a/cam1.mp4, b/cam1.mp4 → a__cam1, b__cam1) để evidence không ghi đè nhau.
+    """
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(v)) for v in videos])
+    return {
+        v: os.path.splitext(os.path.relpath(os.path.abspath(v), root))[0].replace(os.sep, "__")
+        for v in videos
+    }
+
+
+def init_worker(num_threads, box_mode, roi_margin, motion_gate, backend, int8, evidence_dir):
+    """Mỗi worker giới hạn số CPU thread và load model đúng 1 lần."""
+    global _system
+
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(num_threads)
+
+    import cv2
+    import torch
+
+    cv2.setNumThreads(num_threads)
+    torch.set_num_threads(num_threads)
+
+    from src.models import set_backend
+    from src.detect_violation import ViolationSystem
+
+    set_backend(backend, int8=int8)
+    _system = ViolationSystem(
+        box_mode=box_mode,
+        roi_margin=roi_margin,
+        motion_gate=motion_gate,
+        evidence_dir=evidence_dir
+    )
+    # Chạy khi worker thoát bình thường (pool.close + join), flush evidence / store
+    Finalize(None, close_worker, exitpriority=10)
+
+
+def close_worker():
+    global _system
+    if _system is not None:
+        _system.close()
+        _system = None
+
+
+def run_one(args):
+    video_path, run_name, evidence_dir, write_video = args
+
+    try:
+        # camera_id = run_name: geometry cache, nhãn camera trong store và
+        # file live không bị trùng giữa a/cam1.mp4 và b/cam1.mp4
+        result = _system.process_video(
+            video_path,
+            camera_id=run_name,
+            headless=True,
+            evidence_dir=evidence_dir,
+            run_name=run_name,
+            write_video=write_video
+        )
+        if result is None:
+            return {"video": video_path, "status": "error", "error": "Cannot open video"}
+        result["status"] = "ok"
+        result["worker"] = os.getpid()
+        return result
+    except Exception as e:
+        return {"video": video_path, "status": "error", "error": repr(e)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless batch violation detection")
+    parser.add_argument("source", help="Thư mục hoặc glob pattern chứa video")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    parser.add_argument("--threads", type=int, default=0,
+                        help="Số CPU thread / worker (0 = chia đều số core)")
+    parser.add_argument("--evidence", default="evidence")
+    parser.add_argument("--box-mode", default=Config.BOX_MODE, choices=["calibrate", "per_frame"])
+    parser.add_argument("--roi", type=int, default=Config.ROI_MARGIN, metavar="MARGIN",
+                        help="Chỉ detect/track quanh yellow box (+ MARGIN pixel)")
+    parser.add_argument("--motion", action="store_true",
+                        help="Bỏ qua inference khi junction không có chuyển động")
+    parser.add_argument("--no-video", action="store_true",
+                        help="Không ghi video annotate đầy đủ, chỉ clip quanh vi phạm")
+    parser.add_argument("--backend", default=Config.INFERENCE_BACKEND, choices=["torch", "onnx", "openvino"],
+                        help="Backend inference (model được export trước bằng export.py)")
+    parser.add_argument("--int8", action="store_true", help="Dùng model INT8")
+    parser.add_argument("--manifest", default=None,
+                        help="File JSON tổng kết (mặc định: <evidence>/manifest_<time>.json)")
+    args = parser.parse_args(argv)
+
+    videos = collect_videos(args.source)
+    if not videos:
+        print(f"[ERROR] No videos found: {args.source}")
+        return 1
+
+    workers = max(1, min(args.workers, len(videos)))
+    threads = args.threads or max(1, (os.cpu_count() or 1) // workers)
+
+    print(f"[INFO] {len(videos)} videos | {workers} workers x {threads} threads")
+
+    if args.backend != "torch":
+        # Export 1 lần ở process chính, tránh các worker cùng export 1 file
+        from src.backends import resolve_model
+        for model_path in ("models/yolov8n.pt", "models/box.pt", "models/plate.pt"):
+            resolve_model(model_path, args.backend, args.int8, Config.CALIBRATION_DIR,
+                          Config.EXPORT_IMAGE_SIZE)
+
+    started = time.time()
+    ctx = mp.get_context("spawn")
+    pool = ctx.Pool(
+        processes=workers,
+        initializer=init_worker,
+        initargs=(threads, args.box_mode, args.roi, args.motion, args.backend, args.int8, args.evidence)
+    )
+    try:
+        results = []
+        run_names = make_run_names(videos)
+        tasks = [(v, run_names[v], args.evidence, not args.no_video) for v in videos]
+        for result in pool.imap_unordered(run_one, tasks):
+            print(f"[{result['status'].upper()}] {result['video']}")
+            results.append(result)
+        # close + join (không terminate) để worker chạy close_worker trước khi thoát
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    elapsed = time.time() - started
+    results.sort(key=lambda r: r["video"])
+
+    manifest = {
+        "source": args.source,
+        "started": datetime.fromtimestamp(started).isoformat(),
+        "seconds": round(elapsed, 2),
+        "workers": workers,
+        "threads_per_worker": threads,
+        "backend": args.backend + (" int8" if args.int8 else ""),
+        "videos": len(videos),
+        "failed": sum(1 for r in results if r["status"] != "ok"),
+        "frames": sum(r.get("frames", 0) for r in results),
+        "results": results
+    }
+
+    manifest_path = args.manifest or os.path.join(
+        args.evidence,
+        f"manifest_{datetime.now().strftime('%Y_%m_%d_%H_%M_%S')}.json"
+    )
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    print(f"[DONE] {len(videos)} videos in {elapsed:.1f}s → {manifest_path}")
+    return 0 if manifest["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
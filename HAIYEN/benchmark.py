@@ -0,0 +1,342 @@
+"""
+Benchmark thông lượng từng stage của pipeline trên 1 video cố định.
+
+    python benchmark.py                               # NganDuong/test.mp4 hoặc video tổng hợp
+    python benchmark.py --synthetic --frames 300 --no-models
+    python benchmark.py --output bench/baseline.json
+    python benchmark.py --compare bench/baseline.json --tolerance 0.15
+
+Stage: decode, box, tracking, logic, plate, ocr, evidence, encode + end-to-end FPS.
+--compare: báo stage chậm hơn baseline quá tolerance (exit code 1 nếu có).
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import contextlib
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from src.config import Config
+from src.logic import ViolationLogic
+from src.utils import save_evidence
+
+DEFAULT_VIDEO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "NganDuong", "test.mp4")
+STAGES = ["decode", "box", "tracking", "logic", "plate", "ocr", "evidence", "encode"]
+EVIDENCE_EVERY = 10    # ghi thử 1 evidence mỗi N frame (không phụ thuộc có vi phạm hay không)
+
+
+# ===============================
+# INPUT
+# ===============================
+def make_synthetic(path, frames=300, size=(1280, 720), fps=25, vehicles=12, seed=0):
+    """Video tổng hợp: nền xám + yellow box + các khối chữ nhật di chuyển / dừng."""
+    rng = np.random.default_rng(seed)
+    w, h = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+
+    pos = rng.uniform([0, 0], [w - 120, h - 80], size=(vehicles, 2))
+    vel = rng.uniform(-6, 6, size=(vehicles, 2))
+    vel[: vehicles // 3] = 0    # 1/3 xe đứng yên → có vi phạm
+    colors = rng.integers(0, 255, size=(vehicles, 3))
+
+    for _ in range(frames):
+        frame = np.full((h, w, 3), 90, dtype=np.uint8)
+        cv2.rectangle(frame, (w // 3, h // 3), (2 * w // 3, 2 * h // 3), (0, 255, 255), 4)
+
+        pos = np.clip(pos + vel, [0, 0], [w - 120, h - 80])
+        for (x, y), c in zip(pos.astype(int), colors):
+            cv2.rectangle(frame, (x, y), (x + 120, y + 80), tuple(int(v) for v in c), -1)
+            cv2.rectangle(frame, (x + 35, y + 55), (x + 85, y + 72), (255, 255, 255), -1)
+        writer.write(frame)
+
+    writer.release()
+    return path
+
+
+def synthetic_tracks(frame_idx, count=20, seed=0):
+    """Track giả cho stage logic khi không chạy model (một nửa đứng yên)."""
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(0, 1000, size=(count, 2))
+    drift = np.zeros((count, 2))
+    drift[count // 2:] = frame_idx * 3
+    xy = (base + drift).astype(int)
+    return list(range(1, count + 1)), [(x, y, x + 100, y + 60) for x, y in xy]
+
+
+# ===============================
+# TIMING
+# ===============================
+class StageTimer:
+    def __init__(self, warmup=0):
+        self.warmup = warmup
+        self.samples = {}   # stage -> list ms
+        self.calls = {}
+
+    @contextlib.contextmanager
+    def measure(self, stage, frame_idx):
+        started = time.perf_counter()
+        yield
+        ms = 1000 * (time.perf_counter() - started)
+        self.calls[stage] = self.calls.get(stage, 0) + 1
+        if frame_idx >= self.warmup:
+            self.samples.setdefault(stage, []).append(ms)
+
+    def summary(self):
+        out = {}
+        for stage, values in self.samples.items():
+            arr = np.asarray(values)
+            out[stage] = {
+                "calls": self.calls[stage],
+                "mean_ms": round(float(arr.mean()), 3),
+                "p50_ms": round(float(np.percentile(arr, 50)), 3),
+                "p95_ms": round(float(np.percentile(arr, 95)), 3),
+                "total_ms": round(float(arr.sum()), 1)
+            }
+        return out
+
+
+def machine_info():
+    info = {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "backend": Config.INFERENCE_BACKEND + (" int8" if Config.INFERENCE_INT8 else "")
+    }
+    for name in ("torch", "ultralytics", "paddleocr"):
+        try:
+            module = __import__(name)
+            info[name] = getattr(module, "__version__", "unknown")
+        except ImportError:
+            info[name] = None
+    return info
+
+
+# ===============================
+# BENCHMARK
+# ===============================
+def run_stages(video, frames, warmup, use_models, workdir):
+    timer = StageTimer(warmup)
+    system = None
+    if use_models:
+        from src.detect_violation import ViolationSystem
+        # Metrics / readiness / store trong workdir tạm, không ghi vào evidence thật
+        system = ViolationSystem(box_mode="per_frame", evidence_dir=workdir)
+        system.wait_ready()
+
+    cap = cv2.VideoCapture(video)
+    fps = int(cap.get(cv2.CAP_PROP_FPS)) or 25
+    logic = ViolationLogic(fps=fps)
+    writer = None
+    image_dir = os.path.join(workdir, "images")
+    log_dir = os.path.join(workdir, "logs")
+
+    idx = 0
+    while idx < frames:
+        with timer.measure("decode", idx):
+            ret, frame = cap.read()
+        if not ret:
+            break
+
+        if system is not None:
+            system.frame_cache.new_frame(idx)
+            with timer.measure("box", idx):
+                boxes = system.box_detector.detect(frame)
+            with timer.measure("tracking", idx):
+                tracks = system.tracker.track(frame)
+            ids = [t["track_id"] for t in tracks]
+            bboxes = [t["bbox"] for t in tracks]
+        else:
+            h, w = frame.shape[:2]
+            boxes = [(w // 3, h // 3, 2 * w // 3, 2 * h // 3)]
+            ids, bboxes = synthetic_tracks(idx)
+
+        with timer.measure("logic", idx):
+            violating = logic.update(ids, bboxes, boxes)
+
+        if system is not None and bboxes:
+            crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in bboxes]
+            with timer.measure("plate", idx):
+                plates = system.plate_detector.detect_many(crops, conf=Config.PLATE_CONF)
+            plate_crops = [
+                crop[p[1]:p[3], p[0]:p[2]] for crop, p in zip(crops, plates) if p is not None
+            ]
+            if plate_crops:
+                with timer.measure("ocr", idx):
+                    system.get_ocr().read_plates(plate_crops)
+
+        if idx % EVIDENCE_EVERY == 0:
+            # save_evidence in log mỗi lần ghi, tắt để không ảnh hưởng thời gian đo
+            track_id = min(violating) if violating else 0
+            with timer.measure("evidence", idx), contextlib.redirect_stdout(io.StringIO()):
+                save_evidence(frame, track_id, None, image_dir, log_dir)
+
+        if writer is None:
+            h, w = frame.shape[:2]
+            writer = cv2.VideoWriter(
+                os.path.join(workdir, "encode.mp4"), cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h)
+            )
+        with timer.measure("encode", idx):
+            writer.write(frame)
+
+        idx += 1
+
+    cap.release()
+    if writer is not None:
+        writer.release()
+    if system is not None:
+        system.close()
+
+    return timer.summary(), idx
+
+
+def run_end_to_end(video, workdir):
+    from src.detect_violation import ViolationSystem
+
+    # Store, geometry cache, metrics... nằm trong workdir tạm: lần nào cũng
+    # calibrate lại từ đầu và không ghi vào evidence thật
+    system = ViolationSystem(evidence_dir=workdir)
+    try:
+        result = system.process_video(
+            video, headless=True, evidence_dir=workdir, run_name="bench", clips=False
+        )
+    finally:
+        system.close()
+    return {
+        "frames": result["frames"],
+        "seconds": result["seconds"],
+        "fps": result["fps"],
+        "startup": result["startup"]
+    }
+
+
+# ===============================
+# COMPARE
+# ===============================
+def compare(current, baseline, tolerance):
+    """Trả về list regression: stage có mean_ms tăng / FPS giảm quá tolerance."""
+    regressions = []
+    for stage, stats in current["stages"].items():
+        old = baseline.get("stages", {}).get(stage)
+        if not old or old["mean_ms"] <= 0:
+            continue
+        ratio = stats["mean_ms"] / old["mean_ms"]
+        if ratio > 1 + tolerance:
+            regressions.append({
+                "stage": stage,
+                "baseline_ms": old["mean_ms"],
+                "current_ms": stats["mean_ms"],
+                "change": round(ratio - 1, 3)
+            })
+
+    fps = [
+        ("stages_fps", current.get("stages_fps"), baseline.get("stages_fps")),
+        ("end_to_end",
+         (current.get("end_to_end") or {}).get("fps"),
+         (baseline.get("end_to_end") or {}).get("fps"))
+    ]
+    for key, new_fps, old_fps in fps:
+        if new_fps and old_fps and new_fps < old_fps * (1 - tolerance):
+            regressions.append({
+                "stage": key,
+                "baseline_fps": old_fps,
+                "current_fps": new_fps,
+                "change": round(new_fps / old_fps - 1, 3)
+            })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-stage throughput benchmark")
+    parser.add_argument("--video", default=None, help=f"Mặc định: {os.path.normpath(DEFAULT_VIDEO)}")
+    parser.add_argument("--synthetic", action="store_true", help="Dùng video tổng hợp (seed cố định)")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=10, help="Số frame đầu không tính")
+    parser.add_argument("--no-models", action="store_true",
+                        help="Chỉ đo stage không cần model (decode, logic, evidence, encode)")
+    parser.add_argument("--no-e2e", action="store_true", help="Bỏ qua đo end-to-end process_video")
+    parser.add_argument("--output", default=None,
+                        help="File JSON kết quả (mặc định: evidence/bench/bench_<time>.json)")
+    parser.add_argument("--compare", default=None, metavar="BASELINE",
+                        help="So sánh với file JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Mức chậm hơn cho phép so với baseline (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    try:
+        video = args.video
+        if video is None and not args.synthetic and os.path.exists(DEFAULT_VIDEO):
+            video = os.path.normpath(DEFAULT_VIDEO)
+        if video is None:
+            video = make_synthetic(os.path.join(workdir, "synthetic.mp4"), frames=args.frames)
+            print(f"[INFO] Synthetic video: {args.frames} frames")
+        print(f"[INFO] Benchmark video: {video}")
+
+        use_models = not args.no_models
+        stages, frames = run_stages(video, args.frames, args.warmup, use_models, workdir)
+
+        # FPS nếu chạy tuần tự tất cả stage (không pipeline)
+        per_frame = sum(s["total_ms"] for s in stages.values()) / max(frames - args.warmup, 1)
+
+        result = {
+            "created": datetime.now().isoformat(),
+            "video": "synthetic" if video.startswith(workdir) else video,
+            "frames": frames,
+            "warmup": args.warmup,
+            "models": use_models,
+            "machine": machine_info(),
+            "stages": {name: stages[name] for name in STAGES if name in stages},
+            "stages_fps": round(1000 / per_frame, 2) if per_frame > 0 else None,
+            "end_to_end": None
+        }
+        if use_models and not args.no_e2e:
+            result["end_to_end"] = run_end_to_end(video, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for name, s in result["stages"].items():
+        print(f"  {name:<9} {s['mean_ms']:>9.2f} ms  (p95 {s['p95_ms']:.2f}, {s['calls']} calls)")
+    print(f"  stages fps: {result['stages_fps']}")
+    if result["end_to_end"]:
+        print(f"  end-to-end fps: {result['end_to_end']['fps']}")
+
+    output = args.output or os.path.join(
+        "evidence", "bench", f"bench_{datetime.now().strftime('%Y_%m_%d_%H_%M_%S')}.json"
+    )
+
+    status = 0
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        result["compare"] = {"baseline": args.compare, "tolerance": args.tolerance,
+                             "regressions": regressions}
+        if baseline.get("machine", {}).get("platform") != result["machine"]["platform"]:
+            print("[WARN] Baseline was recorded on a different machine")
+        for r in regressions:
+            print(f"[WARN] Regression {r['stage']}: {r['change']:+.1%}")
+        if regressions:
+            status = 1
+        else:
+            print("[INFO] No regressions")
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"[DONE] Benchmark → {output}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
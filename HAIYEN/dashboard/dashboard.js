@@ -1,86 +1,151 @@
-const API_BASE_URL = 'http://localhost:5000';
-const API_VIOLATIONS = `${API_BASE_URL}/api/violations`;
-
-document.addEventListener('DOMContentLoaded', function () {
-    fetchViolations();
-    // Auto refresh mỗi 5 giây
-    setInterval(fetchViolations, 5000);
-});
-
-async function fetchViolations() {
-    try {
-        const response = await fetch(API_VIOLATIONS);
-        const data = await response.json();
-
-        renderTable(data);
-        updateStats(data);
-    } catch (error) {
-        console.error('❌ Lỗi kết nối API:', error);
-        document.getElementById("apiStatus").innerText = "Offline";
-        document.getElementById("apiStatus").className = "badge bg-danger";
-    }
-}
-
-function renderTable(violations) {
-    const tableBody = document.getElementById('violationsTable');
-    tableBody.innerHTML = '';
-
-    violations
-        .slice()
-        .reverse() // mới nhất lên đầu
-        .forEach(v => {
-            const plate = v.plate && v.plate !== "N/A" ? v.plate : "UNKNOWN";
-
-            const row = document.createElement("tr");
-            row.innerHTML = `
-                <td>${v.time}</td>
-                <td>
-                    <span class="plate-display">${plate}</span>
-                </td>
-                <td>
-                    <span class="badge bg-danger">${v.type}</span>
-                </td>
-                <td>Intersection</td>
-                <td>
-                    <img 
-                        src="${API_BASE_URL}/evidence/images/${v.image}" 
-                        class="image-preview rounded"
-                        onclick="showImage('${API_BASE_URL}/evidence/images/${v.image}', '${plate}')"
-                    >
-                </td>
-                <td>
-                    <button class="btn btn-sm btn-outline-primary" 
-                        onclick="showImage('${API_BASE_URL}/evidence/images/${v.image}', '${plate}')">
-                        <i class="bi bi-eye"></i>
-                    </button>
-                </td>
-            `;
-            tableBody.appendChild(row);
-        });
-
-    document.getElementById("violationCount").innerText = violations.length;
-    document.getElementById("totalCount").innerText = violations.length;
-    document.getElementById("showingCount").innerText = violations.length;
-}
-
-function updateStats(data) {
-    document.getElementById("totalViolations").innerText = data.length;
-
-    const today = new Date().toISOString().slice(0, 10);
-    const todayCount = data.filter(v => v.time.includes(today)).length;
-    document.getElementById("todayViolations").innerText = todayCount;
-
-    const uniquePlates = new Set(
-        data
-            .map(v => v.plate)
-            .filter(p => p && p !== "N/A")
-    );
-    document.getElementById("uniquePlates").innerText = uniquePlates.size;
-}
-
-function showImage(src, plate) {
-    document.getElementById("modalImage").src = src;
-    document.getElementById("imageDetails").innerHTML =
-        `<b>License Plate:</b> ${plate}`;
-    new bootstrap.Modal(document.getElementById("imageModal")).show();
-}
+const API_BASE_URL = 'http://localhost:5000';
+const API_VIOLATIONS = `${API_BASE_URL}/api/violations`;
+const API_SUMMARY = `${API_BASE_URL}/api/violations/summary`;
+const API_STREAM = `${API_BASE_URL}/api/stream`;
+const PAGE_SIZE = 100;
+const POLL_INTERVAL = 5000;
+
+let violations = [];
+let totalViolations = 0;
+let pollTimer = null;
+let summaryTimer = null;
+
+document.addEventListener('DOMContentLoaded', async function () {
+    await fetchViolations();
+    subscribe();
+});
+
+// Live feed (SSE): chỉ nhận vi phạm mới; EventSource tự kết nối lại và gửi
+// Last-Event-ID. Không hỗ trợ / bị đóng hẳn → quay về polling 5 giây.
+function subscribe() {
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+
+    // Danh sách sắp theo thời gian vi phạm, không theo id: resume từ id lớn nhất.
+    // Chưa có vi phạm nào → server tự lấy mốc hiện tại
+    const lastId = violations.reduce((max, v) => Math.max(max, v.id || 0), 0);
+    const source = new EventSource(lastId ? `${API_STREAM}?last_event_id=${lastId}` : API_STREAM);
+
+    source.addEventListener('violation', event => {
+        addViolation(JSON.parse(event.data));
+        setApiStatus(true);
+    });
+    source.onopen = () => setApiStatus(true);
+    source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED) {
+            console.warn('⚠️ Live feed closed, falling back to polling');
+            startPolling();
+        } else {
+            setApiStatus(false);
+        }
+    };
+}
+
+function startPolling() {
+    if (!pollTimer) {
+        pollTimer = setInterval(fetchViolations, POLL_INTERVAL);
+    }
+}
+
+function addViolation(v) {
+    if (violations.some(item => item.id === v.id)) return;
+
+    violations.unshift(v);
+    violations = violations.slice(0, PAGE_SIZE);
+    totalViolations += 1;
+    renderTable(violations, totalViolations);
+
+    // Gộp nhiều event liên tiếp thành 1 lần gọi summary
+    clearTimeout(summaryTimer);
+    summaryTimer = setTimeout(fetchSummary, 1000);
+}
+
+async function fetchSummary() {
+    try {
+        const summary = await fetch(API_SUMMARY).then(r => r.json());
+        totalViolations = summary.total;
+        updateStats(summary);
+    } catch (error) {
+        console.error('❌ Lỗi kết nối API:', error);
+    }
+}
+
+function setApiStatus(online) {
+    const status = document.getElementById("apiStatus");
+    status.innerText = online ? "Online" : "Offline";
+    status.className = online ? "badge bg-success" : "badge bg-danger";
+}
+
+async function fetchViolations() {
+    try {
+        // Chỉ lấy trang mới nhất; thống kê tính sẵn ở backend
+        const [page, summary] = await Promise.all([
+            fetch(`${API_VIOLATIONS}?limit=${PAGE_SIZE}`).then(r => r.json()),
+            fetch(API_SUMMARY).then(r => r.json())
+        ]);
+
+        violations = page.items;
+        totalViolations = summary.total;
+        renderTable(violations, totalViolations);
+        updateStats(summary);
+        setApiStatus(true);
+    } catch (error) {
+        console.error('❌ Lỗi kết nối API:', error);
+        setApiStatus(false);
+    }
+}
+
+function renderTable(violations, total) {
+    const tableBody = document.getElementById('violationsTable');
+    tableBody.innerHTML = '';
+
+    violations // API trả mới nhất trước
+        .forEach(v => {
+            const plate = v.plate && v.plate !== "N/A" ? v.plate : "UNKNOWN";
+
+            const row = document.createElement("tr");
+            row.innerHTML = `
+                <td>${v.time}</td>
+                <td>
+                    <span class="plate-display">${plate}</span>
+                </td>
+                <td>
+                    <span class="badge bg-danger">${v.type}</span>
+                </td>
+                <td>Intersection</td>
+                <td>
+                    <img 
+                        src="${API_BASE_URL}/evidence/images/${v.image}" 
+                        class="image-preview rounded"
+                        onclick="showImage('${API_BASE_URL}/evidence/images/${v.image}', '${plate}')"
+                    >
+                </td>
+                <td>
+                    <button class="btn btn-sm btn-outline-primary" 
+                        onclick="showImage('${API_BASE_URL}/evidence/images/${v.image}', '${plate}')">
+                        <i class="bi bi-eye"></i>
+                    </button>
+                </td>
+            `;
+            tableBody.appendChild(row);
+        });
+
+    document.getElementById("violationCount").innerText = total;
+    document.getElementById("totalCount").innerText = total;
+    document.getElementById("showingCount").innerText = violations.length;
+}
+
+function updateStats(summary) {
+    document.getElementById("totalViolations").innerText = summary.total;
+    document.getElementById("todayViolations").innerText = summary.today;
+    document.getElementById("uniquePlates").innerText = summary.unique_plates;
+}
+
+function showImage(src, plate) {
+    document.getElementById("modalImage").src = src;
+    document.getElementById("imageDetails").innerHTML =
+        `<b>License Plate:</b> ${plate}`;
+    new bootstrap.Modal(document.getElementById("imageModal")).show();
+}
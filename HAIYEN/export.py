@@ -0,0 +1,74 @@
+"""
+Export model YOLO sang ONNX Runtime / OpenVINO (tuỳ chọn INT8) và so sánh
+độ chính xác với PyTorch baseline.
+
+    python export.py --backend onnx
+    python export.py --backend openvino --int8 --calib calibration/
+    python export.py --backend onnx --int8 --calib calibration/ --report evidence/backend_report.json
+"""
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+
+from src.config import Config
+from src.backends import BACKENDS, calibration_images, compare_backends, export_model
+
+DEFAULT_MODELS = ["models/yolov8n.pt", "models/box.pt", "models/plate.pt"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export detector models to a CPU inference backend")
+    parser.add_argument("--backend", required=True, choices=[b for b in BACKENDS if b != "torch"])
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS)
+    parser.add_argument("--imgsz", type=int, default=Config.EXPORT_IMAGE_SIZE)
+    parser.add_argument("--int8", action="store_true", help="INT8 post-training quantization")
+    parser.add_argument("--calib", default=Config.CALIBRATION_DIR,
+                        help="Thư mục ảnh frame để calibrate INT8")
+    parser.add_argument("--eval", default=None,
+                        help="Thư mục ảnh để so sánh với PyTorch (mặc định: --calib)")
+    parser.add_argument("--eval-limit", type=int, default=100)
+    parser.add_argument("--report", default=None,
+                        help="File JSON báo cáo chênh lệch độ chính xác")
+    args = parser.parse_args(argv)
+
+    exported = {}
+    for model_path in args.models:
+        if not os.path.exists(model_path):
+            print(f"[ERROR] Model not found: {model_path}")
+            return 1
+        exported[model_path] = export_model(
+            model_path, args.backend,
+            imgsz=args.imgsz,
+            int8=args.int8,
+            calib_dir=args.calib if args.int8 else None
+        )
+
+    if args.report is None:
+        return 0
+
+    images = calibration_images(args.eval or args.calib, args.eval_limit)
+    results = []
+    for model_path in args.models:
+        result = compare_backends(model_path, images, args.backend, int8=args.int8, imgsz=args.imgsz)
+        print(f"[INFO] {model_path}: recall {result['recall']:.1%} | "
+              f"IoU {result['mean_iou']} | {result['torch_ms']} → {result['backend_ms']} ms")
+        results.append(result)
+
+    os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump({
+            "created": datetime.now().isoformat(),
+            "backend": args.backend,
+            "int8": args.int8,
+            "imgsz": args.imgsz,
+            "models": results
+        }, f, indent=2)
+
+    print(f"[DONE] Report → {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
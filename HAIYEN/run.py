@@ -1,5 +1,9 @@
-from src.detect_violation import ViolationSystem
-
-if __name__ == "__main__":
-    system = ViolationSystem()
-    system.process_video("assets/video/2.mp4")
+from src.detect_violation import ViolationSystem
+
+if __name__ == "__main__":
+    # Yellow box: "calibrate" detect ở BOX_CALIB_FRAMES frame đầu rồi cache theo
+    # camera (evidence/geometry/<camera>.json), chỉ detect lại mỗi
+    # BOX_REVALIDATE_SECONDS giây hoặc khi camera bị lệch.
+    # "per_frame" = detect yellow box mỗi frame như phiên bản cũ.
+    system = ViolationSystem(box_mode="calibrate")
+    system.process_video("assets/video/2.mp4")
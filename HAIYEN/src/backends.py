@@ -0,0 +1,226 @@
+import os
+import glob
+import time
+import tempfile
+
+import cv2
+import numpy as np
+
+from .box_geometry import box_iou
+from .detect_plate import letterbox
+
+
+# ===============================
+# INFERENCE BACKEND
+# ===============================
+# "torch"    → file .pt, chạy PyTorch (mặc định, như cũ)
+# "onnx"     → export .onnx, chạy ONNX Runtime
+# "openvino" → export thư mục *_openvino_model, chạy OpenVINO
+# ultralytics tự chọn runtime theo đuôi file nên detector / tracker vẫn
+# nhận Results như cũ, không phải đổi format trả về.
+BACKENDS = ("torch", "onnx", "openvino")
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def export_path(model_path, backend, int8=False):
+    """Đường dẫn model đã export, nằm cạnh file .pt."""
+    stem, _ = os.path.splitext(str(model_path))
+    suffix = "_int8" if int8 else ""
+
+    if backend == "torch":
+        return str(model_path)
+    if backend == "onnx":
+        return f"{stem}{suffix}.onnx"
+    if backend == "openvino":
+        return f"{stem}{suffix}_openvino_model"
+    raise ValueError(f"Unknown inference backend: {backend}")
+
+
+def calibration_images(calib_dir, limit=None):
+    files = sorted(
+        f for f in glob.glob(os.path.join(str(calib_dir), "**", "*"), recursive=True)
+        if f.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    if not files:
+        raise FileNotFoundError(f"No calibration images in {calib_dir}")
+    return files[:limit] if limit else files
+
+
+def preprocess(img, imgsz):
+    """Letterbox + BGR→RGB + CHW float32 [0, 1], giống tiền xử lý của ultralytics."""
+    boxed, _, _ = letterbox(img, imgsz)
+    x = boxed[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    return x[None]
+
+
+def export_model(model_path, backend, imgsz=640, int8=False, calib_dir=None, calib_limit=300):
+    """
+    Export model .pt sang backend, trả về đường dẫn model đã export.
+    int8: post-training quantization, calibrate trên ảnh trong calib_dir
+        onnx     → onnxruntime.quantization.quantize_static (QDQ)
+        openvino → ultralytics export int8 (NNCF)
+    """
+    from ultralytics import YOLO
+
+    target = export_path(model_path, backend, int8)
+    if backend == "torch":
+        return target
+    if int8 and calib_dir is None:
+        raise ValueError("INT8 quantization needs a calibration folder")
+
+    model = YOLO(str(model_path))
+    started = time.time()
+
+    if backend == "onnx":
+        fp32 = model.export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+        if int8:
+            quantize_onnx(fp32, target, calibration_images(calib_dir, calib_limit), imgsz)
+        elif os.path.abspath(fp32) != os.path.abspath(target):
+            os.replace(fp32, target)
+
+    else:
+        data = None
+        if int8:
+            # ultralytics lấy ảnh calibrate từ dataset yaml, không cần label
+            calib_dir = os.path.abspath(str(calib_dir))
+            calibration_images(calib_dir)   # báo lỗi sớm nếu thư mục rỗng
+            fd, data = tempfile.mkstemp(suffix=".yaml")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(f"path: {calib_dir}\ntrain: .\nval: .\n")
+                f.write(f"names: {dict(model.names)}\n")
+        try:
+            out = model.export(format="openvino", imgsz=imgsz, dynamic=True, int8=int8, data=data)
+        finally:
+            if data is not None:
+                os.remove(data)
+        if os.path.abspath(out) != os.path.abspath(target):
+            os.replace(out, target)
+
+    print(f"[SAVE] Exported {model_path} → {target} ({time.time() - started:.1f}s)")
+    return target
+
+
+def quantize_onnx(fp32_path, int8_path, images, imgsz=640):
+    """INT8 static quantization cho model ONNX từ danh sách ảnh calibrate."""
+    import onnxruntime
+    from onnxruntime.quantization import (
+        CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    )
+
+    input_name = onnxruntime.InferenceSession(
+        fp32_path, providers=["CPUExecutionProvider"]
+    ).get_inputs()[0].name
+
+    class Reader(CalibrationDataReader):
+        def __init__(self):
+            self.files = iter(images)
+
+        def get_next(self):
+            for path in self.files:
+                img = cv2.imread(path)
+                if img is not None:
+                    return {input_name: preprocess(img, imgsz)}
+            return None
+
+    quantize_static(
+        fp32_path,
+        int8_path,
+        Reader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8
+    )
+
+
+def resolve_model(model_path, backend="torch", int8=False, calib_dir=None, imgsz=640):
+    """Đường dẫn model cần load cho backend, export nếu chưa có."""
+    if backend == "torch":
+        return str(model_path)
+
+    target = export_path(model_path, backend, int8)
+    if not os.path.exists(target):
+        print(f"[INFO] Exporting {model_path} to {backend}{' int8' if int8 else ''}...")
+        target = export_model(model_path, backend, imgsz=imgsz, int8=int8, calib_dir=calib_dir)
+    return target
+
+
+# ===============================
+# ACCURACY REPORT
+# ===============================
+def _predict(model, img, conf):
+    started = time.time()
+    r = model(img, conf=conf, verbose=False)[0]
+    ms = 1000 * (time.time() - started)
+
+    boxes = r.boxes.xyxy.cpu().numpy().tolist()
+    confs = r.boxes.conf.cpu().numpy().tolist()
+    classes = r.boxes.cls.cpu().numpy().astype(int).tolist()
+    return list(zip(boxes, confs, classes)), ms
+
+
+def compare_backends(model_path, images, backend, int8=False, calib_dir=None,
+                     imgsz=640, conf=0.25, iou_threshold=0.5):
+    """
+    So sánh kết quả backend với PyTorch baseline trên danh sách ảnh.
+    Mỗi box baseline được ghép greedy với box backend cùng class có IoU cao nhất.
+    Trả về dict: recall so với baseline, box thừa, IoU / chênh lệch confidence
+    trung bình, latency trung bình và tốc độ tăng.
+    """
+    from ultralytics import YOLO
+
+    base = YOLO(str(model_path))
+    path = resolve_model(model_path, backend, int8, calib_dir, imgsz)
+    other = YOLO(path, task="detect")
+
+    matched, base_total, extra = 0, 0, 0
+    ious, conf_deltas = [], []
+    base_ms, other_ms = [], []
+
+    for i, file in enumerate(images):
+        img = cv2.imread(file)
+        if img is None:
+            continue
+
+        ref, ms_ref = _predict(base, img, conf)
+        out, ms_out = _predict(other, img, conf)
+        if i > 0:   # bỏ lần chạy đầu (warm-up)
+            base_ms.append(ms_ref)
+            other_ms.append(ms_out)
+
+        used = set()
+        for box, c, cls in ref:
+            best, best_iou = None, iou_threshold
+            for j, (obox, oc, ocls) in enumerate(out):
+                if j in used or ocls != cls:
+                    continue
+                v = box_iou(box, obox)
+                if v >= best_iou:
+                    best, best_iou = j, v
+            if best is not None:
+                used.add(best)
+                matched += 1
+                ious.append(best_iou)
+                conf_deltas.append(abs(c - out[best][1]))
+        base_total += len(ref)
+        extra += len(out) - len(used)
+
+    base_avg = float(np.mean(base_ms)) if base_ms else 0.0
+    other_avg = float(np.mean(other_ms)) if other_ms else 0.0
+
+    return {
+        "model": str(model_path),
+        "backend": backend,
+        "int8": int8,
+        "exported": path,
+        "images": len(images),
+        "baseline_boxes": base_total,
+        "matched": matched,
+        "recall": round(matched / base_total, 4) if base_total else 1.0,
+        "extra_boxes": extra,
+        "mean_iou": round(float(np.mean(ious)), 4) if ious else None,
+        "mean_conf_delta": round(float(np.mean(conf_deltas)), 4) if conf_deltas else None,
+        "torch_ms": round(base_avg, 2),
+        "backend_ms": round(other_avg, 2),
+        "speedup": round(base_avg / other_avg, 2) if other_avg else None
+    }
@@ -0,0 +1,267 @@
+import os
+import json
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+def box_iou(a, b):
+    ax1, ay1, ax2, ay2 = a
+    bx1, by1, bx2, by2 = b
+
+    iw = max(0, min(ax2, bx2) - max(ax1, bx1))
+    ih = max(0, min(ay2, by2) - max(ay1, by1))
+    inter = iw * ih
+    if inter == 0:
+        return 0.0
+
+    area_a = (ax2 - ax1) * (ay2 - ay1)
+    area_b = (bx2 - bx1) * (by2 - by1)
+    return inter / float(area_a + area_b - inter)
+
+
+def fuse_boxes(samples, iou_threshold=0.5, min_ratio=0.5):
+    """
+    samples: list các kết quả detect (mỗi phần tử = list box của 1 frame)
+    Gom các box trùng nhau qua nhiều frame, giữ cụm xuất hiện
+    >= min_ratio số frame, lấy median toạ độ → geometry ổn định.
+    """
+    clusters = []   # mỗi cụm: list box
+
+    for boxes in samples:
+        for box in boxes:
+            best, best_iou = None, iou_threshold
+            for cluster in clusters:
+                iou = box_iou(box, cluster[0])
+                if iou >= best_iou:
+                    best, best_iou = cluster, iou
+            if best is None:
+                clusters.append([box])
+            else:
+                best.append(box)
+
+    min_count = max(1, int(len(samples) * min_ratio))
+    fused = []
+    for cluster in clusters:
+        if len(cluster) < min_count:
+            continue
+        x1, y1, x2, y2 = np.median(np.array(cluster), axis=0).astype(int)
+        fused.append((int(x1), int(y1), int(x2), int(y2)))
+    return fused
+
+
+def boxes_match(old, new, iou_threshold=0.5):
+    if len(old) != len(new):
+        return False
+    return all(
+        any(box_iou(o, n) >= iou_threshold for n in new)
+        for o in old
+    )
+
+
+class BoxGeometry:
+    """
+    Yellow box cố định với camera: detect trong N frame đầu, fuse thành
+    geometry ổn định, cache lại. Chỉ detect lại mỗi K giây hoặc khi
+    drift check (so sánh nền vùng box đã thu nhỏ) báo camera bị lệch.
+
+    Xe đứng chờ che 1 phần box làm detect lệch đúng lúc có vi phạm: chỉ
+    calibrate lại sau mismatch_limit lần kiểm tra sai liên tiếp, và vẫn dùng
+    geometry cũ tới khi fuse xong geometry mới.
+    """
+
+    def __init__(
+        self,
+        box_detector,
+        calib_frames=30,
+        revalidate_seconds=60,
+        drift_threshold=25.0,
+        cache_path=None,
+        mismatch_limit=3,
+        drift_window=5
+    ):
+        """
+        mismatch_limit: số lần revalidate sai liên tiếp trước khi calibrate lại
+        drift_window: số signature (~1 / giây) lấy median để bỏ xe đang chạy qua
+        """
+        self.box_detector = box_detector
+        self.calib_frames = calib_frames
+        self.revalidate_seconds = revalidate_seconds
+        self.drift_threshold = drift_threshold
+        self.cache_path = cache_path
+        self.mismatch_limit = max(1, mismatch_limit)
+
+        self.boxes = None
+        self.samples = []
+        self.recalibrating = False  # đang gom sample mới, self.boxes vẫn là geometry cũ
+        self.mismatches = 0
+        self.reference = None
+        self.history = deque(maxlen=max(1, drift_window))
+        self.last_check = 0
+        self.detect_calls = 0
+
+        if cache_path and os.path.exists(cache_path):
+            self.load(cache_path)
+
+    # ===============================
+    # PERSISTENCE
+    # ===============================
+    def load(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.boxes = [tuple(b) for b in data["boxes"]]
+            # Camera có thể đã bị lệch từ lần chạy trước: kiểm tra lại ngay frame đầu
+            # (update() so box cache với box detect được, lấy reference từ frame đó)
+            self.reference = None
+            self.history.clear()
+            self.last_check = None
+            print(f"[INFO] Loaded box geometry: {path} ({len(self.boxes)} boxes)")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[WARN] Cannot load box geometry {path}: {e}")
+            self.boxes = None
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"boxes": [list(b) for b in self.boxes]}, f, indent=2)
+        print(f"[INFO] Saved box geometry: {path}")
+
+    # ===============================
+    # ROI
+    # ===============================
+    def roi(self, frame_shape, margin):
+        """
+        Vùng bao các yellow box + margin (pixel), kẹp trong frame.
+        None khi chưa calibrate xong hoặc không có box.
+        """
+        if not self.boxes:
+            return None
+
+        h, w = frame_shape[:2]
+        xs1, ys1, xs2, ys2 = zip(*self.boxes)
+        return (
+            max(0, min(xs1) - margin),
+            max(0, min(ys1) - margin),
+            min(w, max(xs2) + margin),
+            min(h, max(ys2) + margin)
+        )
+
+    # ===============================
+    # DRIFT CHECK
+    # ===============================
+    def _roi_signature(self, frame):
+        if not self.boxes:
+            roi = frame
+        else:
+            xs1, ys1, xs2, ys2 = zip(*self.boxes)
+            roi = frame[max(0, min(ys1)):max(ys2), max(0, min(xs1)):max(xs2)]
+            if roi.size == 0:
+                roi = frame
+
+        gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+
+    def _background(self, frame):
+        """
+        Nền vùng box: median theo thời gian của drift_window signature gần nhất
+        (xe chạy qua bị loại). None khi chưa đủ mẫu.
+        """
+        self.history.append(self._roi_signature(frame))
+        if len(self.history) < self.history.maxlen:
+            return None
+        return np.median(np.stack(self.history), axis=0)
+
+    def _set_reference(self, frame):
+        background = None
+        if len(self.history) == self.history.maxlen:
+            background = np.median(np.stack(self.history), axis=0)
+        self.reference = background if background is not None else self._roi_signature(frame)
+        self.history.clear()
+
+    def _drifted(self, frame):
+        if self.reference is None:
+            self._set_reference(frame)
+            return False
+        background = self._background(frame)
+        if background is None:
+            return False
+        # Xe đứng chờ chỉ che 1 phần vùng box → median theo pixel, không dùng mean;
+        # camera bị lệch thì gần như mọi pixel đều đổi
+        diff = np.median(np.abs(background - self.reference))
+        return diff > self.drift_threshold
+
+    # ===============================
+    # MAIN API
+    # ===============================
+    def _detect(self, frame):
+        self.detect_calls += 1
+        return self.box_detector.detect(frame)
+
+    def needs_detection(self, frame, frame_idx, fps):
+        """True nếu frame này cần chạy box model (calibrate / revalidate / drift)."""
+        if self.boxes is None or self.recalibrating:
+            return True
+
+        if self.last_check is None:
+            return True     # geometry vừa load từ cache, chưa kiểm tra
+
+        # Drift check rẻ nhưng vẫn chỉ chạy ~1 lần / giây; lần kiểm tra trước
+        # sai → kiểm tra lại ở tick kế tiếp thay vì chờ hết revalidate_seconds
+        due = frame_idx - self.last_check >= self.revalidate_seconds * fps
+        if due:
+            return True
+        if frame_idx % max(1, int(fps)) != 0:
+            return False
+        return self.mismatches > 0 or self._drifted(frame)
+
+    def _add_sample(self, frame, frame_idx, boxes):
+        self.samples.append(boxes)
+        if len(self.samples) < self.calib_frames:
+            return
+
+        self.boxes = fuse_boxes(self.samples)
+        self.samples = []
+        self.recalibrating = False
+        self.mismatches = 0
+        self.history.clear()
+        self._set_reference(frame)
+        self.last_check = frame_idx
+        print(f"[INFO] Box geometry calibrated: {len(self.boxes)} boxes")
+        if self.cache_path:
+            self.save(self.cache_path)
+
+    def update(self, frame, frame_idx, boxes):
+        """Cập nhật geometry từ kết quả detect (khi needs_detection() = True)."""
+        # Calibrate lần đầu: chưa có geometry, dùng kết quả frame hiện tại
+        if self.boxes is None:
+            self._add_sample(frame, frame_idx, boxes)
+            return boxes
+
+        # Calibrate lại: giữ geometry cũ (ROI không đổi) tới khi fuse xong
+        if self.recalibrating:
+            self._add_sample(frame, frame_idx, boxes)
+            return self.boxes
+
+        self.last_check = frame_idx
+        if boxes_match(self.boxes, boxes):
+            self.mismatches = 0
+            self._set_reference(frame)
+            return self.boxes
+
+        self.mismatches += 1
+        if self.mismatches < self.mismatch_limit:
+            return self.boxes
+
+        print(f"[INFO] Box geometry changed ({self.mismatches} checks) → recalibrating")
+        self.recalibrating = True
+        self.mismatches = 0
+        self.samples = []
+        self._add_sample(frame, frame_idx, boxes)
+        return self.boxes
+
+    def get_boxes(self, frame, frame_idx, fps):
+        if self.needs_detection(frame, frame_idx, fps):
+            return self.update(frame, frame_idx, self._detect(frame))
+        return self.boxes
@@ -0,0 +1,134 @@
+import os
+import queue
+import threading
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+_STOP = object()
+
+
+class ClipBuffer:
+    """
+    Ring buffer N giây frame gần nhất (JPEG trong RAM, giới hạn theo byte).
+    Khi có vi phạm: trigger() → sau post_seconds ghi 1 clip ngắn gồm
+    pre_seconds trước + post_seconds sau thời điểm vi phạm.
+    Clip được decode + encode mp4 trên thread riêng.
+    """
+
+    def __init__(
+        self,
+        fps,
+        pre_seconds=3.0,
+        post_seconds=3.0,
+        max_bytes=64 * 1024 * 1024,
+        quality=80,
+        scale=1.0
+    ):
+        self.fps = max(int(fps), 1)
+        self.pre_frames = int(pre_seconds * self.fps)
+        self.post_frames = int(post_seconds * self.fps)
+        self.max_frames = self.pre_frames + self.post_frames + 1
+        self.max_bytes = max_bytes
+        self.quality = quality
+        self.scale = scale
+
+        self.frames = deque()   # (frame_idx, jpeg bytes)
+        self.bytes = 0
+        self.pending = []       # [start_idx, end_idx, path]
+
+        self.written = 0
+        self.evicted = 0
+
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._worker, name="clips", daemon=True)
+        self.thread.start()
+
+    # ===============================
+    # BUFFER
+    # ===============================
+    def add(self, frame_idx, frame):
+        if self.scale != 1.0:
+            frame = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+
+        ok, jpg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return
+
+        data = jpg.tobytes()
+        self.frames.append((frame_idx, data))
+        self.bytes += len(data)
+
+        # Giữ trong giới hạn số frame cần thiết + ngân sách RAM
+        while self.frames and (len(self.frames) > self.max_frames or self.bytes > self.max_bytes):
+            _, old = self.frames.popleft()
+            self.bytes -= len(old)
+            self.evicted += 1
+
+        done = [p for p in self.pending if frame_idx >= p[1]]
+        for p in done:
+            self.pending.remove(p)
+            self._submit(*p)
+
+    def trigger(self, frame_idx, path):
+        """Đặt lịch ghi clip quanh frame_idx vào path (.mp4)."""
+        self.pending.append([frame_idx - self.pre_frames, frame_idx + self.post_frames, path])
+
+    def _submit(self, start, end, path):
+        frames = [data for idx, data in self.frames if start <= idx <= end]
+        if frames:
+            self.queue.put((frames, path))
+
+    # ===============================
+    # WRITER
+    # ===============================
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is _STOP:
+                    return
+                self._write(*item)
+            except Exception as e:
+                print(f"[ERROR] Cannot write clip: {e}")
+            finally:
+                self.queue.task_done()
+
+    def _write(self, frames, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        writer = None
+        for data in frames:
+            frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            if writer is None:
+                h, w = frame.shape[:2]
+                writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), self.fps, (w, h))
+            writer.write(frame)
+
+        if writer is not None:
+            writer.release()
+            self.written += 1
+            print(f"[SAVE] Clip saved: {path}")
+
+    def flush(self):
+        """Ghi các clip đang chờ với những frame hiện có (hết video)."""
+        for p in self.pending:
+            self._submit(*p)
+        self.pending = []
+        self.queue.join()
+
+    def close(self):
+        self.flush()
+        self.queue.put(_STOP)
+        self.thread.join()
+
+    def stats(self):
+        return {
+            "frames": len(self.frames),
+            "bytes": self.bytes,
+            "pending": len(self.pending),
+            "written": self.written,
+            "evicted": self.evicted
+        }
@@ -1,39 +1,134 @@
-import os
-from pathlib import Path
-
-class Config:
-    # Paths
-    BASE_DIR = Path(__file__).parent.parent
-    MODELS_DIR = BASE_DIR / "models"
-    ASSETS_DIR = BASE_DIR / "assets"
-    EVIDENCE_DIR = BASE_DIR / "evidence"
-    
-    # Model paths
-    VEHICLE_MODEL = MODELS_DIR / "yolov8n.pt"
-    PLATE_MODEL = MODELS_DIR / "plate.pt"
-    BOX_MODEL = MODELS_DIR / "box.pt"
-    
-    # Detection thresholds
-    VEHICLE_CONF = 0.5
-    PLATE_CONF = 0.6
-    BOX_CONF = 0.7
-    
-    # Tracking
-    MAX_AGE = 30
-    MIN_HITS = 3
-    IOU_THRESHOLD = 0.3
-    
-    # Violation rules
-    STOP_TIME_THRESHOLD = 3.0  # seconds
-    JUNCTION_BLOCK_TIME = 2.0  # seconds
-    
-    # Evidence保存
-    EVIDENCE_FORMATS = {
-        'image': 'jpg',
-        'video': 'mp4',
-        'log': 'json'
-    }
-    
-    # API settings
-    API_HOST = "0.0.0.0"
+import os
+from pathlib import Path
+
+class Config:
+    # Paths
+    BASE_DIR = Path(__file__).parent.parent
+    MODELS_DIR = BASE_DIR / "models"
+    ASSETS_DIR = BASE_DIR / "assets"
+    EVIDENCE_DIR = BASE_DIR / "evidence"
+    # Các đường dẫn GEOMETRY_DIR, READINESS_FILE, METRICS_DIR, VIOLATION_DB,
+    # LIVE_DIR bên dưới tương đối với evidence_dir của ViolationSystem
+    
+    # Model paths
+    VEHICLE_MODEL = MODELS_DIR / "yolov8n.pt"
+    PLATE_MODEL = MODELS_DIR / "plate.pt"
+    BOX_MODEL = MODELS_DIR / "box.pt"
+    
+    # Detection thresholds
+    VEHICLE_CONF = 0.5
+    PLATE_CONF = 0.6
+    BOX_CONF = 0.7
+    
+    # Tracking
+    MAX_AGE = 30    # frame; track mất lâu hơn → ViolationLogic.forget
+    MIN_HITS = 3
+    IOU_THRESHOLD = 0.3
+    
+    # Yellow box geometry (mặc định của ViolationSystem, batch.py, streams.py)
+    # "calibrate": detect BOX_CALIB_FRAMES frame đầu rồi cache ở
+    #   <evidence_dir>/GEOMETRY_DIR/<camera>.json; cache được kiểm tra lại ngay
+    #   frame đầu, sau đó mỗi BOX_REVALIDATE_SECONDS giây hoặc khi drift.
+    #   Xoá file cache để calibrate lại từ đầu.
+    # "per_frame": detect mỗi frame (hành vi cũ, chậm hơn)
+    BOX_MODE = "calibrate"
+    BOX_CALIB_FRAMES = 30
+    BOX_REVALIDATE_SECONDS = 60
+    BOX_DRIFT_THRESHOLD = 25.0
+    BOX_MISMATCH_LIMIT = 3      # revalidate sai liên tiếp N lần mới calibrate lại
+    BOX_DRIFT_WINDOW = 5        # số mẫu (~1 / giây) lấy median nền khi check drift
+    GEOMETRY_DIR = "geometry"
+
+    # ROI quanh yellow box (pixel), None = detect/track trên cả frame
+    ROI_MARGIN = None
+
+    # Motion gate: bỏ qua inference khi junction không có chuyển động
+    MOTION_GATE = False
+    MOTION_PIXEL_THRESHOLD = 25
+    MOTION_MIN_RATIO = 0.002
+    MOTION_MAX_SKIP_SECONDS = 2.0
+    MOTION_ROI_MARGIN = 50
+
+    # OCR: số ảnh biển số mỗi lần gọi recognizer
+    OCR_BATCH_SIZE = 8
+    # Plate detect: mọi crop xe letterbox về cùng kích thước, 1 forward / batch
+    PLATE_INPUT_SIZE = 320
+    PLATE_BATCH_SIZE = 16
+    # Cache biển số theo track: OCR vài frame rồi bỏ phiếu từng ký tự
+    PLATE_MIN_READINGS = 3
+    PLATE_MAX_READINGS = 8
+    PLATE_MIN_CONFIDENCE = 0.8
+    PLATE_SAMPLE_EVERY = 5  # frames
+
+    # Backend inference: "torch" | "onnx" (ONNX Runtime) | "openvino"
+    # Model .pt được export 1 lần ra file cạnh nó (models/yolov8n.onnx, ...)
+    INFERENCE_BACKEND = "torch"
+    INFERENCE_INT8 = False             # INT8 post-training quantization
+    CALIBRATION_DIR = "calibration"    # ảnh frame dùng để calibrate INT8
+    EXPORT_IMAGE_SIZE = 640
+
+    # Khởi động: load + warm-up model song song trên background thread
+    WARMUP_ENABLED = True
+    WARMUP_OCR = True
+    WARMUP_IMAGE_SIZE = 640
+    READINESS_FILE = "readiness.json"  # backend đọc cho /api/health
+
+    # Metrics: pipeline ghi file .prom, backend gộp ở /api/metrics
+    METRICS_ENABLED = True
+    METRICS_DIR = "metrics"
+    METRICS_INTERVAL = 5.0  # seconds
+    # Log debug (stop_frames...): tối đa 1 dòng / interval, giữ tỉ lệ sample
+    DEBUG_LOG = False
+    DEBUG_LOG_INTERVAL = 1.0
+    DEBUG_LOG_SAMPLE = 0.2
+
+    # Pipeline (decode → infer → annotate → encode)
+    PIPELINE_QUEUE_SIZE = 8
+    # Nguồn live (camera, rtsp://...): queue đầy → bỏ frame cũ nhất thay vì chặn đọc
+    DROP_LIVE_FRAMES = True
+
+    # Multi-camera scheduler
+    STREAM_BATCH_SIZE = 8
+    STREAM_MAX_WAIT = 0.05  # seconds
+
+    # Violation rules
+    STOP_TIME_THRESHOLD = 3.0  # seconds
+    JUNCTION_BLOCK_TIME = 2.0  # seconds
+    
+    # Violation event: đóng event sau N giây không còn vi phạm
+    EVENT_CLOSE_SECONDS = 1.0
+
+    # Evidence writer (async): "block" chờ khi queue đầy, "drop" bỏ evidence
+    EVIDENCE_WORKERS = 2
+    EVIDENCE_QUEUE_SIZE = 64
+    EVIDENCE_POLICY = "block"
+    # Index vi phạm (SQLite WAL) cho /api/violations; None = chỉ ghi file JSON
+    VIOLATION_DB = "violations.db"
+
+    # Clip trước/sau vi phạm từ ring buffer JPEG trong RAM
+    CLIPS_ENABLED = True
+    CLIP_PRE_SECONDS = 3.0
+    CLIP_POST_SECONDS = 3.0
+    CLIP_BUFFER_MB = 64
+    CLIP_JPEG_QUALITY = 80
+    # Ghi toàn bộ video annotate ({timestamp}_output.mp4)
+    WRITE_FULL_VIDEO = True
+
+    # Xem trực tiếp: frame annotate thu nhỏ → <evidence_dir>/live/<camera>.jpg,
+    # backend phát MJPEG ở /api/live/<camera>
+    LIVE_ENABLED = True
+    LIVE_DIR = "live"
+    LIVE_FPS = 5
+    LIVE_WIDTH = 640
+    LIVE_JPEG_QUALITY = 70
+
+    # Evidence保存
+    EVIDENCE_FORMATS = {
+        'image': 'jpg',
+        'video': 'mp4',
+        'log': 'json'
+    }
+    
+    # API settings
+    API_HOST = "0.0.0.0"
     API_PORT = 8000
\ No newline at end of file
@@ -1,15 +1,29 @@
-from ultralytics import YOLO
-
-class BoxDetector:
-    def __init__(self, model_path):
-        self.model = YOLO(model_path)
-
-    def detect(self, frame):
-        results = self.model(frame, conf=0.3, verbose=False)
-        boxes = []
-
-        for r in results:
-            for box in r.boxes:
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                boxes.append((x1, y1, x2, y2))
-        return boxes
+from .models import get_model
+
+
+class BoxDetector:
+    def __init__(self, model_path):
+        self.model_path = model_path
+
+    @property
+    def model(self):
+        return get_model(self.model_path)
+
+    def detect(self, frame):
+        return self.detect_batch([frame])[0]
+
+    def detect_batch(self, frames):
+        """1 forward cho nhiều frame, trả về list box theo đúng thứ tự frame."""
+        if not frames:
+            return []
+
+        results = self.model(frames, conf=0.3, verbose=False)
+        batch = []
+
+        for r in results:
+            boxes = []
+            for box in r.boxes:
+                x1, y1, x2, y2 = map(int, box.xyxy[0])
+                boxes.append((x1, y1, x2, y2))
+            batch.append(boxes)
+        return batch
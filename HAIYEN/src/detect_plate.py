@@ -1,15 +1,90 @@
-from ultralytics import YOLO
-
-class PlateDetector:
-    def __init__(self, model_path):
-        self.model = YOLO(model_path)
-
-    def detect(self, frame):
-        results = self.model(frame, conf=0.4, verbose=False)
-        plates = []
-
-        for r in results:
-            for box in r.boxes:
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                plates.append((x1, y1, x2, y2))
-        return plates
+import cv2
+import numpy as np
+
+from .models import get_model
+
+
+def letterbox(img, size):
+    """Resize giữ tỉ lệ + pad về size x size. Trả về (ảnh, scale, (pad_x, pad_y))."""
+    h, w = img.shape[:2]
+    scale = min(size / h, size / w)
+    new_w, new_h = max(1, int(round(w * scale))), max(1, int(round(h * scale)))
+    pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+
+    out = np.full((size, size, 3), 114, dtype=np.uint8)
+    out[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(
+        img, (new_w, new_h), interpolation=cv2.INTER_LINEAR
+    )
+    return out, scale, (pad_x, pad_y)
+
+
+class PlateDetector:
+    def __init__(self, model_path, input_size=320, batch_size=16):
+        """
+        input_size: cạnh ảnh letterbox cho detect_many (crop xe nhỏ, không cần 640)
+        batch_size: số crop tối đa mỗi lần forward
+        """
+        self.model_path = model_path
+        self.input_size = input_size
+        self.batch_size = batch_size
+
+    @property
+    def model(self):
+        return get_model(self.model_path)
+
+    def detect(self, frame):
+        return self.detect_batch([frame])[0]
+
+    def detect_batch(self, crops):
+        """1 forward cho nhiều ảnh xe, trả về list plate theo đúng thứ tự."""
+        if not crops:
+            return []
+
+        results = self.model(crops, conf=0.4, verbose=False)
+        batch = []
+
+        for r in results:
+            plates = []
+            for box in r.boxes:
+                x1, y1, x2, y2 = map(int, box.xyxy[0])
+                plates.append((x1, y1, x2, y2))
+            batch.append(plates)
+        return batch
+
+    def detect_many(self, crops, conf=0.4):
+        """
+        Letterbox tất cả crop xe về cùng kích thước rồi chạy chung 1 forward.
+        Trả về list theo đúng thứ tự crop: (x1, y1, x2, y2, confidence) của
+        biển số tin cậy nhất (toạ độ trong crop), None nếu không có biển nào >= conf.
+        """
+        best = [None] * len(crops)
+        valid = [i for i, c in enumerate(crops) if c is not None and c.size > 0]
+
+        for start in range(0, len(valid), self.batch_size):
+            idxs = valid[start:start + self.batch_size]
+            boxed = [letterbox(crops[i], self.input_size) for i in idxs]
+
+            results = self.model(
+                [img for img, _, _ in boxed],
+                imgsz=self.input_size,
+                conf=conf,
+                verbose=False
+            )
+
+            for i, (_, scale, (pad_x, pad_y)), r in zip(idxs, boxed, results):
+                if len(r.boxes) == 0:
+                    continue
+
+                confs = r.boxes.conf.cpu().numpy()
+                k = int(confs.argmax())
+                x1, y1, x2, y2 = r.boxes.xyxy[k].cpu().numpy()
+
+                # Toạ độ letterbox → toạ độ crop
+                h, w = crops[i].shape[:2]
+                x1 = int(np.clip((x1 - pad_x) / scale, 0, w))
+                x2 = int(np.clip((x2 - pad_x) / scale, 0, w))
+                y1 = int(np.clip((y1 - pad_y) / scale, 0, h))
+                y2 = int(np.clip((y2 - pad_y) / scale, 0, h))
+                best[i] = (x1, y1, x2, y2, float(confs[k]))
+
+        return best
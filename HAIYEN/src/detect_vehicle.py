@@ -1,29 +1,54 @@
-from ultralytics import YOLO
-import cv2
-
-class VehicleDetector:
-    def __init__(self, model_path):
-        self.model = YOLO(model_path)
-
-    def detect(self, frame):
-        results = self.model(frame, conf=0.4, iou=0.5, verbose=False)
-        detections = []
-
-        for r in results:
-            for box in r.boxes:
-                cls_id = int(box.cls[0])
-                conf = float(box.conf[0])
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                detections.append({
-                    "bbox": (x1, y1, x2, y2),
-                    "class_id": cls_id,
-                    "confidence": conf
-                })
-        return detections
-
-
-if __name__ == "__main__":
-    detector = VehicleDetector("models/yolov8n.pt")
-    img = cv2.imread("assets/images/vehicle1.jpg")
-    dets = detector.detect(img)
-    print(dets)
+import cv2
+
+from .models import get_model
+
+
+class VehicleDetector:
+    def __init__(self, model_path, frame_cache=None, tracker=None):
+        """
+        frame_cache + tracker: dùng lại detection mà tracker đã tính
+        cho frame hiện tại thay vì chạy thêm 1 lần YOLO.
+        """
+        self.model_path = model_path
+        self.frame_cache = frame_cache
+        self.tracker = tracker
+
+    @property
+    def model(self):
+        return get_model(self.model_path)
+
+    def detect(self, frame):
+        if self.frame_cache is not None and self.tracker is not None:
+            vehicles = self.frame_cache.get(
+                "vehicles", lambda: self.tracker.detect_vehicles(frame)
+            )
+            return [
+                {
+                    "bbox": v["bbox"],
+                    "class_id": v["class_id"],
+                    "confidence": v["confidence"]
+                }
+                for v in vehicles
+            ]
+
+        results = self.model(frame, conf=0.4, iou=0.5, verbose=False)
+        detections = []
+
+        for r in results:
+            for box in r.boxes:
+                cls_id = int(box.cls[0])
+                conf = float(box.conf[0])
+                x1, y1, x2, y2 = map(int, box.xyxy[0])
+                detections.append({
+                    "bbox": (x1, y1, x2, y2),
+                    "class_id": cls_id,
+                    "confidence": conf
+                })
+        return detections
+
+
+if __name__ == "__main__":
+    detector = VehicleDetector("models/yolov8n.pt")
+    img = cv2.imread("assets/images/vehicle1.jpg")
+    dets = detector.detect(img)
+    print(dets)
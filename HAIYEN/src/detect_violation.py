@@ -1,158 +1,736 @@
-import cv2
-import os
-from datetime import datetime
-
-from .detect_vehicle import VehicleDetector
-from .detect_box import BoxDetector
-from .detect_plate import PlateDetector
-from .ocr import PlateOCR
-from .tracking import Tracker
-from .logic import ViolationLogic
-from .utils import save_evidence
-
-
-class ViolationSystem:
-    def __init__(self):
-        self.vehicle_detector = VehicleDetector("models/yolov8n.pt")
-        self.box_detector = BoxDetector("models/box.pt")
-        self.plate_detector = PlateDetector("models/plate.pt")
-
-        self.tracker = Tracker("models/yolov8n.pt")
-        self.ocr = None
-
-        self.logic = ViolationLogic()
-
-    def process_video(self, video_path):
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            print("[ERROR] Cannot open video")
-            return
-
-        fps = int(cap.get(cv2.CAP_PROP_FPS))
-        self.logic.fps = fps
-        self.logic.stop_frames = fps * 5  # >5 giây mới vi phạm
-
-        # Folder theo từng lần chạy
-        image_dir = os.path.join("evidence", "images", "images1")
-        log_dir   = os.path.join("evidence", "logs", "log1")
-
-        os.makedirs(image_dir, exist_ok=True)
-        os.makedirs(log_dir, exist_ok=True)
-
-        os.makedirs("evidence/video", exist_ok=True)
-        timestamp = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
-        output_video = f"evidence/video/{timestamp}_output.mp4"
-
-        w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        writer = cv2.VideoWriter(
-            output_video,
-            cv2.VideoWriter_fourcc(*"mp4v"),
-            fps,
-            (w, h)
-        )
-
-        print("[INFO] Processing video...")
-        print(f"[INFO] Evidence images: {image_dir}")
-        print(f"[INFO] Evidence logs  : {log_dir}")
-
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            yellow_boxes = self.box_detector.detect(frame)
-            tracks = self.tracker.track(frame)
-
-            # Draw yellow boxes
-            for bx1, by1, bx2, by2 in yellow_boxes:
-                cv2.rectangle(frame, (bx1, by1), (bx2, by2), (0, 255, 255), 3)
-
-            for t in tracks:
-                tid = t["track_id"]
-                x1, y1, x2, y2 = t["bbox"]
-
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.putText(
-                    frame, f"ID {tid}",
-                    (x1, y1 - 5),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.6, (0, 255, 0), 2
-                )
-
-                violated = self.logic.check_violation(
-                    tid,
-                    (x1, y1, x2, y2),
-                    yellow_boxes
-                )
-
-                if violated:
-                    cv2.putText(
-                        frame, "VIOLATION",
-                        (x1, y2 + 20),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.7, (0, 0, 255), 2
-                    )
-
-                    # === 1️⃣ CROP ẢNH XE ===
-                    vehicle_crop = frame[y1:y2, x1:x2]
-                    if vehicle_crop.size == 0:
-                        continue
-
-                    # Load OCR khi cần
-                    if self.ocr is None:
-                        self.ocr = PlateOCR()
-
-                    plate_text = None
-
-                    # === 2️⃣ DETECT BIỂN SỐ TRONG ẢNH XE ===
-                    plates = self.plate_detector.detect(vehicle_crop)
-
-                    if plates:
-                        px1, py1, px2, py2 = plates[0]
-                        plate_crop = vehicle_crop[py1:py2, px1:px2]
-
-                        if plate_crop.size > 0:
-                            # === 3️⃣ OCR BIỂN SỐ ===
-                            plate_text = self.ocr.read_plate(plate_crop)
-
-                            # Vẽ bbox biển số lên frame gốc
-                            cv2.rectangle(
-                                frame,
-                                (x1 + px1, y1 + py1),
-                                (x1 + px2, y1 + py2),
-                                (255, 0, 0),
-                                2
-                            )
-
-                            if plate_text:
-                                cv2.putText(
-                                    frame,
-                                    plate_text,
-                                    (x1 + px1, y1 + py1 - 5),
-                                    cv2.FONT_HERSHEY_SIMPLEX,
-                                    0.6,
-                                    (255, 0, 0),
-                                    2
-                                )
-
-                    # === 4️⃣ LƯU EVIDENCE ===
-                    save_evidence(
-                        frame=frame,
-                        track_id=tid,
-                        plate_text=plate_text,
-                        image_dir=image_dir,
-                        log_dir=log_dir
-                    )
-
-            writer.write(frame)
-            cv2.imshow("Violation Detection", frame)
-
-            if cv2.waitKey(1) & 0xFF == 27:
-                break
-
-        cap.release()
-        writer.release()
-        cv2.destroyAllWindows()
-
-        print("[DONE] Finished processing")
+import cv2
+import os
+import time
+import threading
+from datetime import datetime
+
+from .detect_vehicle import VehicleDetector
+from .detect_box import BoxDetector
+from .detect_plate import PlateDetector
+from .ocr import PlateOCR
+from .tracking import Tracker
+from .models import FrameCache, warm_up as warm_up_model
+from .box_geometry import BoxGeometry
+from .pipeline import FramePipeline
+from .motion import MotionGate
+from .config import Config
+from .logic import ViolationLogic, ViolationEvents
+from .evidence import EvidenceWriter
+from .store import ViolationStore
+from .clips import ClipBuffer
+from .live import LivePublisher
+from .plate_cache import PlateCache
+from .utils import is_live_source
+from .warmup import ModelWarmup
+from .metrics import metrics, FpsMeter, MetricsPublisher, LogLimiter
+
+
+class ViolationSystem:
+    def __init__(
+        self,
+        box_mode=Config.BOX_MODE,
+        roi_margin=Config.ROI_MARGIN,
+        motion_gate=Config.MOTION_GATE,
+        warm_up=Config.WARMUP_ENABLED,
+        evidence_dir="evidence",
+        store=True
+    ):
+        """
+        box_mode: "calibrate" | "per_frame" (xem BoxGeometry)
+        roi_margin: None → detect/track trên cả frame; số pixel → chỉ chạy
+            trên vùng quanh yellow box (cần box_mode="calibrate")
+        motion_gate: bỏ qua YOLO + tracking khi vùng junction không có chuyển động
+        warm_up: load + warm-up model ngay trên background thread;
+            False → load ở frame đầu tiên
+        evidence_dir: gốc của store, metrics, readiness, geometry cache, live
+        store: True → ViolationStore tại <evidence_dir>/VIOLATION_DB,
+            ViolationStore có sẵn → dùng chung, False / None → không ghi store
+        """
+        self.evidence_dir = evidence_dir
+
+        # Mỗi file weight chỉ load 1 lần (xem models.get_model),
+        # detection xe tính 1 lần / frame và dùng chung qua frame_cache
+        self.frame_cache = FrameCache()
+
+        self.tracker = Tracker("models/yolov8n.pt", frame_cache=self.frame_cache)
+        self.vehicle_detector = VehicleDetector(
+            "models/yolov8n.pt",
+            frame_cache=self.frame_cache,
+            tracker=self.tracker
+        )
+        self.box_detector = BoxDetector("models/box.pt")
+        self.plate_detector = PlateDetector(
+            "models/plate.pt",
+            input_size=Config.PLATE_INPUT_SIZE,
+            batch_size=Config.PLATE_BATCH_SIZE
+        )
+        self.box_mode = box_mode
+        self.roi_margin = roi_margin
+        self.roi = None
+
+        self.use_motion_gate = motion_gate
+        self.motion_gate = None
+        self.last_boxes = None
+        self.last_vehicles = None
+
+        self.ocr = None
+        self.ocr_lock = threading.Lock()
+        self.first_ocr_ms = None
+        self.geometry = None
+        self.pipeline = None
+        self.clip_dir = None
+
+        self.debug = None
+        if Config.DEBUG_LOG:
+            self.debug = LogLimiter(Config.DEBUG_LOG_INTERVAL, Config.DEBUG_LOG_SAMPLE)
+
+        self.logic = ViolationLogic(debug=self.debug)
+        self.events = ViolationEvents()
+        self.plates = self.create_plate_cache()
+
+        # Ghi evidence trên thread riêng, frame loop không chờ đĩa;
+        # mỗi evidence thêm 1 dòng vào store để backend truy vấn có index
+        self.owns_store = store is True and bool(Config.VIOLATION_DB)
+        if store is True:
+            store = self.create_store()
+        self.store = store or None
+        self.evidence = EvidenceWriter(
+            workers=Config.EVIDENCE_WORKERS,
+            max_queue=Config.EVIDENCE_QUEUE_SIZE,
+            policy=Config.EVIDENCE_POLICY,
+            store=self.store
+        )
+
+        # Metrics ghi trên hot path, gauge (queue, cache...) chỉ lấy lúc xuất file
+        self.fps_meter = None
+        self.publisher = None
+        metrics.add_collector("system", self.collect_metrics)
+        if Config.METRICS_ENABLED:
+            self.publisher = self.create_publisher()
+
+        # Model chỉ load khi dùng (xem models.get_model); warm-up chạy song song
+        # trong lúc mở video / camera
+        size = Config.WARMUP_IMAGE_SIZE
+        jobs = [
+            ("vehicle", lambda: warm_up_model(self.tracker.model_path, size)),
+            ("box", lambda: warm_up_model(self.box_detector.model_path, size)),
+            ("plate", lambda: warm_up_model(self.plate_detector.model_path, Config.PLATE_INPUT_SIZE))
+        ]
+        if Config.WARMUP_OCR:
+            jobs.append(("ocr", lambda: self.get_ocr().warm_up()))
+        self.warmup = ModelWarmup(jobs, status_path=self.evidence_path(Config.READINESS_FILE))
+        if warm_up:
+            self.warmup.start()
+
+    def evidence_path(self, name):
+        return os.path.join(self.evidence_dir, name)
+
+    def create_store(self):
+        if not Config.VIOLATION_DB:
+            return None
+        return ViolationStore(self.evidence_path(Config.VIOLATION_DB))
+
+    def create_publisher(self):
+        return MetricsPublisher(self.evidence_path(Config.METRICS_DIR), Config.METRICS_INTERVAL).start()
+
+    def set_evidence_dir(self, evidence_dir):
+        """
+        Đổi thư mục evidence (process_video / scheduler gọi): store tự tạo,
+        metrics, readiness, geometry cache và live đi theo thư mục mới.
+        """
+        if evidence_dir is None or os.path.abspath(evidence_dir) == os.path.abspath(self.evidence_dir):
+            return self.evidence_dir
+
+        self.evidence.flush()
+        self.evidence_dir = evidence_dir
+        if self.owns_store:
+            old = self.store
+            self.store = self.evidence.store = self.create_store()
+            old.close()
+        if self.publisher is not None:
+            self.publisher.close()
+            self.publisher = self.create_publisher()
+        self.warmup.status_path = self.evidence_path(Config.READINESS_FILE)
+        if self.warmup.state != "idle":
+            self.warmup._write_status()
+        return evidence_dir
+
+    def wait_ready(self):
+        """Chờ warm-up xong (chạy warm-up nếu chưa), lỗi nếu có model không load được."""
+        if not self.warmup.wait():
+            raise RuntimeError(f"Model warm-up failed: {self.warmup.errors}")
+
+    def get_ocr(self):
+        with self.ocr_lock:
+            if self.ocr is None:
+                self.ocr = PlateOCR(batch_size=Config.OCR_BATCH_SIZE)
+            return self.ocr
+
+    def collect_metrics(self):
+        out = [
+            ("haiyen_queue_depth", {"queue": name}, depth)
+            for name, depth in self.queue_depths().items()
+        ]
+
+        ev = self.evidence.stats()
+        out += [
+            ("haiyen_queue_depth", {"queue": "evidence"}, ev["pending"]),
+            ("haiyen_evidence_dropped", {}, ev["dropped"]),
+            ("haiyen_evidence_failed", {}, ev["failed"])
+        ]
+
+        plates = self.plates.stats()
+        for cache, hits, misses in (
+            ("plate", plates["skipped"], plates["ocr_calls"]),
+            ("frame", self.frame_cache.hits, self.frame_cache.misses)
+        ):
+            out += [
+                ("haiyen_cache_hits", {"cache": cache}, hits),
+                ("haiyen_cache_misses", {"cache": cache}, misses),
+                ("haiyen_cache_hit_ratio", {"cache": cache},
+                 round(hits / (hits + misses), 4) if hits + misses else 0.0)
+            ]
+
+        if self.motion_gate is not None:
+            gate = self.motion_gate.stats()
+            out.append(("haiyen_motion_skipped_frames", {}, gate["frames"] - gate["opened"]))
+        return out
+
+    def create_geometry(self, camera_id):
+        """Geometry yellow box theo camera, cache ở <evidence_dir>/GEOMETRY_DIR/<camera_id>.json"""
+        return BoxGeometry(
+            self.box_detector,
+            calib_frames=Config.BOX_CALIB_FRAMES,
+            revalidate_seconds=Config.BOX_REVALIDATE_SECONDS,
+            drift_threshold=Config.BOX_DRIFT_THRESHOLD,
+            mismatch_limit=Config.BOX_MISMATCH_LIMIT,
+            drift_window=Config.BOX_DRIFT_WINDOW,
+            cache_path=os.path.join(self.evidence_path(Config.GEOMETRY_DIR), f"{camera_id}.json")
+        )
+
+    @staticmethod
+    def create_plate_cache():
+        return PlateCache(
+            min_readings=Config.PLATE_MIN_READINGS,
+            max_readings=Config.PLATE_MAX_READINGS,
+            min_confidence=Config.PLATE_MIN_CONFIDENCE,
+            sample_every=Config.PLATE_SAMPLE_EVERY
+        )
+
+    # ===============================
+    # STAGE: INFER (detect + track + logic + event)
+    # ===============================
+    def analyze(self, frame, frame_idx):
+        self.wait_ready()
+        self.frame_cache.new_frame(frame_idx)
+
+        with metrics.timer("haiyen_stage_seconds", stage="motion"):
+            gate_open = self.check_motion(frame)
+
+        with metrics.timer("haiyen_stage_seconds", stage="box"):
+            if not gate_open and self.last_boxes is not None:
+                yellow_boxes = self.last_boxes
+            elif self.geometry is not None:
+                yellow_boxes = self.geometry.get_boxes(frame, frame_idx, self.logic.fps)
+            else:
+                yellow_boxes = self.box_detector.detect(frame)
+        self.last_boxes = yellow_boxes
+
+        if not gate_open and self.last_vehicles is not None:
+            # Không có chuyển động: xe đứng yên giữ nguyên bbox frame trước,
+            # bỏ qua YOLO + ByteTrack nhưng logic vẫn đếm frame đứng yên
+            self.frame_cache.put("vehicles", self.last_vehicles)
+
+        with metrics.timer("haiyen_stage_seconds", stage="tracking"):
+            roi, reset_events = self.update_roi(frame)
+            tracks = self.tracker.track(frame, roi)
+        self.last_vehicles = self.frame_cache.results.get("vehicles")
+
+        with metrics.timer("haiyen_stage_seconds", stage="logic"):
+            violating = self.logic.update(
+                [t["track_id"] for t in tracks],
+                [t["bbox"] for t in tracks],
+                yellow_boxes
+            )
+        for t in tracks:
+            t["violated"] = t["track_id"] in violating
+
+        with metrics.timer("haiyen_stage_seconds", stage="plates"):
+            self.read_plates(self.plates, [(frame, frame_idx, tracks)])
+
+        # Mỗi xe vi phạm = 1 event; evidence chỉ khi event đóng
+        with metrics.timer("haiyen_stage_seconds", stage="events"):
+            events = reset_events + self.events.update(frame_idx, frame, tracks, violating, yellow_boxes)
+            self.finalize_events(events, self.plates)
+
+        clips = []
+        if self.clip_dir is not None:
+            for ev in self.events.opened:
+                name = f"clip_{frame_idx:07d}_{ev.track_id}.mp4"
+                ev.clip = f"{os.path.basename(self.clip_dir)}/{name}"
+                clips.append(os.path.join(self.clip_dir, name))
+
+        return {
+            "yellow_boxes": yellow_boxes,
+            "tracks": tracks,
+            "roi": roi,
+            "events": events,
+            "clips": clips
+        }
+
+    def read_plates(self, plates, items):
+        """
+        items: list (frame, frame_idx, tracks), có thể từ nhiều camera.
+        OCR xe đang vi phạm mỗi sample_every frame tới khi cache đủ tin cậy,
+        gán biển số đồng thuận vào track để vẽ ngay trên frame.
+        Các camera dùng cache riêng nên plates có thể là 1 list cùng độ dài items.
+        """
+        caches = plates if isinstance(plates, list) else [plates] * len(items)
+
+        pending = []
+        for cache, (frame, frame_idx, tracks) in zip(caches, items):
+            for t in tracks:
+                if t["violated"] and cache.needs_reading(t["track_id"], frame_idx):
+                    pending.append((cache, frame, frame_idx, t))
+
+        self.recognize_plates([(frame, t) for _, frame, _, t in pending])
+        for cache, _, frame_idx, t in pending:
+            cache.add(t["track_id"], t["plate_text"], t["plate_conf"], frame_idx)
+
+        for cache, (frame, frame_idx, tracks) in zip(caches, items):
+            for t in tracks:
+                if t["violated"]:
+                    text, conf = cache.consensus(t["track_id"])
+                    t["plate_text"] = text or None
+                    t["plate_conf"] = conf
+            cache.prune(frame_idx)
+
+    def finalize_events(self, events, plates=None):
+        """
+        Gán biển số (đồng thuận từ cache nếu có) + vẽ annotate trên frame tốt
+        nhất của các event đã đóng. plates: PlateCache hoặc list cùng độ dài events.
+        """
+        caches = plates if isinstance(plates, list) else [plates] * len(events)
+
+        cached, missing = [], []
+        for cache, ev in zip(caches, events):
+            text, conf = cache.consensus(ev.track_id) if cache is not None else ("", 0.0)
+            if cache is not None:
+                cache.evict(ev.track_id)
+
+            if text:
+                ev.track["plate_text"] = text
+                ev.track["plate_conf"] = conf
+                cached.append((ev.frame, ev.track))
+            else:
+                missing.append((ev.frame, ev.track))
+
+        # Đã có biển số → chỉ detect lại bbox trên frame tốt nhất, không OCR
+        self.recognize_plates(cached, read_text=False)
+        self.recognize_plates(missing)
+
+        for ev in events:
+            self.annotate(ev.frame, {
+                "yellow_boxes": ev.yellow_boxes,
+                "tracks": [ev.track],
+                "roi": None
+            })
+
+    def check_motion(self, frame):
+        if self.motion_gate is None:
+            return True
+
+        gate_roi = None
+        if self.geometry is not None:
+            gate_roi = self.geometry.roi(frame.shape, Config.MOTION_ROI_MARGIN)
+        return self.motion_gate.check(frame, gate_roi)
+
+    def update_roi(self, frame):
+        """Trả về (roi, event bị đóng do đổi ROI)."""
+        if self.roi_margin is None or self.geometry is None:
+            return None, []
+
+        roi = self.geometry.roi(frame.shape, self.roi_margin)
+        closed = []
+        if roi != self.roi:
+            # Toạ độ ByteTrack gắn với vùng crop → đổi ROI thì track lại từ đầu
+            # (id không đặt lại nên không trùng id cũ). Event đang mở đóng luôn,
+            # giữ biển số của chúng tới finalize_events, bỏ cache các track khác
+            self.tracker.reset(keep_ids=True)
+            self.logic.reset()
+            closed = self.events.flush()
+            self.plates.clear(keep={ev.track_id for ev in closed})
+            self.roi = roi
+        return roi, closed
+
+    def recognize_plates(self, items, read_text=True):
+        """
+        items: list (frame, track) của các xe vi phạm, có thể từ nhiều frame /
+        nhiều camera. Plate model chạy 1 batch (letterbox) cho tất cả ảnh xe,
+        mỗi xe lấy biển số có confidence cao nhất >= Config.PLATE_CONF.
+        Gán track["plate_bbox"] (toạ độ frame), track["plate_text"], track["plate_conf"].
+        read_text=False: chỉ detect bbox biển số, giữ nguyên text đã có.
+        """
+        started = time.time()
+        crops, owners = [], []
+        for frame, t in items:
+            t["plate_bbox"] = None
+            if read_text:
+                t["plate_text"] = None
+                t["plate_conf"] = 0.0
+
+            # === 1️⃣ CROP ẢNH XE ===
+            x1, y1, x2, y2 = t["bbox"]
+            vehicle_crop = frame[y1:y2, x1:x2]
+            if vehicle_crop.size == 0:
+                continue
+            crops.append(vehicle_crop)
+            owners.append(t)
+
+        if not crops:
+            return
+
+        # === 2️⃣ DETECT BIỂN SỐ TRONG ẢNH XE ===
+        plate_crops, readers = [], []
+        plates = self.plate_detector.detect_many(crops, conf=Config.PLATE_CONF)
+        for vehicle_crop, t, plate in zip(crops, owners, plates):
+            if plate is None:
+                continue
+
+            x1, y1 = t["bbox"][:2]
+            px1, py1, px2, py2, _ = plate
+            plate_crop = vehicle_crop[py1:py2, px1:px2]
+
+            if plate_crop.size > 0:
+                t["plate_bbox"] = (x1 + px1, y1 + py1, x1 + px2, y1 + py2)
+                plate_crops.append(plate_crop)
+                readers.append(t)
+
+        if not plate_crops or not read_text:
+            return
+
+        # === 3️⃣ OCR BIỂN SỐ (1 batch) ===
+        metrics.inc("haiyen_ocr_calls_total")
+        metrics.inc("haiyen_ocr_images_total", len(plate_crops))
+        for t, (text, conf) in zip(readers, self.get_ocr().read_plates(plate_crops)):
+            t["plate_text"] = text
+            t["plate_conf"] = conf
+
+        if self.first_ocr_ms is None:
+            # Frame loop bị chặn bao lâu ở vi phạm đầu tiên (plate detect + OCR)
+            self.first_ocr_ms = round(1000 * (time.time() - started), 1)
+            print(f"[INFO] First plate OCR: {self.first_ocr_ms:.0f} ms")
+
+    # ===============================
+    # STAGE: ANNOTATE (+ evidence)
+    # ===============================
+    def annotate(self, frame, analysis):
+        if analysis.get("roi") is not None:
+            rx1, ry1, rx2, ry2 = analysis["roi"]
+            cv2.rectangle(frame, (rx1, ry1), (rx2, ry2), (128, 128, 128), 1)
+
+        # Draw yellow boxes
+        for bx1, by1, bx2, by2 in analysis["yellow_boxes"]:
+            cv2.rectangle(frame, (bx1, by1), (bx2, by2), (0, 255, 255), 3)
+
+        for t in analysis["tracks"]:
+            tid = t["track_id"]
+            x1, y1, x2, y2 = t["bbox"]
+
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(
+                frame, f"ID {tid}",
+                (x1, y1 - 5),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.6, (0, 255, 0), 2
+            )
+
+            if not t["violated"]:
+                continue
+
+            cv2.putText(
+                frame, "VIOLATION",
+                (x1, y2 + 20),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.7, (0, 0, 255), 2
+            )
+
+            if t.get("plate_bbox") is not None:
+                # Vẽ bbox biển số lên frame gốc
+                px1, py1, px2, py2 = t["plate_bbox"]
+                cv2.rectangle(frame, (px1, py1), (px2, py2), (255, 0, 0), 2)
+
+                if t["plate_text"]:
+                    cv2.putText(
+                        frame,
+                        t["plate_text"],
+                        (px1, py1 - 5),
+                        cv2.FONT_HERSHEY_SIMPLEX,
+                        0.6,
+                        (255, 0, 0),
+                        2
+                    )
+            elif t.get("plate_text"):
+                # Biển số đồng thuận từ cache (frame này không detect lại bbox)
+                cv2.putText(
+                    frame, t["plate_text"],
+                    (x1, y2 + 45),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    0.6, (255, 0, 0), 2
+                )
+
+        return frame
+
+    def save_events(self, events, image_dir, log_dir, fps, source=None):
+        """source: {"camera", "video"} ghi kèm log để lọc theo camera / video."""
+        for ev in events:
+            extra = ev.to_dict(fps)
+            if source:
+                extra.update(source)
+            # === 4️⃣ LƯU EVIDENCE (1 lần / event, frame tốt nhất) ===
+            self.evidence.submit(
+                frame=ev.frame,
+                track_id=ev.track_id,
+                plate_text=ev.track.get("plate_text"),
+                image_dir=image_dir,
+                log_dir=log_dir,
+                extra=extra
+            )
+
+    def close(self):
+        """Ghi nốt evidence còn trong queue rồi dừng worker."""
+        self.evidence.close()
+        if self.owns_store:
+            self.store.close()
+        metrics.remove_collector("system")
+        if self.publisher is not None:
+            self.publisher.close()
+
+    def queue_depths(self):
+        if self.pipeline is None:
+            return {}
+        return self.pipeline.queue_depths()
+
+    def process_video(
+        self,
+        video_path,
+        camera_id=None,
+        headless=False,
+        evidence_dir=None,
+        run_name=None,
+        write_video=Config.WRITE_FULL_VIDEO,
+        clips=Config.CLIPS_ENABLED
+    ):
+        """
+        headless: không mở cửa sổ cv2.imshow (chạy trên server)
+        run_name: tách evidence theo từng video
+            (images/<run_name>, logs/<run_name>, video/<run_name>_output.mp4)
+            None → dùng folder chung images1 / log1 như cũ
+        write_video: ghi toàn bộ video đã annotate
+        clips: ghi clip ngắn trước/sau mỗi vi phạm (clips/<run_name>/)
+        evidence_dir: None → evidence_dir của system (xem set_evidence_dir)
+        Trả về dict tóm tắt kết quả, None nếu không mở được video.
+        """
+        evidence_dir = self.set_evidence_dir(evidence_dir)
+        opened_at = time.time()
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            print("[ERROR] Cannot open video")
+            return None
+
+        video_stem = os.path.splitext(os.path.basename(str(video_path)))[0]
+        camera = camera_id or video_stem
+
+        self.geometry = None
+        if self.box_mode == "calibrate":
+            if camera_id is None:
+                camera_id = video_stem
+            self.geometry = self.create_geometry(camera_id)
+        print(f"[INFO] Box mode: {self.box_mode}")
+
+        fps = int(cap.get(cv2.CAP_PROP_FPS))
+        self.logic = ViolationLogic(fps=fps, debug=self.debug, max_lost=Config.MAX_AGE)  # >5 giây mới vi phạm
+        self.tracker.reset()
+        self.events = ViolationEvents(close_after=int(Config.EVENT_CLOSE_SECONDS * max(fps, 1)))
+        self.plates = self.create_plate_cache()
+        self.roi = None
+        self.last_boxes = None
+        self.last_vehicles = None
+        self.motion_gate = None
+        if self.use_motion_gate:
+            self.motion_gate = MotionGate(
+                pixel_threshold=Config.MOTION_PIXEL_THRESHOLD,
+                min_ratio=Config.MOTION_MIN_RATIO,
+                max_skip=int(Config.MOTION_MAX_SKIP_SECONDS * max(fps, 1))
+            )
+
+        # Folder theo từng lần chạy
+        if run_name is None:
+            image_dir = os.path.join(evidence_dir, "images", "images1")
+            log_dir   = os.path.join(evidence_dir, "logs", "log1")
+            timestamp = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
+            video_name = f"{timestamp}_output.mp4"
+            clip_dir  = os.path.join(evidence_dir, "clips", f"{timestamp}_clips")
+        else:
+            image_dir = os.path.join(evidence_dir, "images", run_name)
+            log_dir   = os.path.join(evidence_dir, "logs", run_name)
+            video_name = f"{run_name}_output.mp4"
+            clip_dir  = os.path.join(evidence_dir, "clips", run_name)
+
+        os.makedirs(image_dir, exist_ok=True)
+        os.makedirs(log_dir, exist_ok=True)
+
+        writer = None
+        output_video = None
+        if write_video:
+            os.makedirs(os.path.join(evidence_dir, "video"), exist_ok=True)
+            output_video = os.path.join(evidence_dir, "video", video_name)
+
+            w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            writer = cv2.VideoWriter(
+                output_video,
+                cv2.VideoWriter_fourcc(*"mp4v"),
+                fps,
+                (w, h)
+            )
+
+        clip_buffer = None
+        self.clip_dir = None
+        if clips:
+            self.clip_dir = clip_dir
+            clip_buffer = ClipBuffer(
+                fps,
+                pre_seconds=Config.CLIP_PRE_SECONDS,
+                post_seconds=Config.CLIP_POST_SECONDS,
+                max_bytes=Config.CLIP_BUFFER_MB * 1024 * 1024,
+                quality=Config.CLIP_JPEG_QUALITY
+            )
+
+        live = None
+        if Config.LIVE_ENABLED:
+            live = LivePublisher(
+                self.evidence_path(Config.LIVE_DIR), camera,
+                fps=Config.LIVE_FPS,
+                width=Config.LIVE_WIDTH,
+                quality=Config.LIVE_JPEG_QUALITY
+            )
+
+        source = {
+            "camera": camera,
+            "video": video_name if writer is not None else os.path.basename(str(video_path))
+        }
+
+        print("[INFO] Processing video...")
+        print(f"[INFO] Evidence images: {image_dir}")
+        print(f"[INFO] Evidence logs  : {log_dir}")
+
+        stats = {"frames": 0, "violation_frames": 0, "violations": 0}
+        first_frame = None
+        started = time.time()
+
+        def read_frame():
+            ret, frame = cap.read()
+            return frame if ret else None
+
+        def infer(item):
+            with metrics.timer("haiyen_frame_seconds", camera=camera):
+                item["analysis"] = self.analyze(item["frame"], item["idx"])
+            return item
+
+        def annotate(item):
+            with metrics.timer("haiyen_stage_seconds", stage="annotate"):
+                self.annotate(item["frame"], item["analysis"])
+                self.save_events(item["analysis"]["events"], image_dir, log_dir, fps, source)
+            return item
+
+        # decode → infer → annotate chạy trên thread riêng,
+        # encode + hiển thị ở thread chính (cv2.imshow cần main thread).
+        # Camera / stream live: infer không theo kịp thì bỏ frame cũ, không trễ dần
+        self.fps_meter = FpsMeter(camera=camera)
+        self.pipeline = FramePipeline(
+            read_frame,
+            [("infer", infer), ("annotate", annotate)],
+            queue_size=Config.PIPELINE_QUEUE_SIZE,
+            drop_frames=Config.DROP_LIVE_FRAMES and is_live_source(video_path),
+            labels={"camera": camera}
+        ).start()
+
+        try:
+            for item in self.pipeline.results():
+                if first_frame is None:
+                    first_frame = time.time() - opened_at
+                    print(f"[INFO] First frame processed after {first_frame:.2f}s")
+                if writer is not None:
+                    with metrics.timer("haiyen_stage_seconds", stage="encode"):
+                        writer.write(item["frame"])
+                if clip_buffer is not None:
+                    with metrics.timer("haiyen_stage_seconds", stage="clips"):
+                        clip_buffer.add(item["idx"], item["frame"])
+                    for path in item["analysis"]["clips"]:
+                        clip_buffer.trigger(item["idx"], path)
+                if live is not None:
+                    live.publish(item["frame"])
+                self.fps_meter.tick()
+                stats["frames"] += 1
+                stats["violations"] += len(item["analysis"]["events"])
+                if any(t["violated"] for t in item["analysis"]["tracks"]):
+                    stats["violation_frames"] += 1
+
+                if headless:
+                    continue
+
+                cv2.imshow("Violation Detection", item["frame"])
+
+                if cv2.waitKey(1) & 0xFF == 27:
+                    # Dừng decode, xả nốt các frame đang trong pipeline
+                    self.pipeline.stop()
+        finally:
+            # Decode có thể đang trong cap.read(), infer vẫn sửa state của system:
+            # dừng + join hết thread trước khi release (batch dùng lại system)
+            self.pipeline.close()
+            cap.release()
+            if writer is not None:
+                writer.release()
+            if clip_buffer is not None:
+                clip_buffer.close()
+            if live is not None:
+                live.close()
+            if not headless:
+                cv2.destroyAllWindows()
+
+        # Event còn mở khi hết video
+        remaining = self.events.flush()
+        self.finalize_events(remaining, self.plates)
+        self.save_events(remaining, image_dir, log_dir, fps, source)
+        stats["violations"] += len(remaining)
+        self.evidence.flush()
+
+        elapsed = time.time() - started
+        print("[DONE] Finished processing")
+
+        gate_stats = self.motion_gate.stats() if self.motion_gate is not None else None
+        if gate_stats is not None:
+            print(f"[INFO] Motion gate open ratio: {gate_stats['open_ratio']:.1%}")
+
+        return {
+            "video": str(video_path),
+            "output_video": output_video,
+            "image_dir": image_dir,
+            "log_dir": log_dir,
+            "frames": stats["frames"],
+            "dropped_frames": self.pipeline.dropped,
+            "violation_frames": stats["violation_frames"],
+            "violations": stats["violations"],
+            "seconds": round(elapsed, 2),
+            "fps": round(stats["frames"] / elapsed, 2) if elapsed > 0 else 0.0,
+            "motion_gate": gate_stats,
+            "evidence": self.evidence.stats(),
+            "plates": self.plates.stats(),
+            "startup": {
+                "first_frame_seconds": round(first_frame, 2) if first_frame is not None else None,
+                "first_ocr_ms": self.first_ocr_ms,
+                "warmup": self.warmup.status()
+            },
+            "clips": clip_buffer.stats() if clip_buffer is not None else None
+        }
@@ -0,0 +1,126 @@
+import os
+import time
+import queue
+import threading
+
+from .utils import save_evidence
+from .metrics import metrics
+
+
+_STOP = object()
+
+
+class EvidenceWriter:
+    """
+    Ghi evidence (JPEG + JSON) bất đồng bộ: frame loop chỉ đưa item vào
+    queue có giới hạn, encode + ghi đĩa chạy trên vài worker thread.
+
+    policy khi queue đầy (đĩa / NFS chậm):
+        "block" → chờ tới khi có chỗ (không mất evidence)
+        "drop"  → bỏ item, tăng counter dropped (không làm chậm detect)
+
+    store: ViolationStore (tuỳ chọn) — ghi thêm 1 dòng index sau khi lưu file.
+    """
+
+    def __init__(self, workers=2, max_queue=64, policy="block", store=None):
+        if policy not in ("block", "drop"):
+            raise ValueError(f"Unknown evidence policy: {policy}")
+
+        self.policy = policy
+        self.store = store
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.lock = threading.Lock()
+        self.known_dirs = set()
+
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.write_seconds = 0.0
+
+        self.threads = [
+            threading.Thread(target=self._worker, name=f"evidence-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for t in self.threads:
+            t.start()
+
+    def _ensure_dirs(self, *dirs):
+        # os.makedirs 1 lần cho mỗi thư mục thay vì mỗi lần ghi
+        for d in dirs:
+            if d not in self.known_dirs:
+                os.makedirs(d, exist_ok=True)
+                self.known_dirs.add(d)
+
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is _STOP:
+                    return
+
+                started = time.time()
+                try:
+                    record = save_evidence(make_dirs=False, **item)
+                    if self.store is not None:
+                        self.store.add(record)
+                    elapsed = time.time() - started
+                    metrics.observe("haiyen_evidence_write_seconds", elapsed)
+                    with self.lock:
+                        self.written += 1
+                        self.write_seconds += elapsed
+                except Exception as e:
+                    print(f"[ERROR] Cannot write evidence: {e}")
+                    with self.lock:
+                        self.failed += 1
+            finally:
+                self.queue.task_done()
+
+    def submit(self, frame, track_id, plate_text, image_dir, log_dir, extra=None):
+        """Trả về False nếu item bị bỏ (policy "drop" và queue đầy)."""
+        self._ensure_dirs(image_dir, log_dir)
+
+        item = {
+            "frame": frame,
+            "track_id": track_id,
+            "plate_text": plate_text,
+            "image_dir": image_dir,
+            "log_dir": log_dir,
+            "extra": extra
+        }
+
+        if self.policy == "block":
+            self.queue.put(item)
+        else:
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                with self.lock:
+                    self.dropped += 1
+                return False
+
+        with self.lock:
+            self.queued += 1
+        return True
+
+    def flush(self):
+        """Chờ ghi xong tất cả item đang trong queue."""
+        self.queue.join()
+
+    def close(self):
+        self.flush()
+        for _ in self.threads:
+            self.queue.put(_STOP)
+        for t in self.threads:
+            t.join()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "queued": self.queued,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "pending": self.queue.qsize(),
+                "avg_write_ms": round(1000 * self.write_seconds / self.written, 2) if self.written else 0.0
+            }
@@ -0,0 +1,86 @@
+import os
+import time
+import threading
+
+import cv2
+
+
+class LivePublisher:
+    """
+    Xuất frame đã annotate cho xem trực tiếp (backend /api/live/<camera>).
+    Giới hạn fps + thu nhỏ ở frame loop, encode JPEG 1 lần trên thread riêng
+    rồi ghi đè <directory>/<camera>.jpg (os.replace). Chỉ giữ frame mới nhất:
+    encode chậm thì frame cũ bị thay, không có hàng đợi.
+    """
+
+    def __init__(self, directory, camera, fps=5.0, width=640, quality=70):
+        self.path = os.path.join(directory, f"{camera}.jpg")
+        self.tmp = f"{self.path}.{os.getpid()}.tmp"
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.width = width
+        self.quality = quality
+
+        self.last = 0.0
+        self.published = 0
+        self.replaced = 0       # frame bị thay trước khi kịp encode
+
+        self.frame = None
+        self.changed = threading.Condition()
+        self.closed = False
+
+        os.makedirs(directory, exist_ok=True)
+        self.thread = threading.Thread(target=self._worker, name=f"live-{camera}", daemon=True)
+        self.thread.start()
+
+    def publish(self, frame):
+        now = time.time()
+        if now - self.last < self.interval:
+            return False
+        self.last = now
+
+        h, w = frame.shape[:2]
+        if w > self.width:
+            frame = cv2.resize(frame, (self.width, int(h * self.width / w)), interpolation=cv2.INTER_AREA)
+        else:
+            frame = frame.copy()    # frame gốc còn được encode vào video
+
+        with self.changed:
+            if self.frame is not None:
+                self.replaced += 1
+            self.frame = frame
+            self.changed.notify()
+        return True
+
+    def _worker(self):
+        while True:
+            with self.changed:
+                self.changed.wait_for(lambda: self.frame is not None or self.closed)
+                if self.frame is None:
+                    return
+                frame, self.frame = self.frame, None
+
+            ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if not ok:
+                continue
+            try:
+                with open(self.tmp, "wb") as f:
+                    f.write(jpeg.tobytes())
+                os.replace(self.tmp, self.path)
+                self.published += 1
+            except OSError as e:
+                print(f"[WARN] Cannot publish live frame: {e}")
+
+    def close(self):
+        with self.changed:
+            self.closed = True
+            self.frame = None
+            self.changed.notify()
+        self.thread.join()
+        # Backend coi camera là offline khi không còn file
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def stats(self):
+        return {"published": self.published, "replaced": self.replaced}
@@ -1,66 +1,246 @@
-import math
-
-class ViolationLogic:
-    def __init__(self, fps=30, stop_time_threshold=5, move_threshold=5):
-        """
-        fps: FPS video
-        stop_time_threshold: số giây đứng yên để vi phạm
-        move_threshold: ngưỡng pixel coi là không di chuyển
-        """
-        self.fps = fps
-        self.stop_frames = stop_time_threshold * fps
-        self.move_threshold = move_threshold
-
-        self.last_position = {}   # track_id -> (cx, cy)
-        self.stop_counter = {}    # track_id -> số frame đứng yên
-
-    def inside_box(self, bbox, box):
-        x1, y1, x2, y2 = bbox
-        bx1, by1, bx2, by2 = box
-
-        cx = (x1 + x2) // 2
-        cy = (y1 + y2) // 2
-
-        return bx1 <= cx <= bx2 and by1 <= cy <= by2, cx, cy
-
-    def check_violation(self, track_id, bbox, boxes):
-        for box in boxes:
-            inside, cx, cy = self.inside_box(bbox, box)
-
-            if not inside:
-                # Ra khỏi box → reset
-                self.stop_counter[track_id] = 0
-                self.last_position[track_id] = (cx, cy)
-                return False
-
-            # ===============================
-            # TÍNH VẬN TỐC
-            # ===============================
-            if track_id not in self.last_position:
-                self.last_position[track_id] = (cx, cy)
-                self.stop_counter[track_id] = 0
-                return False
-
-            px, py = self.last_position[track_id]
-            dist = math.hypot(cx - px, cy - py)
-
-            self.last_position[track_id] = (cx, cy)
-
-            # ===============================
-            # ĐỨNG YÊN?
-            # ===============================
-            if dist < self.move_threshold:
-                self.stop_counter[track_id] += 1
-            else:
-                self.stop_counter[track_id] = 0
-
-            # DEBUG (rất nên giữ khi demo)
-            print(f"[DEBUG] ID {track_id} | stop_frames: {self.stop_counter[track_id]}")
-
-            # ===============================
-            # VI PHẠM
-            # ===============================
-            if self.stop_counter[track_id] >= self.stop_frames:
-                return True
-
-        return False
+import cv2
+import numpy as np
+
+from .zones import ZoneIndex
+
+
+class ViolationLogic:
+    def __init__(self, fps=30, stop_time_threshold=5, move_threshold=5, zone_scale=0.5, debug=None,
+                 max_lost=30):
+        """
+        fps: FPS video
+        stop_time_threshold: số giây đứng yên để vi phạm
+        move_threshold: ngưỡng pixel coi là không di chuyển
+        zone_scale: tỉ lệ label map của ZoneIndex so với frame
+        debug: LogLimiter (metrics.py) → log stop_frames của 1 track ngẫu nhiên
+        max_lost: track không xuất hiện quá N frame coi như đã kết thúc → forget
+        """
+        self.debug = debug
+        self.fps = fps
+        self.stop_frames = stop_time_threshold * fps
+        self.move_threshold = move_threshold
+        self.max_lost = max_lost
+        self.frames = 0     # số lần update (frame) đã xử lý
+
+        self.zones = ZoneIndex(scale=zone_scale)
+
+        # Trạng thái theo track, lưu dạng mảng sắp xếp theo track_id
+        self.track_ids = np.empty(0, dtype=np.int64)
+        self.last_position = np.empty((0, 2), dtype=np.int64)   # (cx, cy)
+        self.stop_counter = np.empty(0, dtype=np.int64)         # số frame đứng yên
+        self.last_seen = np.empty(0, dtype=np.int64)            # frame gần nhất thấy track
+
+    def reset(self):
+        self.track_ids = np.empty(0, dtype=np.int64)
+        self.last_position = np.empty((0, 2), dtype=np.int64)
+        self.stop_counter = np.empty(0, dtype=np.int64)
+        self.last_seen = np.empty(0, dtype=np.int64)
+
+    def inside_box(self, bbox, box):
+        x1, y1, x2, y2 = bbox
+        bx1, by1, bx2, by2 = box
+
+        cx = (x1 + x2) // 2
+        cy = (y1 + y2) // 2
+
+        return bx1 <= cx <= bx2 and by1 <= cy <= by2, cx, cy
+
+    def update(self, track_ids, bboxes, boxes, new_frame=True):
+        """
+        Cập nhật tất cả track của 1 frame cùng lúc.
+        track_ids: list/array N id
+        bboxes: N x (x1, y1, x2, y2)
+        boxes: M yellow box (x1, y1, x2, y2) hoặc polygon [[x, y], ...]
+        new_frame: False → thêm track vào frame hiện tại, không tăng bộ đếm
+            frame (không làm "già" các track khác)
+        Trả về set track_id đang vi phạm.
+        """
+        if new_frame:
+            self.frames += 1
+            self.forget_lost()
+
+        ids = np.asarray(track_ids, dtype=np.int64).reshape(-1)
+        if ids.size == 0:
+            return set()
+
+        bb = np.asarray(bboxes, dtype=np.int64).reshape(-1, 4)
+        centers = np.stack(
+            [(bb[:, 0] + bb[:, 2]) // 2, (bb[:, 1] + bb[:, 3]) // 2],
+            axis=1
+        )
+
+        # ===============================
+        # TRONG ZONE NÀO? (label map, build lại khi box đổi)
+        # ===============================
+        self.zones.set_zones(boxes)
+        inside = self.zones.lookup(centers) > 0
+
+        # ===============================
+        # TÍNH VẬN TỐC
+        # ===============================
+        n_state = len(self.track_ids)
+        if n_state:
+            pos = np.minimum(np.searchsorted(self.track_ids, ids), n_state - 1)
+            known = self.track_ids[pos] == ids
+            prev_pos = self.last_position[pos]
+            prev_cnt = self.stop_counter[pos]
+        else:
+            pos = np.zeros(len(ids), dtype=np.int64)
+            known = np.zeros(len(ids), dtype=bool)
+            prev_pos = centers
+            prev_cnt = np.zeros(len(ids), dtype=np.int64)
+
+        dist = np.hypot(*(centers - prev_pos).T)
+
+        # ===============================
+        # ĐỨNG YÊN?
+        # ===============================
+        # Ra khỏi box / mới xuất hiện / di chuyển → reset
+        still = inside & known & (dist < self.move_threshold)
+        counter = np.where(still, prev_cnt + 1, 0)
+
+        # Ghi lại trạng thái: track cũ cập nhật tại chỗ, track mới chèn vào
+        self.last_position[pos[known]] = centers[known]
+        self.stop_counter[pos[known]] = counter[known]
+        self.last_seen[pos[known]] = self.frames
+
+        new = ~known
+        if new.any():
+            new_ids, first = np.unique(ids[new], return_index=True)
+            all_ids = np.concatenate([self.track_ids, new_ids])
+            order = np.argsort(all_ids, kind="stable")
+            self.track_ids = all_ids[order]
+            self.last_position = np.concatenate([self.last_position, centers[new][first]])[order]
+            self.stop_counter = np.concatenate([self.stop_counter, counter[new][first]])[order]
+            self.last_seen = np.concatenate(
+                [self.last_seen, np.full(len(new_ids), self.frames, dtype=np.int64)]
+            )[order]
+
+        if self.debug is not None:
+            k = np.random.randint(len(ids))
+            self.debug.log("logic", f"ID {ids[k]} | stop_frames: {counter[k]} ({len(ids)} tracks)")
+
+        # ===============================
+        # VI PHẠM
+        # ===============================
+        return set(ids[counter >= self.stop_frames].tolist())
+
+    def forget(self, track_ids):
+        """Xoá trạng thái các track đã kết thúc."""
+        keep = ~np.isin(self.track_ids, np.asarray(list(track_ids), dtype=np.int64))
+        self.track_ids = self.track_ids[keep]
+        self.last_position = self.last_position[keep]
+        self.stop_counter = self.stop_counter[keep]
+        self.last_seen = self.last_seen[keep]
+
+    def forget_lost(self):
+        """Tracker đã bỏ track (mất quá max_lost frame): xoá trạng thái, giữ mảng nhỏ."""
+        if self.max_lost is None or not len(self.track_ids):
+            return
+        lost = self.frames - self.last_seen > self.max_lost
+        if lost.any():
+            self.forget(self.track_ids[lost])
+
+    def check_violation(self, track_id, bbox, boxes):
+        """
+        API cũ cho 1 track, gọi 1 lần / track / frame nên không tăng bộ đếm
+        frame (không forget track). Code mới gọi update() 1 lần / frame.
+        """
+        return track_id in self.update([track_id], [bbox], boxes, new_frame=False)
+
+
+# ===============================
+# VIOLATION EVENT
+# ===============================
+class ViolationEvent:
+    """
+    1 lần vi phạm của 1 track: mở khi track bắt đầu vi phạm, cập nhật khi
+    xe còn đứng trong box, đóng khi hết vi phạm. Chỉ giữ frame tốt nhất
+    (nét nhất × lớn nhất) làm evidence.
+    """
+
+    def __init__(self, track_id, frame_idx):
+        self.track_id = track_id
+        self.start_frame = frame_idx
+        self.last_frame = frame_idx
+        self.frames = 0
+
+        self.best_score = -1.0
+        self.best_frame_idx = None
+        self.frame = None           # bản copy frame gốc tốt nhất
+        self.yellow_boxes = []
+        self.track = None           # {"track_id", "bbox", "violated", "plate_*"}
+        self.clip = None            # đường dẫn tương đối clip trước/sau vi phạm
+
+    @staticmethod
+    def score(frame, bbox):
+        x1, y1, x2, y2 = bbox
+        crop = frame[max(0, y1):y2, max(0, x1):x2]
+        if crop.size == 0:
+            return 0.0
+
+        gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+        sharpness = cv2.Laplacian(gray, cv2.CV_64F).var()
+        return sharpness * crop.shape[0] * crop.shape[1]
+
+    def observe(self, frame_idx, frame, bbox, yellow_boxes):
+        self.last_frame = frame_idx
+        self.frames += 1
+
+        score = self.score(frame, bbox)
+        if score > self.best_score:
+            self.best_score = score
+            self.best_frame_idx = frame_idx
+            self.frame = frame.copy()
+            self.yellow_boxes = list(yellow_boxes)
+            self.track = {"track_id": self.track_id, "bbox": bbox, "violated": True}
+
+    def to_dict(self, fps):
+        fps = max(fps, 1)
+        return {
+            "track_id": self.track_id,
+            "start_frame": self.start_frame,
+            "end_frame": self.last_frame,
+            "best_frame": self.best_frame_idx,
+            "duration": round((self.last_frame - self.start_frame + 1) / fps, 2),
+            "clip": self.clip
+        }
+
+
+class ViolationEvents:
+    """State machine theo track: idle → open (đang vi phạm) → closed (emit 1 lần)."""
+
+    def __init__(self, close_after=30):
+        """close_after: số frame liên tiếp không vi phạm thì đóng event"""
+        self.close_after = close_after
+        self.open = {}   # track_id -> ViolationEvent
+        self.opened = [] # event vừa mở ở frame gần nhất
+
+    def update(self, frame_idx, frame, tracks, violating, yellow_boxes):
+        """Trả về list event vừa đóng ở frame này (event vừa mở: self.opened)."""
+        self.opened = []
+        for t in tracks:
+            tid = t["track_id"]
+            if tid not in violating:
+                continue
+
+            event = self.open.get(tid)
+            if event is None:
+                event = self.open[tid] = ViolationEvent(tid, frame_idx)
+                self.opened.append(event)
+            event.observe(frame_idx, frame, t["bbox"], yellow_boxes)
+
+        closed = []
+        for tid, event in list(self.open.items()):
+            if frame_idx - event.last_frame >= self.close_after:
+                closed.append(self.open.pop(tid))
+        return closed
+
+    def is_open(self, track_id):
+        return track_id in self.open
+
+    def flush(self):
+        """Đóng tất cả event còn mở (hết video)."""
+        closed = list(self.open.values())
+        self.open.clear()
+        return closed
@@ -0,0 +1,229 @@
+import os
+import time
+import random
+import socket
+import bisect
+import threading
+from contextlib import contextmanager
+
+
+# Bucket latency (giây): 1 ms → 10 s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # phần tử cuối = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    Registry metric trong process: counter, gauge, histogram (có label).
+    Ghi metric chỉ là cộng số trong dict dưới 1 lock, không I/O trên hot path.
+    collectors: hàm gọi lúc render để lấy gauge từ các thành phần khác
+    (độ sâu queue, stats evidence, cache...) thay vì cập nhật mỗi frame.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}      # (name, labels) -> value
+        self.gauges = {}
+        self.histograms = {}
+        self.help = {}
+        self.collectors = {}    # key -> fn() → list (name, labels dict, value)
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def describe(self, name, text):
+        self.help[name] = text
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.gauges[self._key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram()
+            hist.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def add_collector(self, key, fn):
+        self.collectors[key] = fn
+
+    def remove_collector(self, key):
+        self.collectors.pop(key, None)
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+        self.collectors.clear()
+
+    def render(self, **extra_labels):
+        """Xuất theo Prometheus text format; extra_labels gắn vào mọi sample."""
+        gauges = {}
+        for fn in list(self.collectors.values()):
+            try:
+                for name, labels, value in fn():
+                    gauges[self._key(name, labels)] = value
+            except Exception as e:
+                print(f"[WARN] Metrics collector failed: {e}")
+
+        extra = tuple(sorted(extra_labels.items()))
+        families = {}   # name -> (type, list dòng sample)
+
+        with self.lock:
+            gauges.update(self.gauges)
+            for (name, labels), value in sorted(self.counters.items()):
+                families.setdefault(name, ("counter", []))[1].append(
+                    f"{name}{_labels(labels + extra)} {value}"
+                )
+            for (name, labels), value in sorted(gauges.items()):
+                families.setdefault(name, ("gauge", []))[1].append(
+                    f"{name}{_labels(labels + extra)} {value}"
+                )
+            for (name, labels), hist in sorted(self.histograms.items()):
+                lines = families.setdefault(name, ("histogram", []))[1]
+                cumulative = 0
+                for bound, n in zip(hist.buckets + ("+Inf",), hist.counts):
+                    cumulative += n
+                    lines.append(f'{name}_bucket{_labels(labels + extra + (("le", bound),))} {cumulative}')
+                lines.append(f"{name}_sum{_labels(labels + extra)} {hist.sum:.6f}")
+                lines.append(f"{name}_count{_labels(labels + extra)} {hist.count}")
+
+        out = []
+        for name, (kind, lines) in families.items():
+            if name in self.help:
+                out.append(f"# HELP {name} {self.help[name]}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(lines)
+        return "\n".join(out) + "\n"
+
+
+# Registry dùng chung trong process
+metrics = Metrics()
+
+metrics.describe("haiyen_stage_seconds", "Latency of each pipeline stage per frame")
+metrics.describe("haiyen_frame_seconds", "End-to-end analyze latency per frame")
+metrics.describe("haiyen_frames_total", "Frames processed")
+metrics.describe("haiyen_fps", "Processed frames per second over the last window")
+metrics.describe("haiyen_queue_depth", "Items waiting in internal queues")
+metrics.describe("haiyen_frames_dropped_total", "Frames dropped from a full queue (live sources)")
+metrics.describe("haiyen_evidence_write_seconds", "Time to encode and write one evidence item")
+
+
+class FpsMeter:
+    """Đếm frame, cập nhật gauge fps mỗi window giây."""
+
+    def __init__(self, window=1.0, **labels):
+        self.window = window
+        self.labels = labels
+        self.frames = 0
+        self.started = time.time()
+
+    def tick(self):
+        self.frames += 1
+        metrics.inc("haiyen_frames_total", **self.labels)
+
+        now = time.time()
+        if now - self.started >= self.window:
+            metrics.set("haiyen_fps", round(self.frames / (now - self.started), 2), **self.labels)
+            self.frames = 0
+            self.started = now
+
+
+class MetricsPublisher:
+    """
+    Ghi metrics ra file .prom mỗi interval giây để backend Flask gộp và trả
+    ở /api/metrics (pipeline và backend chạy ở 2 process khác nhau).
+    Mỗi process 1 file <host>_<pid>.prom, sample gắn label instance.
+    """
+
+    def __init__(self, directory, interval=5.0):
+        self.instance = f"{socket.gethostname()}_{os.getpid()}"
+        self.path = os.path.join(directory, f"{self.instance}.prom")
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._loop, name="metrics", daemon=True)
+            self.thread.start()
+        return self
+
+    def _loop(self):
+        while not self.stop_event.wait(self.interval):
+            self.publish()
+
+    def publish(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(metrics.render(instance=self.instance))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[WARN] Cannot publish metrics: {e}")
+
+    def close(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.publish()
+
+
+class LogLimiter:
+    """
+    Log debug có giới hạn: mỗi key tối đa 1 dòng / interval giây và chỉ
+    giữ lại tỉ lệ sample. Số dòng bị bỏ được in kèm ở dòng kế tiếp.
+    """
+
+    def __init__(self, interval=1.0, sample=1.0):
+        self.interval = interval
+        self.sample = sample
+        self.last = {}
+        self.suppressed = {}
+
+    def log(self, key, message):
+        now = time.time()
+        if now - self.last.get(key, 0.0) < self.interval or random.random() >= self.sample:
+            self.suppressed[key] = self.suppressed.get(key, 0) + 1
+            return False
+
+        skipped = self.suppressed.pop(key, 0)
+        self.last[key] = now
+        print(f"[DEBUG] {message}" + (f" (+{skipped} suppressed)" if skipped else ""))
+        return True
@@ -0,0 +1,123 @@
+import os
+import time
+import threading
+
+import numpy as np
+
+from .config import Config
+
+
+# ===============================
+# MODEL REGISTRY
+# ===============================
+_models = {}
+_loading = {}   # key -> lock riêng cho từng file, các model khác nhau load song song
+_lock = threading.Lock()
+
+# Backend inference cho mọi model (xem backends.py)
+_backend = {
+    "name": Config.INFERENCE_BACKEND,
+    "int8": Config.INFERENCE_INT8,
+    "calib_dir": Config.CALIBRATION_DIR
+}
+
+
+def set_backend(name, int8=False, calib_dir=Config.CALIBRATION_DIR):
+    """Chọn backend trước khi load model: "torch" | "onnx" | "openvino"."""
+    from .backends import BACKENDS
+
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {name}")
+    with _lock:
+        _backend.update(name=name, int8=int8, calib_dir=calib_dir)
+        _models.clear()
+        _loading.clear()
+
+
+def get_model(model_path):
+    """
+    Trả về YOLO model cho model_path, mỗi file weight chỉ load 1 lần.
+    Các detector / tracker dùng chung cùng 1 instance.
+    ultralytics (torch) chỉ được import ở lần load đầu tiên.
+    Backend khác "torch": load bản export (ONNX / OpenVINO), export nếu chưa có.
+    """
+    key = os.path.abspath(str(model_path))
+
+    with _lock:
+        model = _models.get(key)
+        if model is not None:
+            return model
+        key_lock = _loading.setdefault(key, threading.Lock())
+
+    with key_lock:
+        model = _models.get(key)
+        if model is None:
+            from ultralytics import YOLO
+
+            started = time.time()
+            if _backend["name"] == "torch":
+                model = YOLO(str(model_path))
+            else:
+                from .backends import resolve_model
+
+                path = resolve_model(
+                    model_path,
+                    backend=_backend["name"],
+                    int8=_backend["int8"],
+                    calib_dir=_backend["calib_dir"],
+                    imgsz=Config.EXPORT_IMAGE_SIZE
+                )
+                model = YOLO(path, task="detect")
+            with _lock:
+                _models[key] = model
+            print(f"[INFO] Loaded model: {model_path} [{_backend['name']}] ({time.time() - started:.1f}s)")
+        return model
+
+
+def is_loaded(model_path):
+    return os.path.abspath(str(model_path)) in _models
+
+
+def warm_up(model_path, size=640):
+    """Load model + chạy 1 lần inference trên ảnh đen (khởi tạo CUDA / fuse layer)."""
+    model = get_model(model_path)
+    model(np.zeros((size, size, 3), dtype=np.uint8), verbose=False)
+    return model
+
+
+def clear_models():
+    with _lock:
+        _models.clear()
+        _loading.clear()
+
+
+# ===============================
+# PER-FRAME RESULT CACHE
+# ===============================
+class FrameCache:
+    """
+    Cache kết quả inference của frame hiện tại.
+    Kết quả (vd: "vehicles") chỉ tính 1 lần / frame rồi dùng chung
+    cho tracker và các consumer khác.
+    """
+
+    def __init__(self):
+        self.frame_id = None
+        self.results = {}
+        self.hits = 0
+        self.misses = 0
+
+    def new_frame(self, frame_id):
+        self.frame_id = frame_id
+        self.results = {}
+
+    def put(self, key, value):
+        self.results[key] = value
+
+    def get(self, key, compute):
+        if key in self.results:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.results[key] = compute()
+        return self.results[key]
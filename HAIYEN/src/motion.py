@@ -0,0 +1,72 @@
+import cv2
+
+
+class MotionGate:
+    """
+    Cổng chuyển động rẻ trước YOLO: so sánh ảnh xám thu nhỏ của vùng ROI
+    với frame được xử lý gần nhất. Không có gì di chuyển → bỏ qua detect
+    và track cho frame này.
+    """
+
+    def __init__(self, pixel_threshold=25, min_ratio=0.002, max_skip=50, width=160):
+        """
+        pixel_threshold: chênh lệch mức xám coi là pixel thay đổi
+        min_ratio: tỉ lệ pixel thay đổi tối thiểu để mở cổng
+        max_skip: số frame tối đa được bỏ qua liên tiếp (luôn refresh định kỳ)
+        width: chiều rộng ảnh sau khi thu nhỏ
+        """
+        self.pixel_threshold = pixel_threshold
+        self.min_ratio = min_ratio
+        self.max_skip = max_skip
+        self.width = width
+
+        self.reference = None
+        self.roi = None
+        self.skipped = 0
+
+        self.frames = 0
+        self.opened = 0
+
+    def _prepare(self, frame, roi):
+        if roi is not None:
+            x1, y1, x2, y2 = roi
+            frame = frame[y1:y2, x1:x2]
+
+        h, w = frame.shape[:2]
+        scale = self.width / float(max(w, 1))
+        small = cv2.resize(frame, (self.width, max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def check(self, frame, roi=None):
+        """True → có chuyển động (hoặc tới hạn refresh), cần chạy inference."""
+        self.frames += 1
+        gray = self._prepare(frame, roi)
+
+        if self.reference is None or roi != self.roi or self.skipped >= self.max_skip:
+            is_open = True
+        else:
+            diff = cv2.absdiff(gray, self.reference)
+            _, mask = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+            is_open = cv2.countNonZero(mask) >= self.min_ratio * mask.size
+
+        if is_open:
+            # So với frame xử lý gần nhất để bắt được chuyển động chậm
+            self.reference = gray
+            self.roi = roi
+            self.skipped = 0
+            self.opened += 1
+        else:
+            self.skipped += 1
+        return is_open
+
+    @property
+    def open_ratio(self):
+        return self.opened / self.frames if self.frames else 1.0
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "opened": self.opened,
+            "open_ratio": round(self.open_ratio, 4)
+        }
@@ -0,0 +1,188 @@
+import os
+import copy
+import shutil
+import struct
+import subprocess
+
+
+# Atom chứa atom con cần duyệt để tìm bảng offset chunk (stco / co64)
+CONTAINERS = {b"moov", b"trak", b"mdia", b"minf", b"stbl", b"edts", b"dinf", b"mvex"}
+
+
+def read_atoms(f, start, end):
+    """Duyệt atom trong [start, end): trả về list (type, offset, header_size, size)."""
+    atoms = []
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        size, kind = struct.unpack(">I4s", f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise ValueError(f"Truncated atom {kind!r} at {pos}")
+        atoms.append((kind, pos, header, size))
+        pos += size
+    return atoms
+
+
+def is_faststart(path):
+    """
+    True nếu moov nằm trước mdat (trình duyệt seek được ngay),
+    False nếu moov ở cuối, None nếu file chưa ghi xong / không phải MP4.
+    """
+    try:
+        with open(path, "rb") as f:
+            atoms = read_atoms(f, 0, os.fstat(f.fileno()).st_size)
+    except (OSError, ValueError, struct.error):
+        return None
+
+    kinds = [a[0] for a in atoms]
+    if b"moov" not in kinds or b"mdat" not in kinds:
+        return None
+    return kinds.index(b"moov") < kinds.index(b"mdat")
+
+
+def _parse(data):
+    """Tách payload atom container thành list [type, bytes | list con]."""
+    out = []
+    pos = 0
+    while pos + 8 <= len(data):
+        size, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", data[pos + 8:pos + 16])[0]
+            header = 16
+        elif size == 0:
+            size = len(data) - pos
+        body = data[pos + header:pos + size]
+        out.append([kind, _parse(body) if kind in CONTAINERS else body])
+        pos += size
+    return out
+
+
+def _build(atoms):
+    out = []
+    for kind, body in atoms:
+        payload = _build(body) if isinstance(body, list) else body
+        out.append(struct.pack(">I4s", len(payload) + 8, kind) + payload)
+    return b"".join(out)
+
+
+def _offset_tables(atoms):
+    for atom in atoms:
+        if atom[0] in (b"stco", b"co64"):
+            yield atom
+        elif isinstance(atom[1], list):
+            yield from _offset_tables(atom[1])
+
+
+def _shift_offsets(moov, shift):
+    """Cộng shift vào mọi chunk offset; stco tràn 32 bit được đổi sang co64."""
+    for atom in _offset_tables(moov):
+        kind, body = atom
+        version_flags = body[:4]
+        count = struct.unpack(">I", body[4:8])[0]
+        if kind == b"stco":
+            offsets = struct.unpack(f">{count}I", body[8:8 + 4 * count])
+        else:
+            offsets = struct.unpack(f">{count}Q", body[8:8 + 8 * count])
+        offsets = [o + shift for o in offsets]
+
+        if kind == b"stco" and offsets and max(offsets) > 0xFFFFFFFF:
+            kind = b"co64"
+        fmt = f">{count}I" if kind == b"stco" else f">{count}Q"
+        atom[0] = kind
+        atom[1] = version_flags + struct.pack(">I", count) + struct.pack(fmt, *offsets)
+
+
+def faststart(path, out_path=None):
+    """
+    Chuyển moov lên trước mdat (như qt-faststart / ffmpeg -movflags +faststart)
+    mà không encode lại: chỉ sửa bảng chunk offset và chép dữ liệu.
+    Ghi ra file tạm rồi os.replace; trả về True nếu đã ghi lại file.
+    """
+    out_path = out_path or path
+    with open(path, "rb") as f:
+        atoms = read_atoms(f, 0, os.fstat(f.fileno()).st_size)
+        kinds = [a[0] for a in atoms]
+        if b"moov" not in kinds or b"mdat" not in kinds:
+            raise ValueError(f"Not a complete MP4 file: {path}")
+
+        moov_index = kinds.index(b"moov")
+        first_mdat = kinds.index(b"mdat")
+        if moov_index < first_mdat:
+            if out_path != path:
+                shutil.copyfile(path, out_path)
+            return False
+
+        _, moov_pos, moov_header, moov_size = atoms[moov_index]
+        f.seek(moov_pos + moov_header)
+        moov = _parse(f.read(moov_size - moov_header))
+
+        # moov mới chèn trước mdat đầu tiên → mọi dữ liệu media dời đi đúng
+        # kích thước moov mới (kích thước có thể tăng nếu stco đổi sang co64)
+        size = moov_size
+        while True:
+            candidate = copy.deepcopy(moov)
+            _shift_offsets(candidate, size)
+            body = _build(candidate)
+            if len(body) + 8 == size:
+                break
+            size = len(body) + 8
+        moov_bytes = struct.pack(">I4s", size, b"moov") + body
+
+        tmp = f"{out_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as out:
+                order = atoms[:first_mdat] + [None] + [
+                    a for i, a in enumerate(atoms[first_mdat:], first_mdat) if i != moov_index
+                ]
+                for atom in order:
+                    if atom is None:
+                        out.write(moov_bytes)
+                        continue
+                    _, pos, _, atom_size = atom
+                    f.seek(pos)
+                    remaining = atom_size
+                    while remaining:
+                        chunk = f.read(min(remaining, 1 << 20))
+                        if not chunk:
+                            raise ValueError(f"Unexpected end of file: {path}")
+                        out.write(chunk)
+                        remaining -= len(chunk)
+            # mtime mới: cache trình duyệt / index không lẫn bản cũ với bản mới
+            shutil.copymode(path, tmp)
+            os.replace(tmp, out_path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    return True
+
+
+def make_hls(path, out_dir, segment_seconds=4):
+    """
+    Cắt video thành segment HLS ngắn + playlist (không encode lại) bằng ffmpeg.
+    Trả về đường dẫn index.m3u8, hoặc None nếu không có ffmpeg.
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        return None
+
+    os.makedirs(out_dir, exist_ok=True)
+    playlist = os.path.join(out_dir, "index.m3u8")
+    subprocess.run(
+        [
+            ffmpeg, "-y", "-loglevel", "error", "-i", path,
+            "-c", "copy", "-f", "hls",
+            "-hls_time", str(segment_seconds),
+            "-hls_playlist_type", "vod",
+            "-hls_segment_filename", os.path.join(out_dir, "segment_%05d.ts"),
+            playlist
+        ],
+        check=True
+    )
+    return playlist
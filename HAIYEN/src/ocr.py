@@ -1,15 +1,47 @@
-from paddleocr import PaddleOCR
-import cv2
-
-class PlateOCR:
-    def __init__(self):
-        self.ocr = PaddleOCR(lang='en', use_textline_orientation=True)
-
-    def read_plate(self, plate_img):
-        result = self.ocr.predict(plate_img)
-        texts = []
-
-        if result and "rec_texts" in result[0]:
-            texts = result[0]["rec_texts"]
-
-        return " ".join(texts)
+import numpy as np
+
+
+class PlateOCR:
+    def __init__(self, batch_size=8):
+        """
+        batch_size: số ảnh biển số mỗi lần gọi predict (và batch của recognizer).
+        Crop được đưa nguyên trạng vào pipeline det + rec: biển 2 dòng cần
+        detector tách dòng, pad / resize về cùng kích thước chỉ làm detector
+        thấy thêm "ký tự" ở phần viền copy.
+        """
+        self.batch_size = batch_size
+
+        # Import nặng (paddle) chỉ khi thật sự tạo OCR
+        from paddleocr import PaddleOCR
+        self.ocr = PaddleOCR(
+            lang='en',
+            use_textline_orientation=True,
+            text_recognition_batch_size=batch_size
+        )
+
+    def read_plates(self, plate_imgs):
+        """
+        OCR nhiều ảnh biển số, mỗi lần predict tối đa batch_size ảnh.
+        Trả về list (text, confidence) đúng thứ tự đầu vào.
+        """
+        results = [("", 0.0)] * len(plate_imgs)
+        valid = [i for i, img in enumerate(plate_imgs) if img is not None and img.size > 0]
+
+        for start in range(0, len(valid), self.batch_size):
+            idxs = valid[start:start + self.batch_size]
+            batch = [plate_imgs[i] for i in idxs]
+
+            for i, res in zip(idxs, self.ocr.predict(batch)):
+                texts = res.get("rec_texts", []) if res else []
+                scores = res.get("rec_scores", []) if res else []
+                conf = float(np.mean(scores)) if len(scores) else 0.0
+                results[i] = (" ".join(texts), conf)
+
+        return results
+
+    def warm_up(self):
+        """1 lần OCR trên ảnh trắng để load weight recognizer trước frame đầu."""
+        self.read_plates([np.full((48, 160, 3), 255, dtype=np.uint8)])
+
+    def read_plate(self, plate_img):
+        return self.read_plates([plate_img])[0][0]
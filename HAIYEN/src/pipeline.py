@@ -0,0 +1,158 @@
+import queue
+import threading
+
+from .metrics import metrics
+
+
+_END = object()
+
+
+def put_latest(q, item):
+    """
+    Put không chờ: queue đầy → lấy bỏ item cũ nhất rồi put lại.
+    Trả về list item bị bỏ (thường rỗng hoặc 1 item).
+    """
+    dropped = []
+    while True:
+        try:
+            q.put_nowait(item)
+            return dropped
+        except queue.Full:
+            try:
+                dropped.append(q.get_nowait())
+            except queue.Empty:
+                pass
+
+
+class FramePipeline:
+    """
+    Pipeline nhiều stage chạy trên các thread riêng, nối bằng queue có giới hạn:
+
+        decode → stage 1 → stage 2 → ... → results() (thread gọi)
+
+    Mỗi stage là 1 thread FIFO nên thứ tự frame được giữ nguyên.
+    Throughput ≈ tốc độ stage chậm nhất thay vì tổng các stage.
+    """
+
+    def __init__(self, read_frame, stages, queue_size=8, drop_frames=False, labels=None):
+        """
+        read_frame: hàm trả về frame tiếp theo hoặc None khi hết
+        stages: list (name, fn), fn(item) -> item
+        drop_frames: nguồn live → queue decode đầy thì bỏ frame cũ nhất thay vì
+            chặn decode (đếm ở haiyen_frames_dropped_total)
+        labels: label gắn thêm cho metric (vd. camera)
+        """
+        self.read_frame = read_frame
+        self.drop_frames = drop_frames
+        self.labels = labels or {}
+        self.dropped = 0
+        self.stage_names = ["decode"] + [name for name, _ in stages]
+        self.stages = stages
+
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in self.stage_names]
+        self.stop_event = threading.Event()
+        self.cancelled = False      # close(): bỏ qua mọi item còn lại
+        self.threads = []
+        self.error = None
+
+    # ===============================
+    # THREADS
+    # ===============================
+    def _decode_loop(self):
+        out_q = self.queues[0]
+        idx = 0
+        try:
+            while not self.stop_event.is_set():
+                frame = self.read_frame()
+                if frame is None:
+                    break
+                item = {"idx": idx, "frame": frame}
+                if self.drop_frames:
+                    dropped = len(put_latest(out_q, item))
+                    if dropped:
+                        self.dropped += dropped
+                        metrics.inc("haiyen_frames_dropped_total", dropped, queue="decode", **self.labels)
+                else:
+                    out_q.put(item)
+                idx += 1
+        except Exception as e:
+            self.error = e
+        finally:
+            out_q.put(_END)
+
+    def _stage_loop(self, fn, in_q, out_q):
+        while True:
+            item = in_q.get()
+            if item is _END:
+                out_q.put(_END)
+                return
+
+            # Lỗi ở stage trước / bị huỷ → chỉ xả queue, không xử lý tiếp
+            if self.error is not None or self.cancelled:
+                continue
+
+            try:
+                out_q.put(fn(item))
+            except Exception as e:
+                self.error = e
+                self.stop_event.set()
+
+    def start(self):
+        t = threading.Thread(target=self._decode_loop, name="decode", daemon=True)
+        self.threads.append(t)
+
+        for i, (name, fn) in enumerate(self.stages):
+            t = threading.Thread(
+                target=self._stage_loop,
+                args=(fn, self.queues[i], self.queues[i + 1]),
+                name=name,
+                daemon=True
+            )
+            self.threads.append(t)
+
+        for t in self.threads:
+            t.start()
+        return self
+
+    # ===============================
+    # CONSUMER
+    # ===============================
+    def results(self):
+        """Generator trả item đã qua hết các stage, đúng thứ tự frame."""
+        out_q = self.queues[-1]
+        while True:
+            item = out_q.get()
+            if item is _END:
+                break
+            if self.error is None:
+                yield item
+
+        for t in self.threads:
+            t.join()
+
+        if self.error is not None:
+            raise self.error
+
+    def stop(self):
+        """Dừng decode; các frame đang trong pipeline vẫn được xả hết."""
+        self.stop_event.set()
+
+    def close(self):
+        """
+        Dừng hẳn và chờ mọi thread kết thúc (vd. consumer lỗi giữa chừng):
+        decode ngừng đọc, các stage bỏ qua item còn lại, queue cuối được xả
+        để không thread nào kẹt ở put(). Sau close() có thể release capture.
+        """
+        self.cancelled = True
+        self.stop_event.set()
+        out_q = self.queues[-1]
+        while any(t.is_alive() for t in self.threads):
+            try:
+                out_q.get(timeout=0.05)
+            except queue.Empty:
+                pass
+        for t in self.threads:
+            t.join()
+
+    def queue_depths(self):
+        return {name: q.qsize() for name, q in zip(self.stage_names, self.queues)}
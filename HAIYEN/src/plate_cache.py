@@ -0,0 +1,125 @@
+from collections import defaultdict
+
+
+def vote_plate(readings):
+    """
+    readings: list (text, confidence)
+    Bỏ phiếu theo từng ký tự, trọng số = confidence:
+      1. chọn độ dài (bỏ khoảng trắng) có tổng trọng số lớn nhất
+      2. mỗi vị trí chọn ký tự có tổng trọng số lớn nhất
+    Trả về (text, confidence) với confidence = độ đồng thuận trung bình
+    mỗi vị trí × confidence trung bình của nhóm.
+    """
+    groups = defaultdict(list)
+    for text, conf in readings:
+        key = text.replace(" ", "").upper()
+        if key:
+            groups[len(key)].append((key, max(conf, 1e-3)))
+
+    if not groups:
+        return "", 0.0
+
+    group = max(groups.values(), key=lambda g: sum(c for _, c in g))
+    total = sum(c for _, c in group)
+
+    chars, agreement = [], []
+    for pos in range(len(group[0][0])):
+        weights = defaultdict(float)
+        for key, conf in group:
+            weights[key[pos]] += conf
+        ch, w = max(weights.items(), key=lambda kv: kv[1])
+        chars.append(ch)
+        agreement.append(w / total)
+
+    mean_conf = total / len(group)
+    return "".join(chars), sum(agreement) / len(agreement) * mean_conf
+
+
+class PlateCache:
+    """
+    Cache biển số theo track: gom kết quả OCR qua vài frame, bỏ phiếu từng
+    ký tự. Khi đồng thuận đủ tin cậy thì ngừng gọi OCR cho track đó.
+    """
+
+    def __init__(self, min_readings=3, max_readings=8, min_confidence=0.8, sample_every=5, ttl=150):
+        """
+        min_readings: số kết quả OCR tối thiểu trước khi tin đồng thuận
+        max_readings: số lần gọi OCR tối đa cho 1 track
+        min_confidence: ngưỡng đồng thuận để dừng OCR
+        sample_every: khoảng cách (frame) giữa 2 lần OCR cùng 1 track
+        ttl: số frame không thấy track thì xoá entry
+        """
+        self.min_readings = min_readings
+        self.max_readings = max_readings
+        self.min_confidence = min_confidence
+        self.sample_every = sample_every
+        self.ttl = ttl
+
+        self.entries = {}   # track_id -> {"readings", "last_sample", "last_seen", "result", "done"}
+
+        self.ocr_calls = 0
+        self.skipped = 0
+
+    def _entry(self, track_id):
+        entry = self.entries.get(track_id)
+        if entry is None:
+            entry = self.entries[track_id] = {
+                "readings": [],
+                "attempts": 0,
+                "last_sample": None,
+                "last_seen": None,
+                "result": ("", 0.0),
+                "done": False
+            }
+        return entry
+
+    def needs_reading(self, track_id, frame_idx):
+        entry = self._entry(track_id)
+        entry["last_seen"] = frame_idx
+
+        if entry["done"]:
+            self.skipped += 1
+            return False
+        if entry["last_sample"] is not None and frame_idx - entry["last_sample"] < self.sample_every:
+            return False
+        # Giữ chỗ luôn, tránh OCR 2 lần khi nhiều frame cùng camera chung 1 batch
+        entry["last_sample"] = frame_idx
+        return True
+
+    def add(self, track_id, text, confidence, frame_idx):
+        entry = self._entry(track_id)
+        entry["last_sample"] = frame_idx
+        entry["attempts"] += 1
+        self.ocr_calls += 1
+
+        if text:
+            entry["readings"].append((text, confidence))
+            entry["result"] = vote_plate(entry["readings"])
+
+        n = len(entry["readings"])
+        conf = entry["result"][1]
+        if (n >= self.min_readings and conf >= self.min_confidence) or entry["attempts"] >= self.max_readings:
+            entry["done"] = True
+
+    def consensus(self, track_id):
+        entry = self.entries.get(track_id)
+        return entry["result"] if entry is not None else ("", 0.0)
+
+    def evict(self, track_id):
+        self.entries.pop(track_id, None)
+
+    def clear(self, keep=()):
+        """Xoá entry mọi track trừ keep (tracker bắt đầu lại, track cũ không còn)."""
+        self.entries = {tid: e for tid, e in self.entries.items() if tid in keep}
+
+    def prune(self, frame_idx):
+        """Xoá entry của track đã kết thúc (không thấy quá ttl frame)."""
+        for tid in [t for t, e in self.entries.items() if frame_idx - e["last_seen"] > self.ttl]:
+            del self.entries[tid]
+
+    def stats(self):
+        return {
+            "tracks": len(self.entries),
+            "ocr_calls": self.ocr_calls,
+            "skipped": self.skipped
+        }
@@ -0,0 +1,426 @@
+import os
+import time
+import queue
+import threading
+
+import cv2
+
+from .config import Config
+from .logic import ViolationLogic, ViolationEvents
+from .tracking import StreamTracker
+from .motion import MotionGate
+from .clips import ClipBuffer
+from .live import LivePublisher
+from .metrics import metrics, FpsMeter
+from .utils import is_live_source
+
+
+_END = object()
+
+
+class StreamState:
+    """Trạng thái riêng của 1 camera: tracker, logic, geometry, evidence."""
+
+    def __init__(self, name, source, system, evidence_dir, write_video):
+        self.name = name
+        self.source = source
+        self.cap = cv2.VideoCapture(source)
+        self.opened = self.cap.isOpened()
+        # Camera / stream live: scheduler chậm thì bỏ frame thay vì để reader chờ
+        # (buffer của driver đầy → trễ ngày càng tăng)
+        self.drop_frames = Config.DROP_LIVE_FRAMES and is_live_source(source)
+
+        self.fps = int(self.cap.get(cv2.CAP_PROP_FPS)) or 25
+        self.tracker = StreamTracker(frame_rate=self.fps)
+        self.logic = ViolationLogic(fps=self.fps, debug=system.debug, max_lost=Config.MAX_AGE)
+        self.events = ViolationEvents(close_after=int(Config.EVENT_CLOSE_SECONDS * self.fps))
+        self.plates = system.create_plate_cache()
+        self.violations = 0
+        self.geometry = system.create_geometry(name) if system.box_mode == "calibrate" else None
+        self.roi = None
+
+        self.motion_gate = None
+        if system.use_motion_gate:
+            self.motion_gate = MotionGate(
+                pixel_threshold=Config.MOTION_PIXEL_THRESHOLD,
+                min_ratio=Config.MOTION_MIN_RATIO,
+                max_skip=int(Config.MOTION_MAX_SKIP_SECONDS * self.fps)
+            )
+        self.last_boxes = []
+        self.last_tracks = []
+
+        self.image_dir = os.path.join(evidence_dir, "images", name)
+        self.log_dir = os.path.join(evidence_dir, "logs", name)
+        os.makedirs(self.image_dir, exist_ok=True)
+        os.makedirs(self.log_dir, exist_ok=True)
+
+        self.writer = None
+        self.record_source = {"camera": name, "video": None}
+        if write_video and self.opened:
+            self.record_source["video"] = f"{name}_output.mp4"
+            os.makedirs(os.path.join(evidence_dir, "video"), exist_ok=True)
+            w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            h = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            self.writer = cv2.VideoWriter(
+                os.path.join(evidence_dir, "video", self.record_source["video"]),
+                cv2.VideoWriter_fourcc(*"mp4v"),
+                self.fps,
+                (w, h)
+            )
+
+        self.clip_dir = os.path.join(evidence_dir, "clips", name)
+        self.clip_buffer = None
+        if Config.CLIPS_ENABLED and self.opened:
+            self.clip_buffer = ClipBuffer(
+                self.fps,
+                pre_seconds=Config.CLIP_PRE_SECONDS,
+                post_seconds=Config.CLIP_POST_SECONDS,
+                max_bytes=Config.CLIP_BUFFER_MB * 1024 * 1024,
+                quality=Config.CLIP_JPEG_QUALITY
+            )
+
+        self.live = None
+        if Config.LIVE_ENABLED and self.opened:
+            self.live = LivePublisher(
+                system.evidence_path(Config.LIVE_DIR), name,
+                fps=Config.LIVE_FPS,
+                width=Config.LIVE_WIDTH,
+                quality=Config.LIVE_JPEG_QUALITY
+            )
+
+        self.frames = 0
+        self.dropped = 0        # frame bị bỏ khi frame queue đầy (nguồn live)
+        self.fps_meter = FpsMeter(camera=name)
+
+    def check_motion(self, frame):
+        if self.motion_gate is None:
+            return True
+
+        gate_roi = None
+        if self.geometry is not None:
+            gate_roi = self.geometry.roi(frame.shape, Config.MOTION_ROI_MARGIN)
+        return self.motion_gate.check(frame, gate_roi)
+
+    def update_roi(self, frame, margin):
+        """Trả về (roi, event bị đóng do đổi ROI), xem ViolationSystem.update_roi."""
+        if margin is None or self.geometry is None:
+            return None, []
+
+        roi = self.geometry.roi(frame.shape, margin)
+        closed = []
+        if roi != self.roi:
+            self.tracker.reset()
+            self.logic.reset()
+            closed = self.events.flush()
+            self.plates.clear(keep={ev.track_id for ev in closed})
+            self.roi = roi
+        return roi, closed
+
+    def release(self):
+        self.cap.release()
+        if self.writer is not None:
+            self.writer.release()
+        if self.clip_buffer is not None:
+            self.clip_buffer.close()
+        if self.live is not None:
+            self.live.close()
+
+
+class MultiStreamScheduler:
+    """
+    Xử lý N camera cùng lúc trong 1 process.
+
+    Mỗi camera có 1 thread đọc frame vào queue chung. Scheduler gom frame
+    của nhiều camera thành batch (tối đa batch_size frame, hoặc chờ tối đa
+    max_wait giây kể từ frame đầu tiên) rồi gọi mỗi model đúng 1 lần / batch:
+    box (chỉ frame cần detect lại), vehicle, plate. Tracker, ViolationLogic và
+    geometry tách riêng cho từng camera.
+    """
+
+    def __init__(
+        self,
+        system,
+        sources,
+        batch_size=Config.STREAM_BATCH_SIZE,
+        max_wait=Config.STREAM_MAX_WAIT,
+        evidence_dir=None,
+        write_video=False
+    ):
+        """
+        system: ViolationSystem (dùng chung model, OCR, annotate)
+        sources: dict name -> nguồn cv2.VideoCapture (file, rtsp://..., index)
+        evidence_dir: None → evidence_dir của system
+        """
+        self.system = system
+        evidence_dir = system.set_evidence_dir(evidence_dir)
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+
+        self.streams = [
+            StreamState(name, src, system, evidence_dir, write_video)
+            for name, src in sources.items()
+        ]
+        for s in self.streams:
+            if not s.opened:
+                print(f"[ERROR] Cannot open stream {s.name}: {s.source}")
+                s.release()
+        self.streams = [s for s in self.streams if s.opened]
+
+        self.frame_queue = queue.Queue(maxsize=max(2, batch_size * 2))
+        self.stop_event = threading.Event()
+        self.readers = []
+        self.batches = 0
+        self.first_batch_seconds = None
+
+        metrics.add_collector("streams", self.collect_metrics)
+
+    def collect_metrics(self):
+        out = [("haiyen_queue_depth", {"queue": "frames"}, self.frame_queue.qsize())]
+        for s in self.streams:
+            plates = s.plates.stats()
+            out += [
+                ("haiyen_cache_hits", {"cache": "plate", "camera": s.name}, plates["skipped"]),
+                ("haiyen_cache_misses", {"cache": "plate", "camera": s.name}, plates["ocr_calls"])
+            ]
+            if s.motion_gate is not None:
+                gate = s.motion_gate.stats()
+                out.append(("haiyen_motion_skipped_frames", {"camera": s.name},
+                            gate["frames"] - gate["opened"]))
+        return out
+
+    # ===============================
+    # READERS
+    # ===============================
+    def _read_loop(self, stream):
+        try:
+            while not self.stop_event.is_set():
+                ret, frame = stream.cap.read()
+                if not ret:
+                    break
+                item = (stream, stream.frames, frame)
+                if not stream.drop_frames:
+                    self.frame_queue.put(item)
+                else:
+                    # Queue dùng chung cho mọi camera: không bỏ frame cũ của camera
+                    # khác (có thể là file), chỉ bỏ frame mới của chính camera này
+                    try:
+                        self.frame_queue.put_nowait(item)
+                    except queue.Full:
+                        stream.dropped += 1
+                        metrics.inc("haiyen_frames_dropped_total", queue="frames", camera=stream.name)
+                stream.frames += 1
+        finally:
+            self.frame_queue.put(_END)
+
+    def _next_batch(self, active):
+        """Gom batch; trả về (batch, số reader vừa kết thúc)."""
+        batch, ended = [], 0
+
+        item = self.frame_queue.get()
+        deadline = time.time() + self.max_wait
+
+        while True:
+            if item is _END:
+                ended += 1
+                if ended >= active:
+                    break
+            else:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+
+            remaining = deadline - time.time()
+            if remaining <= 0 and batch:
+                break
+            try:
+                item = self.frame_queue.get(timeout=max(remaining, 0.001))
+            except queue.Empty:
+                if batch:
+                    break
+                item = self.frame_queue.get()
+                deadline = time.time() + self.max_wait
+
+        return batch, ended
+
+    # ===============================
+    # BATCH INFERENCE
+    # ===============================
+    def process_batch(self, batch):
+        system = self.system
+        frames = [frame for _, _, frame in batch]
+
+        gates = [stream.check_motion(frame) for stream, _, frame in batch]
+
+        # === BOX: chỉ những frame có chuyển động và cần detect lại ===
+        yellow = [None] * len(batch)
+        need = []
+        for i, (stream, idx, frame) in enumerate(batch):
+            if not gates[i]:
+                continue
+            if stream.geometry is None or stream.geometry.needs_detection(frame, idx, stream.fps):
+                need.append(i)
+            else:
+                yellow[i] = stream.geometry.boxes
+
+        with metrics.timer("haiyen_stage_seconds", stage="box"):
+            detected = system.box_detector.detect_batch([frames[i] for i in need])
+        for i, boxes in zip(need, detected):
+            stream, idx, frame = batch[i]
+            if stream.geometry is not None:
+                boxes = stream.geometry.update(frame, idx, boxes)
+            yellow[i] = boxes
+
+        # === VEHICLE: 1 forward cho các frame có chuyển động, track riêng từng camera ===
+        closed = []     # (stream, event) đã đóng: do đổi ROI hoặc hết vi phạm
+        rois = [None] * len(batch)
+        inputs = []
+        for i, (stream, idx, frame) in enumerate(batch):
+            if not gates[i]:
+                continue
+            roi, reset_events = stream.update_roi(frame, system.roi_margin)
+            closed += [(stream, ev) for ev in reset_events]
+            rois[i] = roi
+            if roi is None:
+                inputs.append(frame)
+            else:
+                rx1, ry1, rx2, ry2 = roi
+                inputs.append(frame[ry1:ry2, rx1:rx2])
+
+        with metrics.timer("haiyen_stage_seconds", stage="vehicle_batch"):
+            results = iter(system.tracker.predict_batch(inputs))
+
+        # Duyệt đúng thứ tự frame: frame không có chuyển động dùng lại
+        # kết quả frame trước của cùng camera (có thể nằm ngay trong batch này)
+        analyses = []
+        for i, (stream, idx, frame) in enumerate(batch):
+            if gates[i]:
+                offset = rois[i][:2] if rois[i] is not None else (0, 0)
+                with metrics.timer("haiyen_stage_seconds", stage="tracking"):
+                    tracks = stream.tracker.update(next(results), frame, offset)
+            else:
+                tracks = [{"track_id": t["track_id"], "bbox": t["bbox"]} for t in stream.last_tracks]
+
+            boxes = yellow[i] if yellow[i] is not None else stream.last_boxes
+            stream.last_boxes = boxes
+            stream.last_tracks = tracks
+
+            with metrics.timer("haiyen_stage_seconds", stage="logic"):
+                violating = stream.logic.update(
+                    [t["track_id"] for t in tracks],
+                    [t["bbox"] for t in tracks],
+                    boxes
+                )
+            for t in tracks:
+                t["violated"] = t["track_id"] in violating
+            for ev in stream.events.update(idx, frame, tracks, violating, boxes):
+                closed.append((stream, ev))
+
+            clips = []
+            if stream.clip_buffer is not None:
+                for ev in stream.events.opened:
+                    name = f"clip_{idx:07d}_{ev.track_id}.mp4"
+                    ev.clip = f"{stream.name}/{name}"
+                    clips.append(os.path.join(stream.clip_dir, name))
+
+            analyses.append({"yellow_boxes": boxes, "tracks": tracks, "roi": rois[i], "clips": clips})
+
+        # === PLATE + OCR: xe đang vi phạm của mọi camera chung 1 batch,
+        # mỗi camera có cache biển số riêng ===
+        with metrics.timer("haiyen_stage_seconds", stage="plates"):
+            system.read_plates(
+                [stream.plates for stream, _, _ in batch],
+                [(frame, idx, a["tracks"]) for (_, idx, frame), a in zip(batch, analyses)]
+            )
+        with metrics.timer("haiyen_stage_seconds", stage="events"):
+            self.save_events(closed)
+
+        for (stream, idx, frame), analysis in zip(batch, analyses):
+            with metrics.timer("haiyen_stage_seconds", stage="annotate"):
+                system.annotate(frame, analysis)
+            if stream.writer is not None:
+                with metrics.timer("haiyen_stage_seconds", stage="encode"):
+                    stream.writer.write(frame)
+            if stream.clip_buffer is not None:
+                stream.clip_buffer.add(idx, frame)
+                for path in analysis["clips"]:
+                    stream.clip_buffer.trigger(idx, path)
+            if stream.live is not None:
+                stream.live.publish(frame)
+            stream.fps_meter.tick()
+
+        metrics.inc("haiyen_batches_total")
+        metrics.inc("haiyen_batch_frames_total", len(batch))
+        self.batches += 1
+
+    def save_events(self, closed):
+        """closed: list (stream, event); OCR 1 batch rồi lưu evidence từng camera."""
+        self.system.finalize_events([ev for _, ev in closed], [stream.plates for stream, _ in closed])
+        for stream, ev in closed:
+            self.system.save_events([ev], stream.image_dir, stream.log_dir, stream.fps, stream.record_source)
+            stream.violations += 1
+
+    # ===============================
+    # MAIN LOOP
+    # ===============================
+    def run(self):
+        for stream in self.streams:
+            t = threading.Thread(target=self._read_loop, args=(stream,), daemon=True)
+            self.readers.append(t)
+            t.start()
+
+        print(f"[INFO] Scheduling {len(self.streams)} streams | "
+              f"batch {self.batch_size} | max wait {self.max_wait * 1000:.0f} ms")
+
+        active = len(self.streams)
+        started = time.time()
+        first_batch = None
+        try:
+            # Camera đã bắt đầu đọc frame trong lúc chờ model warm-up
+            self.system.wait_ready()
+            while active > 0:
+                batch, ended = self._next_batch(active)
+                active -= ended
+                if batch:
+                    self.process_batch(batch)
+                    if first_batch is None:
+                        first_batch = time.time() - started
+                        print(f"[INFO] First batch processed after {first_batch:.2f}s")
+        finally:
+            self.stop()
+
+        self.first_batch_seconds = first_batch
+
+        # Event còn mở khi hết stream
+        self.save_events([(s, ev) for s in self.streams for ev in s.events.flush()])
+        self.system.evidence.flush()
+
+        elapsed = time.time() - started
+        total = sum(s.frames for s in self.streams)
+        print(f"[DONE] {total} frames / {self.batches} batches in {elapsed:.1f}s")
+
+        return {
+            s.name: {
+                "frames": s.frames,
+                "dropped_frames": s.dropped,
+                "violations": s.violations,
+                "image_dir": s.image_dir,
+                "log_dir": s.log_dir,
+                "motion_gate": s.motion_gate.stats() if s.motion_gate is not None else None,
+                "plates": s.plates.stats()
+            }
+            for s in self.streams
+        }
+
+    def stop(self):
+        self.stop_event.set()
+        metrics.remove_collector("streams")
+
+        # Xả queue để reader không bị kẹt ở put()
+        while any(t.is_alive() for t in self.readers):
+            try:
+                self.frame_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+        for stream in self.streams:
+            stream.release()
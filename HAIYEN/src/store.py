@@ -0,0 +1,238 @@
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS violations (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    time        REAL NOT NULL,          -- epoch giây
+    plate       TEXT,
+    plate_key   TEXT,                   -- biển số viết hoa, bỏ khoảng trắng / gạch (lọc prefix)
+    type        TEXT,
+    camera      TEXT,
+    video       TEXT,
+    track_id    INTEGER,
+    image       TEXT,
+    clip        TEXT,
+    log         TEXT UNIQUE,            -- file JSON gốc (tránh import trùng)
+    data        TEXT                    -- toàn bộ bản ghi JSON
+);
+CREATE INDEX IF NOT EXISTS idx_violations_time   ON violations (time, id);
+CREATE INDEX IF NOT EXISTS idx_violations_plate  ON violations (plate_key, time, id);
+CREATE INDEX IF NOT EXISTS idx_violations_video  ON violations (video, time, id);
+CREATE INDEX IF NOT EXISTS idx_violations_camera ON violations (camera, time, id);
+"""
+
+COLUMNS = ("time", "plate", "plate_key", "type", "camera", "video", "track_id", "image", "clip", "log", "data")
+
+
+def plate_key(plate):
+    if not plate or plate == "N/A":
+        return None
+    return "".join(ch for ch in str(plate).upper() if ch.isalnum())
+
+
+def parse_time(value):
+    """epoch (số) hoặc chuỗi "%Y_%m_%d_%H_%M_%S" / ISO → epoch giây."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = str(value).strip()
+    # float() nhận cả "2024_01_01..." (dấu _ phân cách chữ số) nên thử format log trước
+    try:
+        return datetime.strptime(value, "%Y_%m_%d_%H_%M_%S").timestamp()
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+class ViolationStore:
+    """
+    Lưu vi phạm vào SQLite (WAL) có index theo time / plate / video / camera.
+    Pipeline ghi 1 dòng / evidence, backend truy vấn phân trang theo cursor
+    (keyset trên (time, id)) nên thời gian trả lời không tăng theo số vi phạm.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+
+    # ===============================
+    # WRITE
+    # ===============================
+    @staticmethod
+    def _row(record):
+        t = parse_time(record.get("timestamp", record.get("time")))
+        return (
+            t if t is not None else datetime.now().timestamp(),
+            record.get("plate"),
+            plate_key(record.get("plate")),
+            record.get("type"),
+            record.get("camera"),
+            record.get("video"),
+            record.get("track_id"),
+            record.get("image"),
+            record.get("clip"),
+            record.get("log"),
+            json.dumps(record, ensure_ascii=False)
+        )
+
+    def add_many(self, records):
+        """records: list dict log vi phạm (xem utils.save_evidence). Trả về số dòng thêm mới."""
+        rows = [self._row(r) for r in records]
+        with self.lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                f"INSERT OR IGNORE INTO violations ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                rows
+            )
+            return self.conn.total_changes - before
+
+    def add(self, record):
+        return self.add_many([record])
+
+    def import_logs(self, log_dir):
+        """Nạp các file JSON log cũ (dict hoặc list) chưa có trong store."""
+        if not os.path.isdir(log_dir):
+            return 0
+
+        with self.lock:
+            known = {row[0] for row in self.conn.execute("SELECT log FROM violations WHERE log IS NOT NULL")}
+
+        records = []
+        for root, _, files in os.walk(log_dir):
+            for file in files:
+                if not file.endswith(".json"):
+                    continue
+                name = os.path.relpath(os.path.join(root, file), log_dir).replace(os.sep, "/")
+                if name in known:
+                    continue
+                try:
+                    with open(os.path.join(root, file), "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    continue
+
+                items = data if isinstance(data, list) else [data]
+                for i, item in enumerate(items):
+                    if isinstance(item, dict):
+                        item = dict(item)
+                        item["log"] = f"{name}#{i}" if isinstance(data, list) else name
+                        if isinstance(data, list):
+                            # Log dạng list (cũ): 1 file / video cùng tên
+                            item.setdefault("video", os.path.splitext(file)[0] + ".mp4")
+                        records.append(item)
+
+        return self.add_many(records) if records else 0
+
+    # ===============================
+    # READ
+    # ===============================
+    @staticmethod
+    def _item(row):
+        item = json.loads(row["data"])
+        item["id"] = row["id"]
+        item["timestamp"] = row["time"]
+        return item
+
+    def query(self, start=None, end=None, plate=None, video=None, camera=None, cursor=None, limit=100):
+        """
+        Vi phạm mới nhất trước. cursor: chuỗi next_cursor của trang trước.
+        plate: lọc theo prefix biển số (không phân biệt hoa thường / khoảng trắng).
+        Trả về (items, next_cursor hoặc None).
+        """
+        where, args = [], []
+        if start is not None:
+            where.append("time >= ?")
+            args.append(parse_time(start))
+        if end is not None:
+            where.append("time < ?")
+            args.append(parse_time(end))
+        if plate:
+            key = plate_key(plate)
+            if not key:
+                raise ValueError(f"Invalid plate filter: {plate!r}")
+            # Range trên index thay cho LIKE 'prefix%'
+            where.append("plate_key >= ? AND plate_key < ?")
+            args += [key, key + "\uffff"]
+        if video:
+            where.append("video = ?")
+            args.append(video)
+        if camera:
+            where.append("camera = ?")
+            args.append(camera)
+        if cursor:
+            t, _, last_id = str(cursor).partition(":")
+            where.append("(time < ? OR (time = ? AND id < ?))")
+            args += [float(t), float(t), int(last_id)]
+
+        sql = "SELECT id, time, data FROM violations"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY time DESC, id DESC LIMIT ?"
+        args.append(limit + 1)
+
+        with self.lock:
+            rows = self.conn.execute(sql, args).fetchall()
+
+        items = [self._item(row) for row in rows[:limit]]
+
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = f"{last['time']!r}:{last['id']}"
+        return items, next_cursor
+
+    def since(self, last_id, limit=500):
+        """Vi phạm có id > last_id theo thứ tự ghi (cho live feed / resume)."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, time, data FROM violations WHERE id > ? ORDER BY id LIMIT ?",
+                (int(last_id), limit)
+            ).fetchall()
+
+        return [self._item(row) for row in rows]
+
+    def last_id(self):
+        with self.lock:
+            return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM violations").fetchone()[0]
+
+    def video_counts(self):
+        """Số vi phạm theo video (cột video có index)."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT video, COUNT(*) FROM violations WHERE video IS NOT NULL GROUP BY video"
+            ).fetchall()
+        return {video: count for video, count in rows}
+
+    def summary(self, since=None):
+        """Tổng số vi phạm, số từ since (epoch) và số biển số khác nhau."""
+        with self.lock:
+            total = self.conn.execute("SELECT COUNT(*) FROM violations").fetchone()[0]
+            recent = self.conn.execute(
+                "SELECT COUNT(*) FROM violations WHERE time >= ?", (since or 0,)
+            ).fetchone()[0]
+            plates = self.conn.execute(
+                "SELECT COUNT(DISTINCT plate_key) FROM violations WHERE plate_key IS NOT NULL"
+            ).fetchone()[0]
+        return {"total": total, "since": recent, "unique_plates": plates}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -1,27 +1,134 @@
-from ultralytics import YOLO
-
-class Tracker:
-    def __init__(self, model_path):
-        self.model = YOLO(model_path)
-
-    def track(self, frame):
-        results = self.model.track(
-            frame,
-            persist=True,
-            tracker="bytetrack.yaml",
-            conf=0.4,
-            verbose=False
-        )
-
-        tracks = []
-        for r in results:
-            if r.boxes.id is None:
-                continue
-
-            for box, tid in zip(r.boxes.xyxy, r.boxes.id):
-                x1, y1, x2, y2 = map(int, box)
-                tracks.append({
-                    "track_id": int(tid),
-                    "bbox": (x1, y1, x2, y2)
-                })
-        return tracks
+from .models import get_model, is_loaded
+
+
+def clear_tracker(tracker):
+    """
+    Như BYTETracker.reset() nhưng không gọi reset_id(): bộ đếm id của
+    ultralytics dùng chung cả process, đặt về 0 thì track mới nhận lại id cũ
+    (dính plate cache / event của xe trước) và trùng id giữa các camera.
+    """
+    tracker.tracked_stracks = []
+    tracker.lost_stracks = []
+    tracker.removed_stracks = []
+    tracker.frame_id = 0
+    tracker.kalman_filter = tracker.get_kalmanfilter()
+
+
+class StreamTracker:
+    """
+    ByteTrack riêng cho 1 stream, cập nhật từ detection đã chạy batch.
+    (model.track với list ảnh dùng chung 1 tracker cho cả batch nên không
+    dùng được khi gộp frame của nhiều camera.)
+    """
+
+    def __init__(self, frame_rate=30, tracker_cfg="bytetrack.yaml"):
+        from ultralytics.trackers.byte_tracker import BYTETracker
+        from ultralytics.utils import IterableSimpleNamespace, yaml_load
+        from ultralytics.utils.checks import check_yaml
+
+        cfg = IterableSimpleNamespace(**yaml_load(check_yaml(tracker_cfg)))
+        self.tracker = BYTETracker(args=cfg, frame_rate=frame_rate)
+
+    def reset(self):
+        # Nhiều camera chung 1 bộ đếm id: không bao giờ đặt lại id
+        clear_tracker(self.tracker)
+
+    def update(self, result, frame, offset=(0, 0)):
+        """
+        result: 1 phần tử ultralytics Results của frame này
+        offset: (x0, y0) nếu result được detect trên ảnh crop (ROI)
+        """
+        boxes = result.boxes.cpu().numpy()
+        ox, oy = offset
+        tracks = []
+
+        for row in self.tracker.update(boxes, frame):
+            x1, y1, x2, y2, tid = row[:5]
+            tracks.append({
+                "track_id": int(tid),
+                "bbox": (int(x1) + ox, int(y1) + oy, int(x2) + ox, int(y2) + oy)
+            })
+        return tracks
+
+
+class Tracker:
+    def __init__(self, model_path, frame_cache=None):
+        self.model_path = model_path
+        self.frame_cache = frame_cache
+
+    @property
+    def model(self):
+        # Load ở lần dùng đầu tiên (thường đã được warm-up trên background thread)
+        return get_model(self.model_path)
+
+    def reset(self, keep_ids=False):
+        """
+        Xoá trạng thái ByteTrack. keep_ids=False: đánh id lại từ đầu (chuyển sang
+        video khác); True: id tiếp tục tăng (đổi ROI giữa video).
+        """
+        if not is_loaded(self.model_path):
+            return
+        predictor = self.model.predictor
+        if predictor is not None and hasattr(predictor, "trackers"):
+            for tracker in predictor.trackers:
+                if keep_ids:
+                    clear_tracker(tracker)
+                else:
+                    tracker.reset()
+
+    def detect_vehicles(self, frame, roi=None):
+        """
+        1 forward pass (detect + ByteTrack) cho frame.
+        roi: (x1, y1, x2, y2) → chỉ chạy trên vùng crop, bbox trả về
+        vẫn theo toạ độ frame gốc.
+        Trả về tất cả detection, track_id = None nếu chưa được gán ID.
+        """
+        ox, oy = 0, 0
+        if roi is not None:
+            ox, oy, rx2, ry2 = roi
+            frame = frame[oy:ry2, ox:rx2]
+
+        results = self.model.track(
+            frame,
+            persist=True,
+            tracker="bytetrack.yaml",
+            conf=0.4,
+            verbose=False
+        )
+
+        vehicles = []
+        for r in results:
+            ids = r.boxes.id
+            for i, box in enumerate(r.boxes):
+                x1, y1, x2, y2 = map(int, box.xyxy[0])
+                vehicles.append({
+                    "track_id": int(ids[i]) if ids is not None else None,
+                    "bbox": (x1 + ox, y1 + oy, x2 + ox, y2 + oy),
+                    "class_id": int(box.cls[0]),
+                    "confidence": float(box.conf[0])
+                })
+        return vehicles
+
+    def predict_batch(self, frames):
+        """Detect (không track) nhiều frame trong 1 forward, dùng với StreamTracker."""
+        if not frames:
+            return []
+        return self.model(frames, conf=0.4, verbose=False)
+
+    def track(self, frame, roi=None):
+        if self.frame_cache is not None:
+            vehicles = self.frame_cache.get(
+                "vehicles", lambda: self.detect_vehicles(frame, roi)
+            )
+        else:
+            vehicles = self.detect_vehicles(frame, roi)
+
+        tracks = []
+        for v in vehicles:
+            if v["track_id"] is None:
+                continue
+            tracks.append({
+                "track_id": v["track_id"],
+                "bbox": v["bbox"]
+            })
+        return tracks
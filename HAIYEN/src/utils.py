@@ -1,30 +1,52 @@
-import os
-import cv2
-import json
-from datetime import datetime
-
-
-def save_evidence(frame, track_id, plate_text, image_dir, log_dir):
-    os.makedirs(image_dir, exist_ok=True)
-    os.makedirs(log_dir, exist_ok=True)
-
-    timestamp = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
-
-    # ===== 1️⃣ LƯU ẢNH =====
-    image_name = f"violation_{timestamp}.jpg"
-    image_path = os.path.join(image_dir, image_name)
-    cv2.imwrite(image_path, frame)
-
-    # ===== 2️⃣ GHI LOG JSON (CHUẨN DASHBOARD) =====
-    log_data = {
-        "time": timestamp,
-        "plate": plate_text if plate_text else "N/A",
-        "type": "Stop in Yellow Box",
-        "image": f"{os.path.basename(image_dir)}/{image_name}"
-    }
-
-    log_path = os.path.join(log_dir, f"violation_{timestamp}.json")
-    with open(log_path, "w", encoding="utf-8") as f:
-        json.dump(log_data, f, indent=2, ensure_ascii=False)
-
-    print(f"[SAVE] Evidence saved: {image_name}")
+import os
+import cv2
+import json
+from datetime import datetime
+
+
+def is_live_source(source):
+    """Camera (index) hoặc stream mạng: đọc chậm thì frame cũ mất giá trị."""
+    if isinstance(source, int):
+        return True
+    source = str(source)
+    return source.isdigit() or source.lower().startswith(
+        ("rtsp://", "rtmp://", "http://", "https://", "udp://", "tcp://")
+    )
+
+
+def save_evidence(frame, track_id, plate_text, image_dir, log_dir, extra=None, make_dirs=True):
+    if make_dirs:
+        os.makedirs(image_dir, exist_ok=True)
+        os.makedirs(log_dir, exist_ok=True)
+
+    now = datetime.now()
+    timestamp = now.strftime("%Y_%m_%d_%H_%M_%S")
+    # Thêm ms + track_id để nhiều vi phạm trong cùng 1 giây không ghi đè nhau
+    file_id = f"{timestamp}_{now.microsecond // 1000:03d}_{track_id}"
+
+    # ===== 1️⃣ LƯU ẢNH =====
+    image_name = f"violation_{file_id}.jpg"
+    image_path = os.path.join(image_dir, image_name)
+    cv2.imwrite(image_path, frame)
+
+    # ===== 2️⃣ GHI LOG JSON (CHUẨN DASHBOARD) =====
+    log_data = {
+        "time": timestamp,
+        "timestamp": now.timestamp(),
+        "plate": plate_text if plate_text else "N/A",
+        "type": "Stop in Yellow Box",
+        "image": f"{os.path.basename(image_dir)}/{image_name}"
+    }
+    if extra:
+        log_data.update(extra)
+
+    log_name = f"violation_{file_id}.json"
+    log_path = os.path.join(log_dir, log_name)
+    with open(log_path, "w", encoding="utf-8") as f:
+        json.dump(log_data, f, indent=2, ensure_ascii=False)
+
+    print(f"[SAVE] Evidence saved: {image_name}")
+
+    # Trả về bản ghi cho ViolationStore (log: đường dẫn tương đối trong evidence/logs)
+    log_data["log"] = f"{os.path.basename(log_dir)}/{log_name}"
+    return log_data
@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime
+
+
+class ModelWarmup:
+    """
+    Load + warm-up các model song song trên background thread ngay khi khởi
+    động, frame loop không phải chờ load model ở frame đầu / vi phạm đầu.
+
+    jobs: list (name, fn) — fn load model và chạy 1 lần inference giả
+    state: "idle" → "loading" → "ready" | "error"
+    status_path: ghi trạng thái ra file JSON (backend đọc cho /api/health)
+    """
+
+    def __init__(self, jobs, status_path=None):
+        self.jobs = list(jobs)
+        self.status_path = status_path
+
+        self.state = "idle"
+        self.timings = {}   # name -> giây load + warm-up
+        self.errors = {}    # name -> lỗi
+        self.started = None
+        self.finished = None
+
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.done = threading.Event()
+
+    def start(self):
+        """Chạy tất cả job song song; gọi nhiều lần chỉ chạy 1 lần."""
+        with self.lock:
+            if self.state != "idle":
+                return self
+            self.state = "loading"
+            self.started = time.time()
+
+        self._write_status()
+        print(f"[INFO] Warming up models: {', '.join(name for name, _ in self.jobs)}")
+
+        threads = [
+            threading.Thread(target=self._run, args=(name, fn), name=f"warmup-{name}", daemon=True)
+            for name, fn in self.jobs
+        ]
+        for t in threads:
+            t.start()
+
+        def finish():
+            for t in threads:
+                t.join()
+            with self.lock:
+                self.finished = time.time()
+                self.state = "error" if self.errors else "ready"
+            self._write_status()
+            print(f"[INFO] Models {self.state} in {self.finished - self.started:.1f}s")
+            self.done.set()
+
+        threading.Thread(target=finish, name="warmup", daemon=True).start()
+        return self
+
+    def _run(self, name, fn):
+        started = time.time()
+        try:
+            fn()
+            with self.lock:
+                self.timings[name] = round(time.time() - started, 2)
+        except Exception as e:
+            print(f"[ERROR] Warm-up {name} failed: {e}")
+            with self.lock:
+                self.errors[name] = str(e)
+        self._write_status()
+
+    def wait(self, timeout=None):
+        """Chờ warm-up xong, trả về True nếu tất cả model sẵn sàng."""
+        if self.state == "idle":
+            self.start()
+        self.done.wait(timeout)
+        return self.state == "ready"
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def status(self):
+        with self.lock:
+            end = self.finished or time.time()
+            return {
+                "state": self.state,
+                "ready": self.state == "ready",
+                "models": dict(self.timings),
+                "pending": [name for name, _ in self.jobs
+                            if name not in self.timings and name not in self.errors],
+                "errors": dict(self.errors),
+                "seconds": round(end - self.started, 2) if self.started else 0.0,
+                "updated": datetime.now().isoformat()
+            }
+
+    def _write_status(self):
+        if self.status_path is None:
+            return
+        try:
+            with self.write_lock:
+                os.makedirs(os.path.dirname(self.status_path) or ".", exist_ok=True)
+                tmp = f"{self.status_path}.{os.getpid()}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(self.status(), f, indent=2)
+                os.replace(tmp, self.status_path)
+        except OSError as e:
+            print(f"[WARN] Cannot write readiness file: {e}")
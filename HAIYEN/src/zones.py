@@ -0,0 +1,68 @@
+import cv2
+import numpy as np
+
+
+def to_polygon(zone):
+    """Zone dạng rect (x1, y1, x2, y2) hoặc polygon [[x, y], ...] → mảng N x 2."""
+    arr = np.asarray(zone, dtype=np.float64)
+    if arr.ndim == 1 and arr.size == 4:
+        x1, y1, x2, y2 = arr
+        return np.array([[x1, y1], [x2, y1], [x2, y2], [x1, y2]])
+    return arr.reshape(-1, 2)
+
+
+class ZoneIndex:
+    """
+    Raster hoá tất cả zone (yellow box / polygon) của 1 camera thành label map
+    số nguyên: 0 = ngoài zone, k = zone thứ k (1-based). Tra zone cho bất kỳ
+    số điểm nào chỉ là 1 phép gather trên mảng → chi phí không tăng theo số zone.
+    Label map chỉ build lại khi geometry thay đổi.
+    """
+
+    def __init__(self, scale=1.0):
+        """scale: tỉ lệ thu nhỏ label map so với toạ độ frame (vd 0.5)"""
+        self.scale = scale
+        self.key = None
+        self.label_map = np.zeros((1, 1), dtype=np.uint8)
+        self.builds = 0
+
+    def set_zones(self, zones):
+        """Build label map nếu danh sách zone khác lần trước."""
+        key = tuple(tuple(np.asarray(z).reshape(-1).tolist()) for z in zones)
+        if key == self.key:
+            return False
+
+        self.key = key
+        polygons = [to_polygon(z) * self.scale for z in zones]
+
+        if not polygons:
+            self.label_map = np.zeros((1, 1), dtype=np.uint8)
+        else:
+            max_x = int(np.ceil(max(p[:, 0].max() for p in polygons))) + 1
+            max_y = int(np.ceil(max(p[:, 1].max() for p in polygons))) + 1
+            dtype = np.uint8 if len(polygons) < 255 else np.uint16
+            self.label_map = np.zeros((max(max_y, 1), max(max_x, 1)), dtype=dtype)
+
+            for label, poly in enumerate(polygons, start=1):
+                cv2.fillPoly(self.label_map, [np.round(poly).astype(np.int32)], int(label))
+
+        self.builds += 1
+        return True
+
+    def lookup(self, points):
+        """
+        points: N x 2 (x, y) theo toạ độ frame
+        Trả về mảng N zone id (0 = không thuộc zone nào).
+        """
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if pts.size == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        h, w = self.label_map.shape
+        xs = np.floor(pts[:, 0] * self.scale).astype(np.int64)
+        ys = np.floor(pts[:, 1] * self.scale).astype(np.int64)
+
+        valid = (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h)
+        zone_ids = np.zeros(len(pts), dtype=np.int64)
+        zone_ids[valid] = self.label_map[ys[valid], xs[valid]]
+        return zone_ids
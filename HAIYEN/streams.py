@@ -0,0 +1,58 @@
+"""
+Xử lý nhiều camera trong 1 process, gộp frame thành batch cho mỗi model.
+
+    python streams.py cam1=rtsp://10.0.0.11/stream cam2=rtsp://10.0.0.12/stream
+    python streams.py a=assets/video/1.mp4 b=assets/video/2.mp4 --batch 4 --wait 30 --video
+"""
+import sys
+import argparse
+
+from src.config import Config
+from src.detect_violation import ViolationSystem
+from src.models import set_backend
+from src.scheduler import MultiStreamScheduler
+
+
+def parse_source(value):
+    name, _, src = value.partition("=")
+    if not src:
+        raise argparse.ArgumentTypeError(f"Expected name=source, got: {value}")
+    return name, int(src) if src.isdigit() else src
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-camera violation detection")
+    parser.add_argument("sources", nargs="+", type=parse_source, help="name=source")
+    parser.add_argument("--batch", type=int, default=Config.STREAM_BATCH_SIZE)
+    parser.add_argument("--wait", type=float, default=Config.STREAM_MAX_WAIT * 1000,
+                        help="Thời gian chờ tối đa để gom batch (ms)")
+    parser.add_argument("--evidence", default="evidence")
+    parser.add_argument("--roi", type=int, default=Config.ROI_MARGIN, metavar="MARGIN",
+                        help="Chỉ detect/track quanh yellow box (+ MARGIN pixel)")
+    parser.add_argument("--motion", action="store_true",
+                        help="Bỏ qua inference khi junction không có chuyển động")
+    parser.add_argument("--video", action="store_true", help="Ghi video annotate cho từng camera")
+    parser.add_argument("--backend", default=Config.INFERENCE_BACKEND,
+                        choices=["torch", "onnx", "openvino"])
+    parser.add_argument("--int8", action="store_true", help="Dùng model INT8 (xem export.py)")
+    args = parser.parse_args(argv)
+
+    set_backend(args.backend, int8=args.int8)
+    system = ViolationSystem(roi_margin=args.roi, motion_gate=args.motion, evidence_dir=args.evidence)
+    scheduler = MultiStreamScheduler(
+        system,
+        dict(args.sources),
+        batch_size=args.batch,
+        max_wait=args.wait / 1000,
+        evidence_dir=args.evidence,
+        write_video=args.video
+    )
+    try:
+        scheduler.run()
+    finally:
+        system.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
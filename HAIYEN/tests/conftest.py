@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src import models  # noqa: E402
+from src.config import Config  # noqa: E402
+
+
+class StubModel:
+    """Thay YOLO: nhận ảnh, không trả detection."""
+
+    predictor = None
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, img, **kwargs):
+        self.calls += 1
+        return []
+
+
+@pytest.fixture
+def stub_models(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "WARMUP_OCR", False)
+    monkeypatch.setattr(Config, "METRICS_ENABLED", False)
+
+    stubs = {}
+    models.clear_models()
+    for path in ("models/yolov8n.pt", "models/box.pt", "models/plate.pt"):
+        stubs[path] = models._models[os.path.abspath(path)] = StubModel()
+    yield stubs
+    models.clear_models()
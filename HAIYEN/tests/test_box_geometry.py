@@ -0,0 +1,93 @@
+import numpy as np
+
+from src.box_geometry import BoxGeometry
+
+
+class StubDetector:
+    def __init__(self, boxes):
+        self.boxes = boxes
+        self.calls = 0
+
+    def detect(self, frame):
+        self.calls += 1
+        return list(self.boxes)
+
+
+def frame():
+    return np.zeros((120, 160, 3), dtype=np.uint8)
+
+
+def test_cached_geometry_is_revalidated_on_first_frame(tmp_path):
+    cache = str(tmp_path / "cam1.json")
+    BoxGeometry(StubDetector([]), calib_frames=1, cache_path=cache).get_boxes(frame(), 0, 25)
+
+    # Lần chạy sau camera đã bị xoay: box detect khác hẳn box trong cache
+    moved = StubDetector([(10, 10, 50, 50)])
+    geometry = BoxGeometry(moved, calib_frames=2, cache_path=cache, mismatch_limit=1)
+    assert geometry.boxes == []
+    assert geometry.needs_detection(frame(), 0, 25)
+
+    # Lệch → calibrate lại, geometry cũ giữ nguyên tới khi fuse xong
+    assert geometry.get_boxes(frame(), 0, 25) == []
+    assert moved.calls == 1 and geometry.recalibrating
+
+    assert geometry.get_boxes(frame(), 1, 25) == [(10, 10, 50, 50)]
+    assert not geometry.recalibrating
+
+
+def test_single_mismatch_keeps_geometry():
+    boxes = [(10, 10, 50, 50)]
+    detector = StubDetector(boxes)
+    geometry = BoxGeometry(detector, calib_frames=1, mismatch_limit=3)
+    geometry.get_boxes(frame(), 0, 25)
+
+    # Xe đứng che box: 2 lần detect sai rồi lại đúng → không calibrate lại
+    detector.boxes = [(10, 10, 30, 20)]
+    geometry.last_check = -10_000
+    assert geometry.get_boxes(frame(), 25, 25) == boxes
+    assert geometry.mismatches == 1
+    assert geometry.needs_detection(frame(), 50, 25)    # kiểm tra lại ở tick kế
+    assert geometry.get_boxes(frame(), 50, 25) == boxes
+
+    detector.boxes = boxes
+    assert geometry.get_boxes(frame(), 75, 25) == boxes
+    assert geometry.mismatches == 0 and not geometry.recalibrating
+    assert not geometry.needs_detection(frame(), 100, 25)
+
+    # Sai đủ mismatch_limit lần liên tiếp mới calibrate lại
+    detector.boxes = [(60, 60, 90, 90)]
+    geometry.last_check = -10_000
+    for idx in (125, 150):
+        assert geometry.get_boxes(frame(), idx, 25) == boxes
+    # Lần thứ 3: calibrate lại (calib_frames=1 → fuse ngay)
+    assert geometry.get_boxes(frame(), 175, 25) == [(60, 60, 90, 90)]
+
+
+def test_drift_ignores_traffic_but_detects_camera_shift():
+    geometry = BoxGeometry(StubDetector([(0, 0, 160, 120)]), calib_frames=1, drift_window=3)
+    base = np.tile(np.arange(160, dtype=np.uint8), (120, 1))
+    background = np.dstack([base] * 3)
+    geometry.get_boxes(background, 0, 25)
+
+    # Xe chạy qua / đứng che 1/3 vùng box: không phải drift
+    for i in range(6):
+        busy = background.copy()
+        busy[:, 50 * (i % 3):50 * (i % 3) + 50] = 255
+        assert not geometry._drifted(busy)
+
+    # Camera bị xoay: cả vùng box đổi
+    shifted = np.ascontiguousarray(background[:, ::-1])
+    assert [geometry._drifted(shifted) for _ in range(3)][-1]
+
+
+def test_matching_cache_is_kept(tmp_path):
+    cache = str(tmp_path / "cam1.json")
+    boxes = [(10, 10, 50, 50)]
+    BoxGeometry(StubDetector(boxes), calib_frames=1, cache_path=cache).get_boxes(frame(), 0, 25)
+
+    detector = StubDetector(boxes)
+    geometry = BoxGeometry(detector, calib_frames=1, cache_path=cache)
+    assert geometry.get_boxes(frame(), 0, 25) == boxes
+    assert geometry.reference is not None
+    assert not geometry.needs_detection(frame(), 1, 25)
+    assert detector.calls == 1
@@ -0,0 +1,68 @@
+import cv2
+import numpy as np
+
+from src.clips import ClipBuffer
+
+
+def make_frame(idx):
+    return np.full((48, 64, 3), idx * 5, dtype=np.uint8)
+
+
+def read_clip(path):
+    cap = cv2.VideoCapture(str(path))
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def test_ring_evicts_by_byte_budget():
+    clips = ClipBuffer(fps=10, pre_seconds=5, post_seconds=5, max_bytes=20_000)
+    rng = np.random.default_rng(0)
+    for idx in range(30):
+        clips.add(idx, rng.integers(0, 256, (48, 64, 3), dtype=np.uint8))
+    clips.close()
+
+    stats = clips.stats()
+    assert stats["bytes"] <= 20_000
+    assert stats["frames"] < 30 and stats["evicted"] == 30 - stats["frames"]
+    # Frame còn lại là các frame mới nhất, liên tục
+    assert [idx for idx, _ in clips.frames] == list(range(30 - stats["frames"], 30))
+
+
+def test_clip_holds_pre_and_post_window(tmp_path):
+    clips = ClipBuffer(fps=10, pre_seconds=1, post_seconds=1)
+    path = tmp_path / "clips" / "v1.mp4"
+
+    for idx in range(40):
+        clips.add(idx, make_frame(idx))
+        if idx == 20:
+            clips.trigger(idx, str(path))
+        if idx == 29:
+            assert clips.stats()["pending"] == 1
+    assert clips.stats()["pending"] == 0    # đã gửi ghi khi tới frame 30
+    clips.close()
+
+    frames = read_clip(path)
+    assert clips.written == 1
+    assert len(frames) == 21                 # frame 10..30
+    assert abs(frames[0].mean() - 10 * 5) < 4
+    assert abs(frames[-1].mean() - 30 * 5) < 4
+
+
+def test_flush_writes_partial_clip(tmp_path):
+    clips = ClipBuffer(fps=10, pre_seconds=1, post_seconds=1)
+    path = tmp_path / "v2.mp4"
+
+    for idx in range(40):
+        clips.add(idx, make_frame(idx))
+        if idx == 35:
+            clips.trigger(idx, str(path))
+    clips.close()
+
+    # Hết video trước post window: ghi những frame đang có (25..39)
+    assert len(read_clip(path)) == 15
@@ -0,0 +1,97 @@
+import gzip
+import json
+
+import pytest
+from flask import Flask
+
+from backend import http_cache
+from backend.http_cache import ResponseCache, compress_response, conditional_json, versioned_json
+
+
+class FakeBrotli:
+    @staticmethod
+    def compress(data, quality=11):
+        return b"br:" + data
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    cache = ResponseCache()
+    state = {"version": 1, "builds": 0}
+
+    @app.after_request
+    def compress(response):
+        return compress_response(response, cache)
+
+    @app.route("/items")
+    def items():
+        def build():
+            state["builds"] += 1
+            return [{"id": i, "plate": "29A12345"} for i in range(100)]
+        return versioned_json(cache, state["version"], build)
+
+    @app.route("/status")
+    def status():
+        return conditional_json({"running": True, "ts": state["version"]}, ignore=("ts",))
+
+    client = app.test_client()
+    client.state = state
+    return client
+
+
+def test_etag_returns_304_without_rebuilding(client):
+    first = client.get("/items")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    again = client.get("/items", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert client.state["builds"] == 1
+
+    # Dữ liệu đổi version → ETag mới, body build lại
+    client.state["version"] = 2
+    changed = client.get("/items", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert client.state["builds"] == 2
+
+
+def test_conditional_json_ignores_volatile_keys(client):
+    etag = client.get("/status").headers["ETag"]
+    client.state["version"] = 5
+    assert client.get("/status", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_gzip_chosen_from_accept_encoding(client, monkeypatch):
+    monkeypatch.setattr(http_cache, "brotli", None)
+    plain = client.get("/items")
+    assert "Content-Encoding" not in plain.headers
+
+    response = client.get("/items", headers={"Accept-Encoding": "br;q=1.0, gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert json.loads(gzip.decompress(response.data)) == json.loads(plain.data)
+
+    # ETag bản nén có hậu tố, vẫn khớp 304
+    etag = response.headers["ETag"]
+    assert etag.endswith('-gzip"')
+    revalidate = client.get("/items", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert revalidate.status_code == 304
+
+
+def test_brotli_preferred_when_available(client, monkeypatch):
+    monkeypatch.setattr(http_cache, "brotli", FakeBrotli)
+    plain = client.get("/items").data
+
+    response = client.get("/items", headers={"Accept-Encoding": "gzip, deflate, br"})
+    assert response.headers["Content-Encoding"] == "br"
+    assert response.data == b"br:" + plain
+    assert response.headers["ETag"].endswith('-br"')
+
+
+def test_small_body_not_compressed(client):
+    response = client.get("/status", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
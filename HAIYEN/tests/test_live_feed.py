@@ -0,0 +1,30 @@
+import threading
+
+from backend.live_feed import LiveFeed
+from src.store import ViolationStore
+
+
+def record(i):
+    return {"timestamp": 1000.0 + i, "plate": f"29A-{i:03d}", "log": f"log/{i}.json"}
+
+
+def test_feed_starts_after_import(tmp_path):
+    store = ViolationStore(str(tmp_path / "violations.db"))
+    imported = threading.Event()
+    feed = LiveFeed(store, interval=0.01, after=imported).start()
+    try:
+        # Log cũ nạp sau khi feed.start() nhưng trước khi feed có mốc
+        store.add_many([record(i) for i in range(3)])
+        assert feed.last_id is None
+        assert feed.wait(0, 0, timeout=0.05) == ([], 0)
+        imported.set()
+        assert feed.ready.wait(timeout=2)
+        baseline = feed.last_id
+        assert baseline == 3
+
+        store.add(record(10))
+        items, _ = feed.wait(baseline, 0, timeout=2)
+        assert [v["plate"] for v in items] == ["29A-010"]
+    finally:
+        feed.close()
+        store.close()
@@ -0,0 +1,18 @@
+import os
+import time
+
+from backend.live_frames import LiveFrames
+
+
+def test_is_live(tmp_path):
+    frames = LiveFrames(str(tmp_path), stale_seconds=5.0)
+    assert not frames.is_live("cam1")
+
+    path = tmp_path / "cam1.jpg"
+    path.write_bytes(b"jpeg")
+    assert frames.is_live("cam1")
+
+    # Pipeline dừng đột ngột: file còn nhưng không được ghi nữa
+    old = time.time() - 10
+    os.utime(path, (old, old))
+    assert not frames.is_live("cam1")
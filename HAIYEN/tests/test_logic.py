@@ -0,0 +1,36 @@
+from src.logic import ViolationLogic
+
+BOX = [(0, 0, 100, 100)]
+
+
+def test_lost_tracks_are_forgotten():
+    logic = ViolationLogic(fps=10, stop_time_threshold=1, max_lost=3)
+    for _ in range(5):
+        logic.update([1, 2], [(10, 10, 20, 20), (50, 50, 60, 60)], BOX)
+    assert logic.track_ids.tolist() == [1, 2]
+
+    # Track 2 kết thúc: sau max_lost frame không thấy thì bị xoá khỏi trạng thái
+    for _ in range(5):
+        logic.update([1], [(10, 10, 20, 20)], BOX)
+    assert logic.track_ids.tolist() == [1]
+    assert len(logic.last_position) == len(logic.stop_counter) == len(logic.last_seen) == 1
+
+    # Track 1 vẫn giữ bộ đếm đứng yên → vi phạm sau đủ 1 giây
+    assert logic.update([1], [(10, 10, 20, 20)], BOX) == {1}
+
+
+def test_empty_frames_age_tracks():
+    logic = ViolationLogic(fps=10, max_lost=2)
+    logic.update([7], [(10, 10, 20, 20)], BOX)
+    for _ in range(3):
+        logic.update([], [], BOX)
+    assert logic.track_ids.size == 0
+
+
+def test_check_violation_with_many_tracks():
+    logic = ViolationLogic(fps=10, stop_time_threshold=1, max_lost=30)
+    ids = list(range(40))
+    for _ in range(11):
+        violated = [logic.check_violation(i, (10, 10, 20, 20), BOX) for i in ids]
+    assert logic.track_ids.tolist() == ids
+    assert all(violated)
@@ -0,0 +1,78 @@
+import struct
+
+import cv2
+import numpy as np
+import pytest
+
+from src.mp4 import _offset_tables, _parse, faststart, is_faststart, read_atoms
+
+
+def write_clip(path, frames=12):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), 10, (64, 48))
+    if not writer.isOpened():
+        pytest.skip("cv2 cannot write mp4v here")
+    for i in range(frames):
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        cv2.rectangle(frame, (i * 4, 10), (i * 4 + 10, 30), (0, 255, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def atom_order(path):
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        return [a[0] for a in read_atoms(f, 0, f.tell())]
+
+
+def chunk_offsets(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "rb") as f:
+        atoms = read_atoms(f, 0, len(data))
+    _, pos, header, size = next(a for a in atoms if a[0] == b"moov")
+    offsets = []
+    for kind, body in _offset_tables(_parse(data[pos + header:pos + size])):
+        count = struct.unpack(">I", body[4:8])[0]
+        fmt = f">{count}I" if kind == b"stco" else f">{count}Q"
+        offsets += struct.unpack(fmt, body[8:8 + struct.calcsize(fmt)])
+    return offsets
+
+
+def decode(path):
+    cap = cv2.VideoCapture(str(path))
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def test_faststart_round_trip(tmp_path):
+    src = tmp_path / "clip.mp4"
+    out = tmp_path / "clip_fast.mp4"
+    write_clip(src)
+    if is_faststart(str(src)):
+        pytest.skip("VideoWriter already wrote moov first")
+
+    assert faststart(str(src), str(out))
+
+    kinds = atom_order(out)
+    assert kinds.index(b"moov") < kinds.index(b"mdat")
+    assert is_faststart(str(out)) is True
+
+    # Dữ liệu media dời đi đúng kích thước moov
+    with open(out, "rb") as f:
+        atoms = read_atoms(f, 0, out.stat().st_size)
+    moov_size = next(a[3] for a in atoms if a[0] == b"moov")
+    before, after = chunk_offsets(src), chunk_offsets(out)
+    assert before and [b + moov_size for b in before] == after
+
+    original, converted = decode(src), decode(out)
+    assert len(converted) == len(original) == 12
+    assert all(np.array_equal(a, b) for a, b in zip(original, converted))
+
+    # Chạy lại trên file đã faststart: không ghi gì
+    assert faststart(str(out)) is False
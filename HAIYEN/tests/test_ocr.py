@@ -0,0 +1,27 @@
+import numpy as np
+
+from src.ocr import PlateOCR
+
+
+class FakePaddle:
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, imgs):
+        self.batches.append(imgs)
+        return [{"rec_texts": ["29A", "12345"], "rec_scores": [0.9, 0.8]} for _ in imgs]
+
+
+def test_crops_are_passed_unchanged():
+    ocr = PlateOCR.__new__(PlateOCR)    # không load paddle
+    ocr.batch_size = 2
+    ocr.ocr = FakePaddle()
+
+    crops = [np.zeros((30, 90, 3), np.uint8), None, np.zeros((60, 70, 3), np.uint8),
+             np.zeros((20, 100, 3), np.uint8)]
+    results = ocr.read_plates(crops)
+
+    assert [len(b) for b in ocr.ocr.batches] == [2, 1]
+    assert [img.shape for b in ocr.ocr.batches for img in b] == [(30, 90, 3), (60, 70, 3), (20, 100, 3)]
+    assert results[1] == ("", 0.0)
+    assert results[0][0] == "29A 12345" and abs(results[0][1] - 0.85) < 1e-6
@@ -0,0 +1,76 @@
+import time
+import queue
+import threading
+
+from src.metrics import metrics
+from src.pipeline import FramePipeline, put_latest
+from src.utils import is_live_source
+
+
+def test_put_latest_drops_oldest():
+    q = queue.Queue(maxsize=2)
+    assert put_latest(q, 1) == []
+    assert put_latest(q, 2) == []
+    assert put_latest(q, 3) == [1]
+    assert [q.get_nowait(), q.get_nowait()] == [2, 3]
+
+
+def test_live_pipeline_drops_instead_of_blocking():
+    metrics.reset()
+    release = threading.Event()
+    done = threading.Event()
+    frames = iter(range(20))
+
+    def read_frame():
+        frame = next(frames, None)
+        if frame is None:
+            done.set()
+        return frame
+
+    def slow(item):
+        release.wait()
+        return item
+
+    pipeline = FramePipeline(read_frame, [("infer", slow)], queue_size=2,
+                             drop_frames=True, labels={"camera": "cam"}).start()
+    # decode không bị chặn: đọc hết 20 frame dù infer chưa xong frame nào
+    assert done.wait(timeout=2)
+    release.set()
+
+    idx = [item["idx"] for item in pipeline.results()]
+    assert idx == sorted(idx) and idx[-1] == 19
+    assert pipeline.dropped == 20 - len(idx) > 0
+    assert f'haiyen_frames_dropped_total{{camera="cam",queue="decode"}} {pipeline.dropped}' in metrics.render()
+
+
+def test_is_live_source():
+    assert is_live_source(0)
+    assert is_live_source("1")
+    assert is_live_source("rtsp://10.0.0.11/stream")
+    assert not is_live_source("assets/video/2.mp4")
+
+
+def test_close_joins_threads_after_consumer_error():
+    calls = []
+
+    def read_frame():
+        time.sleep(0.001)
+        return len(calls)
+
+    def infer(item):
+        calls.append(item["idx"])
+        return item
+
+    pipeline = FramePipeline(read_frame, [("infer", infer), ("annotate", lambda item: item)],
+                             queue_size=2).start()
+    try:
+        for item in pipeline.results():
+            if item["idx"] == 5:
+                raise RuntimeError("consumer failed")
+    except RuntimeError:
+        pipeline.close()
+
+    assert not any(t.is_alive() for t in pipeline.threads)
+    processed = len(calls)
+    time.sleep(0.05)
+    assert len(calls) == processed     # không còn thread nào chạm vào state
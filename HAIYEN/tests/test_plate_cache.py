@@ -0,0 +1,76 @@
+import pytest
+
+from src.plate_cache import PlateCache, vote_plate
+
+
+def test_vote_majority_per_character():
+    readings = [("29A12345", 0.9), ("29A12845", 0.9), ("29A12345", 0.9)]
+    text, conf = vote_plate(readings)
+    assert text == "29A12345"
+    # 7 vị trí đồng thuận hoàn toàn, 1 vị trí 2/3
+    assert conf == pytest.approx((7 + 2 / 3) / 8 * 0.9)
+
+
+def test_vote_confidence_outweighs_count():
+    readings = [("51F0001", 0.3), ("51F0001", 0.3), ("51F0007", 0.9)]
+    assert vote_plate(readings)[0] == "51F0007"
+
+
+def test_vote_tie_keeps_first_reading():
+    assert vote_plate([("30E1", 0.5), ("30E7", 0.5)])[0] == "30E1"
+    # Hoà giữa 2 độ dài: nhóm xuất hiện trước thắng
+    assert vote_plate([("30E12", 0.5), ("30E123", 0.5)])[0] == "30E12"
+
+
+def test_vote_normalises_text():
+    text, conf = vote_plate([("29A 12345", 0.9), ("29a12345", 0.9), ("  ", 0.9)])
+    assert text == "29A12345"
+    assert conf == pytest.approx(0.9)
+    assert vote_plate([]) == ("", 0.0)
+    assert vote_plate([(" ", 0.9)]) == ("", 0.0)
+
+
+def test_cache_done_after_confident_readings():
+    cache = PlateCache(min_readings=3, min_confidence=0.8, sample_every=5)
+
+    assert cache.needs_reading(1, 0)
+    cache.add(1, "29A 12345", 0.95, 0)
+    assert not cache.needs_reading(1, 3)      # chưa đủ sample_every
+    assert cache.needs_reading(1, 5)
+    cache.add(1, "29A12345", 0.95, 5)
+    assert not cache.entries[1]["done"]       # mới 2 kết quả
+
+    cache.add(1, "29A12345", 0.95, 10)
+    assert cache.entries[1]["done"]
+    assert cache.consensus(1) == ("29A12345", pytest.approx(0.95))
+    assert not cache.needs_reading(1, 100)
+    assert cache.stats()["skipped"] == 1
+
+
+def test_cache_low_confidence_stops_at_max_readings():
+    cache = PlateCache(min_readings=3, max_readings=4, min_confidence=0.8)
+    for i in range(3):
+        cache.add(2, "29A12345", 0.5, i * 5)
+    assert not cache.entries[2]["done"]
+
+    cache.add(2, "", 0.0, 15)                  # OCR rỗng vẫn tính 1 lần thử
+    assert cache.entries[2]["done"]
+    assert cache.consensus(2)[0] == "29A12345"
+    assert cache.stats()["ocr_calls"] == 4
+
+
+def test_cache_evict_prune_and_clear():
+    cache = PlateCache(ttl=10)
+    for tid in (1, 2, 3):
+        cache.needs_reading(tid, 0)
+    cache.needs_reading(2, 8)
+
+    cache.evict(3)
+    assert cache.consensus(3) == ("", 0.0)
+
+    cache.prune(15)                            # track 1 quá ttl, track 2 còn
+    assert set(cache.entries) == {2}
+
+    cache.needs_reading(4, 15)
+    cache.clear(keep={4})
+    assert set(cache.entries) == {4}
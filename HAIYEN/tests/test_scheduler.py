@@ -0,0 +1,61 @@
+import time
+import queue
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.scheduler import MultiStreamScheduler, _END
+
+
+class FakeCapture:
+    def __init__(self, frames):
+        self.frames = frames
+
+    def read(self):
+        if self.frames <= 0:
+            return False, None
+        self.frames -= 1
+        return True, np.zeros((4, 4, 3), dtype=np.uint8)
+
+
+def start_reader(drop_frames):
+    scheduler = SimpleNamespace(frame_queue=queue.Queue(maxsize=4), stop_event=threading.Event())
+    stream = SimpleNamespace(name="cam", cap=FakeCapture(10), drop_frames=drop_frames,
+                             frames=0, dropped=0)
+    reader = threading.Thread(target=MultiStreamScheduler._read_loop, args=(scheduler, stream),
+                              daemon=True)
+    reader.start()
+    return scheduler, stream, reader
+
+
+def drain(scheduler):
+    items = []
+    while (item := scheduler.frame_queue.get(timeout=2)) is not _END:
+        items.append(item[1])
+    return items
+
+
+def test_live_reader_drops_when_queue_is_full():
+    scheduler, stream, reader = start_reader(drop_frames=True)
+    # Reader đọc hết 10 frame dù chưa ai lấy frame nào (chỉ chờ ở marker kết thúc)
+    deadline = time.time() + 2
+    while stream.frames < 10 and time.time() < deadline:
+        time.sleep(0.01)
+    assert stream.frames == 10
+
+    items = drain(scheduler)
+    reader.join(timeout=2)
+    assert items == [0, 1, 2, 3]
+    assert stream.dropped == 6
+
+
+def test_file_reader_blocks_instead_of_dropping():
+    scheduler, stream, reader = start_reader(drop_frames=False)
+    reader.join(timeout=0.2)
+    assert reader.is_alive()        # chờ scheduler lấy frame
+
+    items = drain(scheduler)
+    reader.join(timeout=2)
+    assert items == list(range(10))
+    assert stream.dropped == 0
@@ -0,0 +1,34 @@
+import pytest
+
+from src.store import ViolationStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ViolationStore(str(tmp_path / "violations.db"))
+    store.add_many([
+        {"timestamp": 1000.0 + i, "plate": f"29A-{i:03d}", "video": "a.mp4", "log": f"log1/{i}.json"}
+        for i in range(5)
+    ])
+    yield store
+    store.close()
+
+
+def test_plate_prefix_and_pagination(store):
+    items, cursor = store.query(plate="29a 00", limit=2)
+    assert [v["plate"] for v in items] == ["29A-004", "29A-003"]
+
+    items, cursor = store.query(plate="29a 00", cursor=cursor, limit=2)
+    assert [v["plate"] for v in items] == ["29A-002", "29A-001"]
+
+
+@pytest.mark.parametrize("plate", ["N/A", "-", " "])
+def test_empty_plate_filter_is_rejected(store, plate):
+    with pytest.raises(ValueError):
+        store.query(plate=plate)
+
+
+def test_video_counts(store):
+    store.add({"timestamp": 2000.0, "plate": "30B-111", "video": "b.mp4", "log": "log2/0.json"})
+    store.add({"timestamp": 2001.0, "plate": "30B-112", "log": "log3/0.json"})
+    assert store.video_counts() == {"a.mp4": 5, "b.mp4": 1}
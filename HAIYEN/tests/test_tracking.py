@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.detect_violation import ViolationSystem
+from src.tracking import clear_tracker
+
+
+class FakeByteTracker:
+    def __init__(self):
+        self.tracked_stracks = ["t"]
+        self.lost_stracks = ["l"]
+        self.removed_stracks = ["r"]
+        self.frame_id = 42
+        self.kalman_filter = None
+        self.ids_reset = False
+
+    def get_kalmanfilter(self):
+        return "kf"
+
+    def reset_id(self):
+        self.ids_reset = True
+
+
+def test_clear_tracker_keeps_id_counter():
+    tracker = FakeByteTracker()
+    clear_tracker(tracker)
+    assert (tracker.tracked_stracks, tracker.lost_stracks, tracker.removed_stracks) == ([], [], [])
+    assert tracker.frame_id == 0 and tracker.kalman_filter == "kf"
+    assert not tracker.ids_reset
+
+
+def test_roi_change_closes_events_and_clears_plates(stub_models, tmp_path):
+    system = ViolationSystem(warm_up=False, evidence_dir=str(tmp_path), roi_margin=10)
+    try:
+        system.geometry = SimpleNamespace(roi=lambda shape, margin: (0, 0, 50, 50))
+        frame = np.zeros((100, 100, 3), dtype=np.uint8)
+        system.events.update(0, frame, [{"track_id": 1, "bbox": (10, 10, 20, 20)}], {1}, [])
+        system.plates.add(1, "29A12345", 0.9, 0)
+        system.plates.add(2, "30B11111", 0.9, 0)
+
+        roi, closed = system.update_roi(frame)
+        assert roi == (0, 0, 50, 50)
+        assert [ev.track_id for ev in closed] == [1]
+        assert not system.events.open
+        # Biển số của event vừa đóng giữ lại cho finalize_events, track khác bị bỏ
+        assert set(system.plates.entries) == {1}
+
+        assert system.update_roi(frame) == ((0, 0, 50, 50), [])
+    finally:
+        system.close()
@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+
+from backend.video_index import VideoIndex
+from src.store import ViolationStore
+
+
+def write_video(path, frames=3):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+    for _ in range(frames):
+        writer.write(np.zeros((48, 64, 3), dtype=np.uint8))
+    writer.release()
+
+
+def test_violation_counts_from_store(tmp_path):
+    video_dir = tmp_path / "video"
+    video_dir.mkdir()
+    write_video(video_dir / "cam1_output.avi")
+    write_video(video_dir / "cam2_output.avi")
+
+    store = ViolationStore(str(tmp_path / "violations.db"))
+    store.add_many([
+        {"timestamp": 1000.0 + i, "video": "cam1_output.avi", "log": f"log/{i}.json"}
+        for i in range(3)
+    ])
+    index = VideoIndex(str(tmp_path / "index" / "videos.db"), str(video_dir),
+                       str(tmp_path / "thumbnails"), store)
+    try:
+        index.scan()
+        counts = {row["name"]: row["violation_count"] for row in index.list()}
+        assert counts == {"cam1_output.avi": 3, "cam2_output.avi": 0}
+
+        # Vi phạm mới → đếm lại và tăng version dù không có video mới
+        version = index.version
+        store.add({"timestamp": 2000.0, "video": "cam2_output.avi", "log": "log/x.json"})
+        index.scan()
+        counts = {row["name"]: row["violation_count"] for row in index.list()}
+        assert counts == {"cam1_output.avi": 3, "cam2_output.avi": 1}
+        assert index.version == version + 1
+    finally:
+        store.close()
+
+
+def test_rows_are_written_as_files_are_probed(tmp_path):
+    video_dir = tmp_path / "video"
+    video_dir.mkdir()
+    for i in range(3):
+        write_video(video_dir / f"cam{i}_output.avi")
+
+    store = ViolationStore(str(tmp_path / "violations.db"))
+    index = VideoIndex(str(tmp_path / "index" / "videos.db"), str(video_dir),
+                       str(tmp_path / "thumbnails"), store)
+    listed = []
+    probe = index.probe
+
+    def probe_and_list(name, st):
+        listed.append(len(index.list()))
+        return probe(name, st)
+
+    index.probe = probe_and_list
+    try:
+        index.scan()
+        # Lúc probe file thứ n, n - 1 file trước đã có trong /api/videos
+        assert listed == [0, 1, 2]
+        assert len(index.list()) == 3
+    finally:
+        store.close()
@@ -0,0 +1,39 @@
+import pytest
+
+from src.detect_violation import ViolationSystem
+
+
+@pytest.mark.parametrize("warm_up", [True, False])
+def test_wait_ready_with_stub_models(stub_models, tmp_path, warm_up):
+    system = ViolationSystem(warm_up=warm_up, evidence_dir=str(tmp_path))
+    try:
+        system.wait_ready()
+        assert system.warmup.state == "ready"
+        assert system.warmup.errors == {}
+        assert all(stub.calls == 1 for stub in stub_models.values())
+        assert (tmp_path / "readiness.json").exists()
+    finally:
+        system.close()
+
+
+def test_evidence_dir_paths(stub_models, tmp_path):
+    system = ViolationSystem(warm_up=False, evidence_dir=str(tmp_path / "a"))
+    try:
+        assert system.store.db_path == str(tmp_path / "a" / "violations.db")
+
+        system.set_evidence_dir(str(tmp_path / "b"))
+        assert system.store.db_path == str(tmp_path / "b" / "violations.db")
+        assert system.evidence.store is system.store
+        assert system.warmup.status_path == str(tmp_path / "b" / "readiness.json")
+    finally:
+        system.close()
+
+
+def test_store_disabled(stub_models, tmp_path):
+    system = ViolationSystem(warm_up=False, evidence_dir=str(tmp_path), store=False)
+    try:
+        assert system.store is None
+        assert system.evidence.store is None
+        assert not (tmp_path / "violations.db").exists()
+    finally:
+        system.close()
@@ -0,0 +1,59 @@
+import numpy as np
+
+from src.logic import ViolationLogic
+from src.zones import ZoneIndex
+
+RECT = (100, 100, 200, 200)
+TRIANGLE = [[300, 100], [400, 100], [300, 200]]
+
+
+def test_points_in_rect_and_polygon():
+    index = ZoneIndex(scale=0.5)
+    index.set_zones([RECT, TRIANGLE])
+
+    points = [(150, 150), (50, 50), (320, 120), (390, 190), (250, 150)]
+    assert index.lookup(points).tolist() == [1, 0, 2, 0, 0]
+    assert index.lookup(np.zeros((0, 2))).size == 0
+
+
+def test_overlapping_zones_return_last_zone():
+    index = ZoneIndex(scale=1.0)
+    index.set_zones([(0, 0, 100, 100), (50, 50, 150, 150)])
+
+    # Vùng chồng lấn thuộc zone vẽ sau, phần còn lại giữ zone của nó
+    assert index.lookup([(25, 25), (75, 75), (125, 125)]).tolist() == [1, 2, 2]
+
+
+def test_points_outside_label_map_are_not_in_zone():
+    index = ZoneIndex(scale=0.5)
+    index.set_zones([(0, 0, 1919, 1079)])
+
+    # Góc frame vẫn trong zone; toạ độ âm hoặc vượt label map thì không
+    inside = [(0, 0), (1919, 1079), (1919, 0)]
+    outside = [(-1, 10), (10, -5), (1930, 500), (500, 1100)]
+    assert index.lookup(inside).tolist() == [1, 1, 1]
+    assert index.lookup(outside).tolist() == [0, 0, 0, 0]
+
+
+def test_label_map_rebuilt_only_when_zones_change():
+    index = ZoneIndex()
+    assert index.set_zones([RECT])
+    assert not index.set_zones([list(RECT)])
+    assert index.set_zones([RECT, TRIANGLE])
+    assert index.builds == 2
+
+    index.set_zones([])
+    assert index.lookup([(150, 150)]).tolist() == [0]
+
+
+def test_bbox_anchor_is_center():
+    logic = ViolationLogic(fps=10, stop_time_threshold=1)
+    zones = [(0, 0, 100, 100)]
+    bboxes = [
+        (60, 60, 120, 120),      # tâm (90, 90) trong zone dù bbox tràn ra ngoài
+        (90, 90, 150, 150),      # chạm zone nhưng tâm (120, 120) ở ngoài
+        (-20, -20, 20, 20),      # bbox sát mép frame, tâm (0, 0) trong zone
+    ]
+    for _ in range(12):
+        violating = logic.update([1, 2, 3], bboxes, zones)
+    assert violating == {1, 3}